@@ -0,0 +1,502 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+# Streaming leak / misuse detector for sensor CSVs (generate_data output:
+# timestamp, then <node>_<quantity> columns). Rows are consumed one at a
+# time or in micro-batches; per-channel state is fixed size.
+#
+# Demand moves every flow together (the diurnal factor), so each row's
+# common demand factor m is the median, over the flow channels, of reading
+# over expected normalized level. Per channel:
+#
+#   level          flows: normalized level (reading / m); other channels:
+#                  mean reading, with a regression on m^2 (friction losses
+#                  grow with the square of the flow)
+#   resid_var      variance of prediction errors, in the same units
+#   slot_mean      offset from the above per time-of-day slot, used once a
+#                  channel has MIN_DAYS days of normal readings in that slot
+#
+# A reading is anomalous when its prediction error exceeds THRESHOLD
+# standard deviations (never less than MIN_STD, or REL_STD of the
+# prediction) in the alerting direction: flows rising, pressures and levels
+# dropping. An anomalous reading is kept out of its channel's state, and a
+# rising flow keeps its whole row out of every channel's state, since extra
+# draw moves channels that are not flagged on their own too. So the state
+# only learns normal readings, and an anomaly that recurs at the same time
+# every day keeps alerting. A channel that stays anomalous for
+# RELEARN_HOURS is taken to have a new normal and learns again.
+#
+# Each row yields at most one alert:
+#
+#   flows rise     Extra draw shows up by the same amount on every flow
+#                  channel upstream of it, so the node is the rising channel
+#                  with the smallest flow among those within RISE_SHARE of
+#                  the largest rise. With known fixtures (nodes with a
+#                  demand) a fixture is Misuse and any other node a Leak.
+#                  Otherwise the flow hierarchy is learned from normal rows:
+#                  a junction's fluctuations include those of the smaller
+#                  channels below it, so a node whose residual correlates
+#                  with a smaller channel's (CONTAIN_CORR) is a junction,
+#                  and extra draw there that no meter below it sees is a
+#                  Leak; a node with no such channel is a metered fixture
+#                  (Misuse). Until MIN_STRUCTURE_ROWS normal rows are seen,
+#                  a rise is a Leak only if pressures also dropped.
+#   pressure drop  Leak at the largest drop.
+#
+# Rows are processed in blocks of up to BLOCK_ROWS: a block is predicted
+# from the state at its start (replayed row by row where that flags
+# anything) and learned in one update, so the work is a fixed number of
+# array operations per block rather than per row.
+
+THRESHOLD = 5.0 # standard deviations
+WARMUP_MINUTES = 120 # history before alerts start
+WARMUP_ROWS = 8 # and at least this many readings
+MEMORY_HOURS = 24.0 # time constant of the per-channel averages
+SLOT_MINUTES = 15
+MIN_FLOW = 1.0 # flows expected below this are left out of the common demand factor
+MIN_FLOW_CHANNELS = 3 # fewer usable flows than this: no demand factor (m = 1)
+MIN_DAYS = 2 # days of history before a time-of-day slot offset is used
+BASELINE_DAYS = 7 # window of the slot offsets' moving average
+RELEARN_HOURS = 24.0
+MIN_STD = 0.01
+REL_STD = 0.01
+RISE_SHARE = 0.5
+BLOCK_ROWS = 64
+STRUCTURE_ROWS = 1024 # normal flow residual rows kept for learning the flow hierarchy
+MIN_STRUCTURE_ROWS = 150
+CONTAIN_CORR = 0.25
+CONTAIN_T = 4.0 # and corr * sqrt(rows) at least this
+
+SEVERITY = {"Leak": "High", "Misuse": "Medium"}
+
+def split_column(column):
+    """'Floor5_Junction_pressure' -> ('Floor5_Junction', 'pressure')."""
+    node, _, quantity = column.rpartition("_")
+    return node, quantity
+
+def minute_of_day(timestamp):
+    """Minutes since midnight of an ISO 'YYYY-MM-DDTHH:MM[:SS]' string."""
+    return int(timestamp[11:13]) * 60 + int(timestamp[14:16])
+
+class Alert:
+    def __init__(self, timestamp, node_id, anomaly_type, score):
+        self.timestamp = timestamp
+        self.node_id = node_id
+        self.anomaly_type = anomaly_type
+        self.score = score
+
+    def to_json(self):
+        return {
+            "timestamp": self.timestamp,
+            "node_id": self.node_id,
+            "anomaly_type": self.anomaly_type,
+            "severity": SEVERITY[self.anomaly_type],
+            "score": round(self.score, 2),
+        }
+
+def _run_lengths(anomalous, run):
+    """Consecutive anomalous rows ending at each row of a block, continuing `run`."""
+    rows = np.arange(len(anomalous))[:, None]
+    last_normal = np.maximum.accumulate(np.where(anomalous, -1, rows), axis=0)
+    return np.where(last_normal >= 0, rows - last_normal, run + rows + 1)
+
+class StreamingDetector:
+    def __init__(self, columns, threshold=THRESHOLD, warmup_minutes=WARMUP_MINUTES, slot_minutes=SLOT_MINUTES,
+                 fixtures=None):
+        self.columns = list(columns)
+        self.nodes = []
+        quantities = []
+        for column in self.columns:
+            node, quantity = split_column(column)
+            self.nodes.append(node)
+            quantities.append(quantity)
+        quantities = np.array(quantities)
+        # +1: alert on a rise, -1: on a drop, 0: never
+        self.direction = np.where(quantities == "flow", 1.0, np.where(np.isin(quantities, ("pressure", "level")), -1.0, 0.0))
+        self.is_flow = quantities == "flow"
+        self.flows = np.flatnonzero(self.is_flow)
+        self.is_drop = self.direction < 0
+        self.is_rise = self.direction > 0
+        # Fixture channels (None: unknown, learn the flow hierarchy instead)
+        self.is_fixture = None
+        if fixtures is not None:
+            fixtures = set(fixtures)
+            self.is_fixture = np.array([n in fixtures for n in self.nodes], dtype=bool)
+
+        self.threshold = threshold
+        self.warmup_minutes = warmup_minutes
+        self.slot_minutes = slot_minutes
+        n, n_slots = len(self.columns), -(-24 * 60 // slot_minutes)
+        self.steps = 0
+        self.step_minutes = None # sampling interval, from the first two rows
+        self._last_time = None
+        self.learned = np.zeros(n, dtype=np.int64) # normal readings learned
+        self.level = np.zeros(n)
+        self.mean_u = np.zeros(n) # regression of non-flow channels on u = m^2
+        self.var_u = np.zeros(n)
+        self.cov_u = np.zeros(n)
+        self.resid_var = np.zeros(n)
+        self.run = np.zeros(n, dtype=np.int64) # consecutive anomalous readings
+        self.slot_mean = np.zeros((n_slots, n))
+        self.slot_days = np.zeros((n_slots, n), dtype=np.int64) # days each slot was learned
+        self._visit_learned = np.zeros(n, dtype=bool)
+        self._last_slot = None
+        # Ring buffer of normalized flow residuals from normal rows
+        self._structure = np.zeros((STRUCTURE_ROWS, len(self.flows)))
+        self._structure_rows = 0
+        self._junction = {}
+
+    def update(self, timestamp, x):
+        """Feeds one row (ISO timestamp, values in column order); returns an Alert or None."""
+        alerts = self.update_batch([timestamp], np.asarray(x, dtype=np.float64)[None, :])
+        return alerts[0] if alerts else None
+
+    def update_batch(self, timestamps, values):
+        """Feeds a micro-batch (list of timestamps, rows x columns matrix); returns its alerts."""
+        values = np.asarray(values, dtype=np.float64)
+        seconds = np.array(timestamps, dtype="datetime64[s]").astype(np.int64)
+        alerts = []
+        lo = 0
+        if self.steps == 0 and len(values):
+            self._start(seconds[0], values[0])
+            lo = 1
+        while lo < len(values):
+            # Blocks grow with the history, so the early state adapts row by row
+            hi = min(len(values), lo + max(1, min(BLOCK_ROWS, self.steps)))
+            alerts.extend(self._block(timestamps[lo:hi], seconds[lo:hi], values[lo:hi]))
+            lo = hi
+        return alerts
+
+    def _start(self, second, x):
+        self.steps = 1
+        self._last_time = second
+        self._last_slot = int(second % 86400) // 60 // self.slot_minutes
+        self.level = x.copy()
+        self.mean_u[:] = 1.0
+        self.learned[:] = 1
+        self._visit_learned[:] = True
+
+    def _expected(self, slots):
+        """Slot offsets in use for each row of a block (0 until a slot has MIN_DAYS days)."""
+        return np.where(self.slot_days[slots] >= MIN_DAYS, self.slot_mean[slots], 0.0)
+
+    def _block(self, timestamps, seconds, x):
+        if self.step_minutes is None:
+            self.step_minutes = max((int(seconds[0]) - int(self._last_time)) / 60.0, 1.0 / 60.0)
+        rows = len(x)
+        slots = (seconds % 86400) // 60 // self.slot_minutes
+        offset = self._expected(slots)
+
+        # Common demand factor per row
+        flows = self.flows
+        expected_flow = self.level[flows] + offset[:, flows]
+        usable = np.abs(expected_flow) >= MIN_FLOW
+        m = np.ones(rows)
+        if len(flows):
+            # Median of the usable ratios: unusable ones sort last as +inf
+            ratio = np.sort(np.where(usable, x[:, flows] / np.where(usable, expected_flow, 1.0), np.inf), axis=1)
+            count = usable.sum(axis=1)
+            enough = np.flatnonzero(count >= MIN_FLOW_CHANNELS)
+            if len(enough):
+                c = count[enough]
+                m[enough] = 0.5 * (ratio[enough, (c - 1) // 2] + ratio[enough, c // 2])
+            m = np.where(m > 0, m, 1.0)
+        u = m * m
+
+        norm = x.copy()
+        norm[:, flows] /= m[:, None]
+        slope = np.where(self.var_u > 1e-12, self.cov_u / np.maximum(self.var_u, 1e-12), 0.0)
+        warm = self.steps + np.arange(1, rows + 1) <= max(WARMUP_ROWS, self.warmup_minutes / self.step_minutes)
+
+        # First pass from the state at the start of the block. If it flags
+        # anything, the second replays the averages row by row over the
+        # readings the first pass would learn, so that slow drift within the
+        # block is followed as it would be one row at a time
+        level, mean_u, resid_var = self.level, self.mean_u, self.resid_var
+        for _ in range(2):
+            # Global model (before slot offsets) and prediction, per row
+            model = level + slope * (u[:, None] - mean_u)
+            model[:, flows] = level[..., flows]
+            predicted = model + offset
+            resid = norm - predicted
+            floor = np.maximum(MIN_STD, REL_STD * np.abs(predicted))
+            # Signed so that the alerting direction is positive
+            signed = resid / np.sqrt(np.maximum(resid_var, floor * floor)) * self.direction
+            anomalous = (signed > self.threshold) & ~warm[:, None]
+            run = _run_lengths(anomalous, self.run)
+            relearn = run >= RELEARN_HOURS * 60 / self.step_minutes
+            # Rising flows hold the whole row back; a drop holds back its own channel
+            row_alert = (anomalous & ~relearn & self.is_rise).any(axis=1)
+            learn = relearn | (~anomalous & ~row_alert[:, None])
+            if rows == 1 or not anomalous.any():
+                break
+            level, mean_u, resid_var = self._replay(learn, norm, u, resid)
+        self._learn(slots, u, norm, model, resid, learn, ~row_alert)
+        self.run = run[-1]
+        self.steps += rows
+        self._last_time = seconds[-1]
+
+        alerts = []
+        for t in np.flatnonzero(anomalous.any(axis=1)).tolist():
+            alerts.append(self._alert(timestamps[t], anomalous[t], signed[t], resid[t] * np.where(self.is_flow, m[t], 1.0),
+                                      predicted[t] * np.where(self.is_flow, m[t], 1.0)))
+        return alerts
+
+    def _replay(self, learn, norm, u, resid):
+        """Running level, mean of u and residual variance before each row of a block, learning `learn` in turn."""
+        alpha = min(1.0, self.step_minutes / (MEMORY_HOURS * 60))
+        weight = np.where(learn, np.maximum(alpha, 1.0 / (self.learned + np.cumsum(learn, axis=0))), 0.0)
+        # a_t = (1 - w_t) a_(t-1) + w_t v_t, unrolled with the running product of (1 - w)
+        keep = np.cumprod(1.0 - weight, axis=0)
+        before = []
+        for start, v in ((self.level, norm), (self.mean_u, u[:, None]), (self.resid_var, resid * resid)):
+            after = keep * (start + np.cumsum(weight * v / keep, axis=0))
+            before.append(np.vstack([start, after[:-1]]))
+        return before
+
+    def _learn(self, slots, u, norm, model, resid, learn, normal_rows):
+        """Folds a block's learned readings into the state in one update."""
+        count = learn.sum(axis=0)
+        starts = np.r_[0, np.flatnonzero(np.diff(slots)) + 1]
+        if count.any():
+            # Plain averages early on, exponential weights once MEMORY_HOURS is covered
+            alpha = min(1.0, self.step_minutes / (MEMORY_HOURS * 60))
+            weight = np.maximum(1.0 - (1.0 - alpha) ** count, count / np.maximum(self.learned + count, 1))
+            weight = np.where(count > 0, weight, 0.0)
+            n = np.maximum(count, 1)
+            mean_x = (norm * learn).sum(axis=0) / n
+            mean_u = (u[:, None] * learn).sum(axis=0) / n
+            du = np.where(learn, u[:, None] - mean_u, 0.0)
+            dx = np.where(learn, norm - mean_x, 0.0)
+            # Weighted merge of the running and block moments
+            shift_u, shift_x = mean_u - self.mean_u, mean_x - self.level
+            self.var_u = (1 - weight) * (self.var_u + weight * shift_u * shift_u) + weight * (du * du).sum(axis=0) / n
+            self.cov_u = (1 - weight) * (self.cov_u + weight * shift_u * shift_x) + weight * (du * dx).sum(axis=0) / n
+            self.mean_u += weight * shift_u
+            self.level += weight * shift_x
+            sq = (np.where(learn, resid, 0.0) ** 2).sum(axis=0) / n
+            self.resid_var += weight * (sq - self.resid_var)
+            self.learned += count
+
+            # Slot offsets: each visit of a slot is one day's reading
+            per_slot = max(1.0, self.slot_minutes / self.step_minutes)
+            g = np.where(learn, norm - model, 0.0)
+            touched = slots[starts]
+            sums = np.add.reduceat(g, starts, axis=0)
+            hits = np.add.reduceat(learn, starts, axis=0, dtype=np.int64)
+            if len(np.unique(touched)) < len(touched):
+                # The block wraps past midnight onto a slot it already visited
+                touched, where = np.unique(touched, return_inverse=True)
+                sums = np.array([sums[where == i].sum(axis=0) for i in range(len(touched))])
+                hits = np.array([hits[where == i].sum(axis=0) for i in range(len(touched))])
+            days = self.slot_days[touched]
+            share = np.minimum(1.0, hits / (np.minimum(days + 1, BASELINE_DAYS) * per_slot))
+            baseline = self.slot_mean[touched]
+            baseline += share * (sums / np.maximum(hits, 1) - baseline)
+            self.slot_mean[touched] = baseline
+
+        # Leaving a slot counts a day for the channels that learned in it
+        visits = np.logical_or.reduceat(learn, starts, axis=0)
+        if slots[0] != self._last_slot:
+            self.slot_days[self._last_slot] += self._visit_learned
+            self._visit_learned[:] = False
+        visits[0] |= self._visit_learned
+        np.add.at(self.slot_days, slots[starts[:-1]], visits[:-1])
+        self._visit_learned = visits[-1]
+        self._last_slot = int(slots[-1])
+
+        # Normal rows feed the flow-hierarchy buffer
+        if len(self.flows) and normal_rows.any():
+            new = resid[normal_rows][:, self.flows][-STRUCTURE_ROWS:]
+            at = (self._structure_rows + np.arange(len(new))) % STRUCTURE_ROWS
+            self._structure[at] = new
+            self._structure_rows += len(new)
+            self._junction = {}
+
+    def is_junction(self, k):
+        """
+        True if channel k's normal fluctuations contain those of a smaller
+        flow channel (it feeds other meters), False if they do not, None
+        while fewer than MIN_STRUCTURE_ROWS normal rows have been seen.
+        """
+        if k in self._junction:
+            return self._junction[k]
+        rows = min(self._structure_rows, STRUCTURE_ROWS)
+        pos = int(np.searchsorted(self.flows, k))
+        smaller = np.flatnonzero((np.abs(self.level[self.flows]) >= MIN_FLOW)
+                                 & (np.abs(self.level[self.flows]) < abs(self.level[k])))
+        found = False
+        if rows > 2 and len(smaller):
+            data = self._structure[:rows]
+            data = data - data.mean(axis=0)
+            sd = np.sqrt((data * data).sum(axis=0))
+            corr = (data[:, smaller].T @ data[:, pos]) / np.maximum(sd[smaller] * sd[pos], 1e-12)
+            best = float(corr.max())
+            found = best >= CONTAIN_CORR and best * np.sqrt(rows) >= CONTAIN_T
+        result = True if found else (False if rows >= MIN_STRUCTURE_ROWS else None)
+        self._junction[k] = result
+        return result
+
+    def _alert(self, timestamp, anomalous, signed, resid, predicted):
+        scores = signed * anomalous
+        rises = anomalous & self.is_rise
+        if rises.any():
+            rise = np.where(rises, resid, 0.0)
+            near = rise >= RISE_SHARE * rise.max()
+            k = int(np.argmin(np.where(near, np.abs(predicted), np.inf)))
+            if self.is_fixture is not None:
+                kind = "Misuse" if self.is_fixture[k] else "Leak"
+            else:
+                junction = self.is_junction(k)
+                if junction is None:
+                    junction = bool((anomalous & self.is_drop).any())
+                kind = "Leak" if junction else "Misuse"
+            return Alert(timestamp, self.nodes[k], kind, float(scores[k]))
+        k = int(np.argmax(scores))
+        return Alert(timestamp, self.nodes[k], "Leak", float(scores[k]))
+
+def read_batches(path, batch_rows=1024):
+    """Yields (columns, timestamps, values) micro-batches from a sensor CSV."""
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)[1:]
+        timestamps, rows = [], []
+        for record in reader:
+            timestamps.append(record[0])
+            rows.append(record[1:])
+            if len(rows) == batch_rows:
+                yield columns, timestamps, np.array(rows, dtype=np.float64)
+                timestamps, rows = [], []
+        if rows:
+            yield columns, timestamps, np.array(rows, dtype=np.float64)
+
+def detect_file(path, graph_nodes=None, **options):
+    """
+    Runs a fresh detector over one CSV; returns (alerts, rows). With
+    `graph_nodes` (the nodes the fixtures come from), a file none of whose
+    channels names one of them is run without the fixtures.
+    """
+    detector, alerts, rows = None, [], 0
+    for columns, timestamps, values in read_batches(path):
+        if detector is None:
+            if graph_nodes is not None and options.get("fixtures") is not None \
+                    and not any(split_column(c)[0] in graph_nodes for c in columns):
+                print(f"Warning: no channel of {path} names a graph node; ignoring the graph's fixtures")
+                options = dict(options, fixtures=None)
+            detector = StreamingDetector(columns, **options)
+        alerts.extend(detector.update_batch(timestamps, values))
+        rows += len(timestamps)
+    return alerts, rows
+
+# --- Scoring ---
+
+def expected_labels(labels, anomaly_type):
+    """Labels a scenario file of the given anomaly type should raise, keyed by timestamp."""
+    return {l["timestamp"]: l for l in labels if anomaly_type is not None and l["anomaly_type"] == anomaly_type}
+
+def score(alerts, expected, interval_minutes=None):
+    """
+    Per-timestamp precision/recall of one file's alerts against its expected
+    labels ({timestamp: label}), plus how often the alerted node is right,
+    how many anomaly windows were caught and how long each took to alert.
+    `interval_minutes` splits windows (default: the smallest label spacing).
+    """
+    hits = [a for a in alerts if a.timestamp in expected and a.anomaly_type == expected[a.timestamp]["anomaly_type"]]
+    tp, fp = len(hits), len(alerts) - len(hits)
+    fn = len(expected) - tp
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    result = {
+        "alerts": len(alerts),
+        "labels": len(expected),
+        "true_positives": tp,
+        "false_positives": fp,
+        "false_negatives": fn,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+    }
+    if hits:
+        correct = sum(1 for a in hits if a.node_id == expected[a.timestamp]["node_id"])
+        result["node_accuracy"] = round(correct / len(hits), 4)
+    if expected:
+        # Windows: runs of labelled timestamps no further apart than the interval
+        stamps = sorted(expected)
+        minutes = np.array(stamps, dtype="datetime64[m]").astype(np.int64)
+        gaps = np.diff(minutes)
+        step = interval_minutes or (int(gaps[gaps > 0].min()) if (gaps > 0).any() else 1)
+        starts = np.r_[0, np.flatnonzero(gaps > step) + 1]
+        ends = np.r_[starts[1:], len(stamps)]
+        alerted = np.array(sorted({a.timestamp for a in hits}), dtype="datetime64[m]").astype(np.int64)
+        delays = []
+        for lo, hi in zip(starts.tolist(), ends.tolist()):
+            first = np.searchsorted(alerted, minutes[lo])
+            if first < len(alerted) and alerted[first] <= minutes[hi - 1]:
+                delays.append(int(alerted[first] - minutes[lo]))
+        result["windows"] = len(starts)
+        result["windows_detected"] = len(delays)
+        if delays:
+            # From the start of each detected window to its first matching alert
+            result["detection_delay_minutes"] = round(sum(delays) / len(delays), 1)
+            result["max_detection_delay_minutes"] = max(delays)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream sensor CSVs through the anomaly detector and score it")
+    parser.add_argument("data_dir", help="Directory of scenario CSVs, e.g. ai_data/v1")
+    parser.add_argument("--labels", default=None, help="labels.json (default: <data_dir>/labels.json)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--graph", default=None,
+                        help="Graph the data was generated from; its demand nodes are treated as fixtures")
+    parser.add_argument("--output", default=None, help="Write alerts and scores as JSON")
+    args = parser.parse_args(argv)
+
+    from generate_data import SCENARIOS, graph_adjacency, load_graph
+
+    fixtures = graph_nodes = None
+    if args.graph:
+        nodes, base_demand, _, _ = graph_adjacency(load_graph(args.graph))
+        fixtures = [n for n, d in zip(nodes, base_demand.tolist()) if d > 0]
+        graph_nodes = set(nodes)
+
+    labels_path = args.labels or os.path.join(args.data_dir, "labels.json")
+    labels = []
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    else:
+        print(f"Warning: {labels_path} not found; reporting alerts without scores")
+
+    report = {"files": {}}
+    for stem, anomaly_type, *_ in SCENARIOS:
+        path = os.path.join(args.data_dir, f"{stem}.csv")
+        if not os.path.exists(path):
+            continue
+        start = time.perf_counter()
+        alerts, rows = detect_file(path, graph_nodes, threshold=args.threshold, fixtures=fixtures)
+        elapsed = time.perf_counter() - start
+        entry = {"rows": rows, "rows_per_second": round(rows / elapsed) if elapsed > 0 else None,
+                 "alerts": [a.to_json() for a in alerts]}
+        line = f"{stem}: {rows} rows, {len(alerts)} alerts, {rows / max(elapsed, 1e-9):,.0f} rows/s"
+        if labels:
+            entry["score"] = score(alerts, expected_labels(labels, anomaly_type))
+            s = entry["score"]
+            line += f"; precision {s['precision']:.2f}, recall {s['recall']:.2f}"
+            if "node_accuracy" in s:
+                line += f", node accuracy {s['node_accuracy']:.2f}"
+        print(line)
+        report["files"][stem] = entry
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
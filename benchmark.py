@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import synthetic_building
+
+# Scaling benchmark for the compiler, simulator and validator on synthetic
+# buildings (synthetic_building.py). Every (size, stage) runs in its own
+# process, so peak RSS is that stage's alone and nothing is cached between
+# stages except the compiled build/ directory the later stages read.
+#
+#   compile        compiler.compile_version, cache disabled
+#   simulate-day   zone_sim.ZoneSimulator over one day at 15-minute steps
+#   simulate-step  one generate_data.simulate_step call (reference engine)
+#   validate       validation_agent.RuleEngine with the default rules
+#
+# Results are written as JSON; --baseline compares against an earlier file
+# and exits non-zero on a regression.
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+STAGES = ("compile", "simulate-day", "simulate-step", "validate")
+VERSION = "bench"
+DEFAULT_OUTPUT = "reports/benchmark.json"
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+# --- Stages (run inside the child process, cwd = benchmark workdir) ---
+# Each returns (work, items): imports and graph loading happen here, and
+# only work() is timed. Items are DSL lines, node-steps, nodes and edges.
+
+def _stage_compile():
+    import compiler
+    lines = 0
+    for name in compiler.TOPOLOGY_INPUTS + compiler.ATTRIBUTE_INPUTS:
+        with open(f"data/{VERSION}/{name}") as f:
+            lines += sum(1 for _ in f)
+    return (lambda: compiler.compile_version(VERSION, use_cache=False)), lines
+
+def _stage_simulate_day():
+    import generate_data
+    import zone_sim
+    G = generate_data.load_graph(f"build/{VERSION}/graph_arrays")
+    timestamps = generate_data.make_timestamps(generate_data.START_TIME, 24, 15)
+    def work():
+        with zone_sim.ZoneSimulator(G, workers=1) as zones:
+            zones.simulate(timestamps, seed=0)
+    return work, len(timestamps) * G.number_of_nodes()
+
+def _stage_simulate_step():
+    import generate_data
+    G = generate_data.load_graph(f"build/{VERSION}/graph_arrays").to_networkx()
+    return (lambda: generate_data.simulate_step(G, generate_data.START_TIME)), G.number_of_nodes()
+
+def _stage_validate():
+    import validation_agent
+    from graph_artifact import load_graph_arrays
+    graph = load_graph_arrays(f"build/{VERSION}/graph_arrays")
+    engine = validation_agent.RuleEngine([rule() for rule in validation_agent.DEFAULT_RULES])
+    return (lambda: engine.run(graph)), graph.number_of_edges()
+
+STAGE_FUNCTIONS = {
+    "compile": _stage_compile,
+    "simulate-day": _stage_simulate_day,
+    "simulate-step": _stage_simulate_step,
+    "validate": _stage_validate,
+}
+
+def run_stage(stage, workdir):
+    """Child-process entry: times one stage and prints a JSON result line."""
+    os.chdir(workdir)
+    # Silence the stages' own progress output; the result goes to stdout last
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        work, items = STAGE_FUNCTIONS[stage]()
+        start = time.perf_counter()
+        work()
+        seconds = time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    print(json.dumps({"seconds": seconds, "items": items, "peak_rss_mb": peak_rss_mb()}))
+
+# --- Driver ---
+
+def _spawn(stage, workdir):
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, os.path.join(here, "benchmark.py"), "--stage", stage, "--workdir", workdir],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["no output"]
+        return {"error": tail[0]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def environment():
+    import numpy as np
+    info = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": None,
+    }
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        pass
+    return info
+
+def run_benchmarks(sizes, stages, zones=4, fixtures=8, loops=False):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="waterbench_") as workdir:
+            floors = synthetic_building.floors_for_nodes(size, zones, fixtures)
+            building = synthetic_building.write_building(
+                os.path.join(workdir, "data", VERSION), floors, zones, fixtures, loops=loops)
+            # Later stages read the compiled build, so compile always runs
+            for stage in ["compile"] + [s for s in stages if s != "compile"]:
+                result = _spawn(stage, workdir)
+                if stage == "compile" and "error" in result:
+                    print(f"  {size:>9} nodes  compile failed: {result['error']}")
+                    break
+                if stage not in stages:
+                    continue
+                result.update(size=size, nodes=building["nodes"], edges=building["edges"], stage=stage)
+                results.append(result)
+                if "error" in result:
+                    print(f"  {size:>9} nodes  {stage:<14} failed: {result['error']}")
+                else:
+                    rss = f"{result['peak_rss_mb']:.0f} MiB" if result["peak_rss_mb"] is not None else "n/a"
+                    print(f"  {size:>9} nodes  {stage:<14} {result['seconds']:9.3f} s  peak {rss}")
+    return results
+
+def compare(results, baseline, tolerance):
+    """Results slower than baseline by more than `tolerance` (a fraction)."""
+    previous = {(r["size"], r["stage"]): r for r in baseline["results"] if "seconds" in r}
+    regressions = []
+    for r in results:
+        old = previous.get((r["size"], r["stage"]))
+        if old and "seconds" in r and r["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append((r, old))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compile, simulate and validate on synthetic buildings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Approximate node counts")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--zones", type=int, default=4)
+    parser.add_argument("--fixtures", type=int, default=8)
+    parser.add_argument("--loops", action="store_true", help="Benchmark ring-main (looped) buildings")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against --baseline as a fraction (default 0.25)")
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.stage:
+        run_stage(args.stage, args.workdir)
+        return
+
+    print(f"Benchmarking {', '.join(args.stages)} at {', '.join(str(s) for s in args.sizes)} nodes")
+    results = run_benchmarks(args.sizes, args.stages, args.zones, args.fixtures, args.loops)
+    report = {
+        "environment": environment(),
+        "building": {"zones": args.zones, "fixtures": args.fixtures, "loops": args.loops},
+        "results": results,
+    }
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r, old in regressions:
+            print(f"Regression: {r['stage']} at {r['size']} nodes took {r['seconds']:.3f}s "
+                  f"(baseline {old['seconds']:.3f}s)")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
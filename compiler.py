@@ -1,97 +1,159 @@
-import networkx as nx
 import pickle
 import json
 import os
 import sys
+import hashlib
+import io
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 
+import dsl_parser
+from graph_artifact import ARTIFACT_DIRNAME, is_graph_arrays, load_graph_arrays, save_graph_arrays
+from instanced_graph import INSTANCED_DIRNAME, InstancedGraph, save_instanced
+from stage_trace import record_items, start_tracing, stop_tracing, traced
+
+# Items recorded per traced stage: nodes in the graph it returns or saves;
+# the attach stages record how many declarations they attached
+_graph_nodes = lambda G, *args: G.number_of_nodes()
+_saved_nodes = lambda _, G, *args: G.number_of_nodes()
+
+@traced("load_graph_data", items=_graph_nodes)
 def load_graph_data(version):
     """Parses WaterSystem.txt to build the base graph."""
-    filepath = f"data/{version}/WaterSystem.txt"
+    import networkx as nx
+
+    result = dsl_parser.parse_file(f"data/{version}/WaterSystem.txt")
+    dsl_parser.report(result)
+
     G = nx.DiGraph()
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
-        return G
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            parts = line.strip().split()
-            if not parts: continue
-            
-            if parts[0] == "Source":
-                G.add_node(parts[1], type="Source")
-            elif parts[0] == "Tank":
-                G.add_node(parts[1], type="Tank")
-            elif parts[0] == "Pipe":
-                G.add_edge(parts[1], parts[2], type="Pipe")
+    for decl in result.network:
+        if isinstance(decl, dsl_parser.PipeDecl):
+            G.add_edge(decl.src, decl.dst, type="Pipe")
+        elif isinstance(decl, dsl_parser.SourceDecl):
+            G.add_node(decl.name, type="Source")
+        elif isinstance(decl, dsl_parser.TankDecl):
+            G.add_node(decl.name, type="Tank")
+        elif isinstance(decl, dsl_parser.PumpDecl):
+            # A pump is a node in line between its suction and discharge
+            G.add_node(decl.name, type="Pump")
+            G.add_edge(decl.src, decl.name, type="Pump")
+            G.add_edge(decl.name, decl.dst, type="Pump")
     return G
 
+# Parsed Floor_Templates.txt by content hash, with the parse's diagnostics:
+# versions sharing a template file parse it once per process (build-all
+# seeds its workers with these) and each still reports its warnings
+_parsed_templates = {}
+
+@traced("load_templates", items=lambda templates, *args: len(templates))
 def load_templates(version):
     """Parses Floor_Templates.txt to load subgraph templates."""
-                    # Connect attachment point
-                    # Updated to support 'FloorInlet' based on new DSL
-                    root_node = mapping.get("FloorInlet")
-                    if not root_node:
-                        root_node = mapping.get("Riser")
-                    
-                    if root_node:
-                         G.add_edge(attach_node, root_node, type="TemplateConnection")
-                    else:
-                        # Fallback
-                        pass
+    path = f"data/{version}/Floor_Templates.txt"
+    key = _file_hash(path)
+    if key in _parsed_templates:
+        templates, diagnostics = _parsed_templates[key]
+        result = dsl_parser.ParseResult(path)
+        result.diagnostics = [d._replace(loc=d.loc._replace(path=path)) for d in diagnostics]
+        dsl_parser.report(result)
+        return templates
+    result = dsl_parser.parse_file(path)
+    dsl_parser.report(result)
+    templates = {
+        name: {"nodes": decl.nodes, "edges": decl.edges}
+        for name, decl in result.templates.items()
+    }
+    if key is not None:
+        _parsed_templates[key] = (templates, result.diagnostics)
+    return templates
+
+def _load_applies(version, templates):
+    """Parses Template_Application.txt; unknown templates are reported and dropped."""
+    result = dsl_parser.parse_file(f"data/{version}/Template_Application.txt")
+    unknown = [
+        result.diagnostic("warning", a.line, f"Template {a.template} not found.")
+        for a in result.applies if a.template not in templates
+    ]
+    dsl_parser.report(result, unknown)
+    return [a for a in result.applies if a.template in templates]
+
+@traced("apply_templates", items=_graph_nodes)
+def apply_templates(G, version, templates):
+    """Parses Template_Application.txt and instantiates templates on the graph."""
+    for apply in _load_applies(version, templates):
+        template = templates[apply.template]
+        attach_node = apply.attach
+
+        # Prefix template nodes with the attachment point
+        mapping = {node: f"{attach_node}.{node}" for node in template["nodes"]}
+        for node in template["nodes"]:
+            G.add_node(mapping[node])
+        for u, v in template["edges"]:
+            G.add_edge(mapping[u], mapping[v])
+
+        # Connect attachment point
+        # Updated to support 'FloorInlet' based on new DSL
+        root_node = mapping.get("FloorInlet")
+        if not root_node:
+            root_node = mapping.get("Riser")
+
+        if root_node:
+            G.add_edge(attach_node, root_node, type="TemplateConnection")
 
     return G
 
+@traced("instantiate_templates", items=_graph_nodes)
+def instantiate_templates(G, version, templates):
+    """Parses Template_Application.txt into an InstancedGraph over the base graph."""
+    graph = InstancedGraph(G)
+    for name, template in templates.items():
+        graph.add_prototype(name, template["nodes"], template["edges"])
+    for apply in _load_applies(version, templates):
+        graph.add_instance(apply.template, apply.attach)
+    return graph
+
+@traced("attach_demands")
 def attach_demands(G, version):
     """Parses Demand_Profiles.txt and attaches demand attributes."""
-    filepath = f"data/{version}/Demand_Profiles.txt"
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
-        return G
-
-    with open(filepath, 'r') as f:
-        for line in f:
-            parts = line.strip().split()
-            if not parts: continue
-            
-            if parts[0] == "Demand":
-                node = parts[1]
-                value = float(parts[2])
-                if node in G.nodes:
-                    G.nodes[node]['demand'] = value
-                else:
-                    print(f"Warning: Demand node {node} not found in graph.")
+    result = dsl_parser.parse_file(f"data/{version}/Demand_Profiles.txt")
+    missing = []
+    for decl in result.demands:
+        if decl.node in G.nodes:
+            G.nodes[decl.node]['demand'] = decl.value
+        else:
+            missing.append(result.diagnostic("warning", decl.line, f"Demand node {decl.node} not found in graph."))
+    dsl_parser.report(result, missing)
+    record_items(len(result.demands) - len(missing))
     return G
 
+@traced("attach_sensors")
 def attach_sensors(G, version):
     """Parses Sensors.txt and attaches sensor attributes."""
-    filepath = f"data/{version}/Sensors.txt"
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
-        return G
-
-    with open(filepath, 'r') as f:
-        for line in f:
-            parts = line.strip().split()
-            if not parts: continue
-            
-            if parts[0] == "Sensor":
-                node = parts[1]
-                sensor_type = parts[2]
-                if node in G.nodes:
-                    G.nodes[node]['sensor'] = sensor_type
-                else:
-                    print(f"Warning: Sensor node {node} not found in graph.")
+    result = dsl_parser.parse_file(f"data/{version}/Sensors.txt")
+    missing = []
+    for decl in result.sensors:
+        if decl.node in G.nodes:
+            G.nodes[decl.node]['sensor'] = decl.kind
+        else:
+            missing.append(result.diagnostic("warning", decl.line, f"Sensor node {decl.node} not found in graph."))
+    dsl_parser.report(result, missing)
+    record_items(len(result.sensors) - len(missing))
     return G
 
 import argparse
 import base64
 
-def save_artifacts(G, version, mode):
-    """Saves artifacts to build/vX/ directly."""
-    output_dir = f"build/{version}"
+@traced("save_artifacts", items=_saved_nodes)
+def save_artifacts(G, version, mode, output_dir=None):
+    """Saves artifacts to output_dir (default build/vX/)."""
+    output_dir = output_dir or f"build/{version}"
     os.makedirs(output_dir, exist_ok=True)
     
-    # Save Pickle
+    # Save array artifact (primary format: fast, mmap-able, no unpickling)
+    save_graph_arrays(G, f"{output_dir}/{ARTIFACT_DIRNAME}")
+
+    # Save Pickle (compatibility export)
     with open(f"{output_dir}/graph.pkl", "wb") as f:
         pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
 
@@ -107,29 +169,300 @@ def save_artifacts(G, version, mode):
     with open(f"{output_dir}/graph_summary.json", "w") as f:
         json.dump(summary, f, indent=2)
 
-def main():
-    # print("DEBUG: Starting main", file=sys.stderr)
+@traced("save_instanced_artifacts", items=_saved_nodes)
+def save_instanced_artifacts(graph, version, output_dir=None):
+    """Saves the instanced graph and its summary without expanding templates."""
+    output_dir = output_dir or f"build/{version}"
+    os.makedirs(output_dir, exist_ok=True)
+    save_instanced(graph, f"{output_dir}/{INSTANCED_DIRNAME}")
+
+    summary = {
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "zones": [],
+        "sources": graph.count_nodes(lambda d: d.get('type') == 'Source'),
+        "tanks": graph.count_nodes(lambda d: d.get('type') == 'Tank'),
+        "sensors": graph.count_nodes(lambda d: 'sensor' in d),
+        "templates": len(graph.prototypes),
+        "instances": graph.n_instances,
+    }
+    with open(f"{output_dir}/graph_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+# --- Build cache ---
+# Each input file is hashed. The topology (WaterSystem, Floor_Templates,
+# Template_Application) is cached as an array artifact, so a change to only
+# Demand_Profiles.txt or Sensors.txt re-attaches attributes onto it, and an
+# unchanged input set reuses the existing build outright.
+
+TOPOLOGY_INPUTS = ["WaterSystem.txt", "Floor_Templates.txt", "Template_Application.txt"]
+ATTRIBUTE_INPUTS = ["Demand_Profiles.txt", "Sensors.txt"]
+MANIFEST_NAME = "build_manifest.json"
+CACHE_DIRNAME = ".cache"
+
+def _file_hash(path):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _combined_hash(hashes):
+    h = hashlib.sha256()
+    for name in sorted(hashes):
+        h.update(f"{name}={hashes[name]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def compute_build_keys(version):
+    """Returns (input hashes, topology key, full key) for data/<version>/."""
+    # Compiler sources are part of the key so code changes invalidate the cache
+    code = {
+        name: _file_hash(os.path.join(os.path.dirname(os.path.abspath(__file__)), name))
+        for name in ("compiler.py", "dsl_parser.py", "graph_artifact.py")
+    }
+    inputs = {name: _file_hash(f"data/{version}/{name}") for name in TOPOLOGY_INPUTS + ATTRIBUTE_INPUTS}
+    topology_key = _combined_hash(dict(code, **{n: inputs[n] for n in TOPOLOGY_INPUTS}))
+    full_key = _combined_hash(dict(code, **inputs))
+    return inputs, topology_key, full_key
+
+def load_manifest(version):
+    path = f"build/{version}/{MANIFEST_NAME}"
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(version, manifest, output_dir=None):
+    with open(f"{output_dir or f'build/{version}'}/{MANIFEST_NAME}", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def artifacts_exist(version):
+    output_dir = f"build/{version}"
+    return all(os.path.exists(f"{output_dir}/{name}") for name in
+               (f"{ARTIFACT_DIRNAME}/meta.json", "graph.pkl", "graph_summary.json"))
+
+# --- Atomic output ---
+# A build writes into a staging directory next to build/vX/ and is swapped
+# in with two renames once complete, so readers never see half-written
+# artifacts and a failed build leaves the previous one in place. Of the old
+# directory, only the artifacts the compiler owns (OWNED_ENTRIES) are
+# replaced: one the build did not write, such as the other representation's
+# (graph_instanced/ after a flat build, graph_arrays/ and graph.pkl after an
+# instanced one), goes away with it. Everything else - the topology cache
+# on an attributes-only rebuild, files other tools keep next to the graph -
+# is hard-linked into the new directory.
+OWNED_ENTRIES = ("graph.pkl", ARTIFACT_DIRNAME, "graph_summary.json", MANIFEST_NAME, INSTANCED_DIRNAME)
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def _staging_dir(version):
+    staging = f"build/.{version}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    return staging
+
+def _publish(staging, version):
+    """Swaps the finished staging directory in as build/<version>/."""
+    final = f"build/{version}"
+    if not os.path.isdir(final):
+        os.replace(staging, final)
+        return
+    for name in os.listdir(final):
+        src, dst = os.path.join(final, name), os.path.join(staging, name)
+        if name in OWNED_ENTRIES or os.path.lexists(dst):
+            continue
+        if os.path.isdir(src):
+            shutil.copytree(src, dst, copy_function=_link_or_copy)
+        else:
+            _link_or_copy(src, dst)
+    old = f"build/.{version}.{os.getpid()}.old"
+    os.replace(final, old)
+    os.replace(staging, final)
+    shutil.rmtree(old, ignore_errors=True)
+
+def build_topology(version):
+    """Runs the topology stages: WaterSystem, templates, template application."""
+    G = load_graph_data(version)
+    templates = load_templates(version)
+    return apply_templates(G, version, templates)
+
+@traced("compile_version")
+def compile_version(version, mode=None, use_cache=True, instanced=False):
+    """
+    Compiles data/<version>/ into build/<version>/, reusing cached stages.
+    Returns "up-to-date", "attributes" or "full" depending on the work done,
+    or "instanced" when templates are kept as prototypes (no flat artifacts,
+    no cache: building the instance table is already cheap).
+    """
+    if instanced:
+        G = load_graph_data(version)
+        templates = load_templates(version)
+        graph = instantiate_templates(G, version, templates)
+        graph = attach_demands(graph, version)
+        graph = attach_sensors(graph, version)
+        staging = _staging_dir(version)
+        try:
+            save_instanced_artifacts(graph, version, staging)
+            _publish(staging, version)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return "instanced"
+
+    inputs, topology_key, full_key = compute_build_keys(version)
+    manifest = load_manifest(version) if use_cache else {}
+    topology_cache = f"build/{version}/{CACHE_DIRNAME}/topology"
+
+    if manifest.get("full_key") == full_key and artifacts_exist(version):
+        print(f"{version}: up to date, reusing build/{version}/")
+        return "up-to-date"
+
+    staging = _staging_dir(version)
+    try:
+        if manifest.get("topology_key") == topology_key and is_graph_arrays(topology_cache):
+            print(f"{version}: topology unchanged, re-attaching demands and sensors")
+            G = load_graph_arrays(topology_cache, mmap=False).to_networkx()
+            rebuilt = "attributes"
+        else:
+            G = build_topology(version)
+            save_graph_arrays(G, f"{staging}/{CACHE_DIRNAME}/topology")
+            rebuilt = "full"
+
+        G = attach_demands(G, version)
+        G = attach_sensors(G, version)
+
+        save_artifacts(G, version, mode, staging)
+        save_manifest(version, {
+            "inputs": inputs,
+            "topology_key": topology_key,
+            "full_key": full_key,
+        }, staging)
+        _publish(staging, version)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return rebuilt
+
+# --- Build all versions ---
+# One process pool compiles every data/<version>/ input set. Workers start
+# with the parent's parsed templates, so a Floor_Templates.txt shared by
+# several versions is parsed once; each worker's output is buffered and
+# printed when its version finishes.
+
+def discover_versions(data_dir="data"):
+    """Subdirectories of data/ that contain a WaterSystem.txt, sorted."""
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(data_dir)
+        if os.path.isfile(os.path.join(data_dir, name, "WaterSystem.txt"))
+    )
+
+def _init_build_worker(parsed_templates):
+    _parsed_templates.update(parsed_templates)
+
+def _build_one(version, mode, use_cache, instanced):
+    """Compiles one version; returns (version, result, seconds, output)."""
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        try:
+            result = compile_version(version, mode, use_cache=use_cache, instanced=instanced)
+        except dsl_parser.DSLError as e:
+            print(f"Build failed: {len(e.diagnostics)} error(s).")
+            result = "failed"
+    return version, result, time.perf_counter() - start, output.getvalue()
+
+def build_all(versions=None, mode=None, use_cache=True, instanced=False, workers=None):
+    """
+    Compiles every version concurrently. Returns {version: (result, seconds)};
+    result is what compile_version returned, or "failed".
+    """
+    versions = discover_versions() if versions is None else versions
+    workers = min(workers or os.cpu_count() or 1, len(versions)) or 1
+    for version in versions:
+        try:
+            with redirect_stdout(io.StringIO()):
+                load_templates(version)
+        except dsl_parser.DSLError:
+            pass # reported by that version's build
+
+    results = {}
+    def finish(version, result, seconds, output):
+        if output:
+            print(output, end="")
+        results[version] = (result, seconds)
+
+    if workers == 1:
+        for version in versions:
+            finish(*_build_one(version, mode, use_cache, instanced))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_build_worker,
+                                 initargs=(_parsed_templates,)) as pool:
+            futures = [pool.submit(_build_one, v, mode, use_cache, instanced) for v in versions]
+            for future in as_completed(futures):
+                finish(*future.result())
+    return {v: results[v] for v in versions}
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--version', default='v1')
+    parser.add_argument('--all', action='store_true',
+                        help="Build every data/<version>/ concurrently (ignores --version)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="With --all: worker processes (default: one per CPU)")
     parser.add_argument('--mode', choices=['json', 'pickle'], required=False) # Mode is now optional/ignored
-    args = parser.parse_args()
-    
-    version = args.version
-    # print(f"DEBUG: Version {version}", file=sys.stderr)
-    
-    G = load_graph_data(version)
-    # print(f"DEBUG: Loaded graph with {G.number_of_nodes()} nodes", file=sys.stderr)
-    
-    templates = load_templates(version)
-    # print(f"DEBUG: Loaded {len(templates)} templates", file=sys.stderr)
-    
-    G = apply_templates(G, version, templates)
-    # print(f"DEBUG: Applied templates, nodes: {G.number_of_nodes()}", file=sys.stderr)
-    
-    G = attach_demands(G, version)
-    G = attach_sensors(G, version)
-    
-    save_artifacts(G, version, args.mode)
+    parser.add_argument('--force', action='store_true', help="Ignore the build cache and rebuild everything")
+    parser.add_argument('--instanced', action='store_true',
+                        help="Store floors as template instances (graph_instanced/) instead of a flat graph")
+    parser.add_argument('--trace', default=None,
+                        help="Write per-stage wall time and item counts to this file")
+    parser.add_argument('--trace-format', choices=['json', 'chrome'], default='json',
+                        help="chrome: trace-event file for chrome://tracing or Perfetto")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="With --trace: also record each stage's tracemalloc peak (slows the build)")
+    args = parser.parse_args(argv)
+
+    if args.all:
+        if args.trace:
+            parser.error("--trace traces a single version; drop --all")
+        versions = discover_versions()
+        if not versions:
+            print("No input sets found under data/.")
+            sys.exit(1)
+        start = time.perf_counter()
+        results = build_all(versions, args.mode, use_cache=not args.force,
+                            instanced=args.instanced, workers=args.jobs)
+        elapsed = time.perf_counter() - start
+        print(f"\n{'version':<12} {'result':<12} {'seconds':>8}")
+        for version, (result, seconds) in results.items():
+            print(f"{version:<12} {result:<12} {seconds:8.2f}")
+        print(f"{len(results)} version(s) in {elapsed:.2f}s wall, "
+              f"{sum(s for _, s in results.values()):.2f}s total build time")
+        if any(result == "failed" for result, _ in results.values()):
+            sys.exit(1)
+        return
+
+    if args.trace:
+        start_tracing(memory=args.trace_memory)
+    try:
+        compile_version(args.version, args.mode, use_cache=not args.force, instanced=args.instanced)
+    except dsl_parser.DSLError as e:
+        print(f"Build failed: {len(e.diagnostics)} error(s).")
+        sys.exit(1)
+    finally:
+        tracer = stop_tracing()
+        if tracer is not None:
+            tracer.write(args.trace, args.trace_format)
+            print(tracer.summary())
+            print(f"Wrote stage trace to {args.trace}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Counter-based demand noise. Every value is a pure function of
+# (seed, scenario, timestep, node index), so any subset of timesteps and
+# nodes can be generated on its own, in any order, on any thread or process,
+# and comes out bit-identical.
+#
+# Philox is keyed by (seed, scenario) through a SeedSequence. Nodes are
+# grouped in blocks of NODE_BLOCK; block b is one Philox stream (counter
+# word 2 = b) in which the value for (timestep t, node) sits at position
+# t * NODE_BLOCK + node % NODE_BLOCK. A chunk of timesteps for one block is
+# then a single vectorized draw starting at the counter for its first step.
+
+NODE_BLOCK = 1024 # nodes per stream; a multiple of 4 (doubles per Philox counter)
+NOISE_LOW = 0.9
+NOISE_HIGH = 1.1
+
+class CounterNoise:
+    """Demand noise field for one scenario of a seeded run."""
+
+    def __init__(self, seed, scenario=0):
+        self.seed = seed
+        self.scenario = scenario
+        self.key = np.random.SeedSequence(seed, spawn_key=(scenario,)).generate_state(2, dtype=np.uint64)
+
+    def _stream(self, block, step):
+        counter = np.array([step * (NODE_BLOCK // 4), 0, block, 0], dtype=np.uint64)
+        return np.random.Generator(np.random.Philox(key=self.key, counter=counter))
+
+    def random(self, step_offset, n_steps, nodes):
+        """[0, 1) doubles shaped (n_steps, len(nodes)) for steps step_offset.. and node indices `nodes`."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        out = np.empty((n_steps, len(nodes)))
+        if not len(nodes) or not n_steps:
+            return out
+        blocks = nodes // NODE_BLOCK
+        order = np.argsort(blocks, kind="stable")
+        bounds = np.flatnonzero(np.diff(blocks[order])) + 1
+        values = np.empty((n_steps, NODE_BLOCK))
+        for group in np.split(order, bounds):
+            block = int(blocks[group[0]])
+            self._stream(block, step_offset).random(out=values)
+            cols = nodes[group] % NODE_BLOCK
+            first, k = int(group[0]), len(group)
+            if group[-1] - first == k - 1 and cols[-1] - cols[0] == k - 1 and (np.diff(cols) == 1).all():
+                # Consecutive nodes in output order: plain slices, no gathers
+                out[:, first:first + k] = values[:, cols[0]:cols[0] + k]
+            else:
+                out[:, group] = values[:, cols]
+        return out
+
+    def uniform(self, step_offset, n_steps, nodes, low=NOISE_LOW, high=NOISE_HIGH):
+        """Uniform [low, high) noise, as Generator.uniform computes it."""
+        out = self.random(step_offset, n_steps, nodes)
+        out *= high - low
+        out += low
+        return out
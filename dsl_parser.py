@@ -0,0 +1,222 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Single-pass parser for the water-system DSL shared by every compiler stage.
+#
+#   Source <name>                  Tank <name>
+#   Pipe <from> <to>               Pump <name> <from> <to>
+#   Template <name> ... EndTemplate   (with Node <name> / Edge <from> <to>)
+#   Apply <template> <attach_node>
+#   Demand <node> <value>          Sensor <node> <kind>
+#
+# Each of the standard input files takes only its own directives (see
+# FILE_DIRECTIVES); a directive in the wrong file is an error rather than
+# being dropped by the stage that reads it. '#' starts a comment. Problems
+# are collected as file:line diagnostics instead of being silently skipped.
+# Declarations carry their line number; the path lives on the ParseResult.
+
+# --- Intermediate representation ---
+
+class Location(NamedTuple):
+    path: str
+    line: int
+
+    def __str__(self):
+        return f"{self.path}:{self.line}"
+
+class SourceDecl(NamedTuple):
+    name: str
+    line: int
+
+class TankDecl(NamedTuple):
+    name: str
+    line: int
+
+class PipeDecl(NamedTuple):
+    src: str
+    dst: str
+    line: int
+
+class PumpDecl(NamedTuple):
+    name: str
+    src: str
+    dst: str
+    line: int
+
+class TemplateDecl(NamedTuple):
+    name: str
+    nodes: List[str]
+    edges: List[Tuple[str, str]]
+    line: int
+
+class ApplyDecl(NamedTuple):
+    template: str
+    attach: str
+    line: int
+
+class DemandDecl(NamedTuple):
+    node: str
+    value: float
+    line: int
+
+class SensorDecl(NamedTuple):
+    node: str
+    kind: str
+    line: int
+
+class Diagnostic(NamedTuple):
+    level: str  # "error" or "warning"
+    loc: Location
+    message: str
+
+    def __str__(self):
+        return f"{self.loc}: {self.level}: {self.message}"
+
+class DSLError(Exception):
+    def __init__(self, diagnostics: List[Diagnostic]):
+        self.diagnostics = diagnostics
+        super().__init__("\n".join(str(d) for d in diagnostics))
+
+class ParseResult:
+    def __init__(self, path: str):
+        self.path = path
+        # Source/Tank/Pipe/Pump in file order (graph node order depends on it)
+        self.network: List[NamedTuple] = []
+        self.templates: Dict[str, TemplateDecl] = {}
+        self.applies: List[ApplyDecl] = []
+        self.demands: List[DemandDecl] = []
+        self.sensors: List[SensorDecl] = []
+        self.diagnostics: List[Diagnostic] = []
+        self.found = True
+
+    def diagnostic(self, level: str, line: int, message: str) -> Diagnostic:
+        return Diagnostic(level, Location(self.path, line), message)
+
+    @property
+    def errors(self) -> List[Diagnostic]:
+        return [d for d in self.diagnostics if d.level == "error"]
+
+# --- Parser ---
+
+# Directive -> number of arguments after the keyword
+ARITY = {
+    "Source": 1, "Tank": 1, "Pipe": 2, "Pump": 3,
+    "Template": 1, "Node": 1, "Edge": 2, "EndTemplate": 0,
+    "Apply": 2, "Demand": 2, "Sensor": 2,
+}
+
+# Standard input file -> the directives it may contain. Other file names
+# accept every directive.
+FILE_DIRECTIVES = {
+    "WaterSystem.txt": ("Source", "Tank", "Pipe", "Pump"),
+    "Floor_Templates.txt": ("Template", "Node", "Edge", "EndTemplate"),
+    "Template_Application.txt": ("Apply",),
+    "Demand_Profiles.txt": ("Demand",),
+    "Sensors.txt": ("Sensor",),
+}
+
+def parse_text(text: str, path: str = "<string>", directives: Optional[Tuple[str, ...]] = None) -> ParseResult:
+    """
+    Parses DSL text. `directives` limits which directives are accepted;
+    by default that is FILE_DIRECTIVES for the path's file name.
+    """
+    result = ParseResult(path)
+    if directives is None:
+        directives = FILE_DIRECTIVES.get(os.path.basename(path))
+    network = result.network
+    demands = result.demands
+    sensors = result.sensors
+    applies = result.applies
+    error = lambda line, message: result.diagnostics.append(result.diagnostic("error", line, message))
+    template: Optional[TemplateDecl] = None
+    template_nodes = set()
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        if "#" in raw:
+            raw = raw[:raw.index("#")]
+        parts = raw.split()
+        if not parts:
+            continue
+
+        keyword = parts[0]
+        arity = ARITY.get(keyword)
+        if arity is None:
+            error(lineno, f"unknown directive '{keyword}'")
+            continue
+        if len(parts) - 1 != arity:
+            error(lineno, f"'{keyword}' expects {arity} argument(s), got {len(parts) - 1}")
+            continue
+        if directives is not None and keyword not in directives:
+            error(lineno, f"'{keyword}' does not belong in {os.path.basename(path)} "
+                          f"(expected {', '.join(directives)})")
+            continue
+
+        if keyword == "Pipe":
+            network.append(PipeDecl(parts[1], parts[2], lineno))
+        elif keyword == "Demand":
+            try:
+                value = float(parts[2])
+            except ValueError:
+                error(lineno, f"invalid demand value '{parts[2]}'")
+                continue
+            demands.append(DemandDecl(parts[1], value, lineno))
+        elif keyword == "Node" or keyword == "Edge":
+            if template is None:
+                error(lineno, f"'{keyword}' outside of a Template block")
+            elif keyword == "Node":
+                template.nodes.append(parts[1])
+                template_nodes.add(parts[1])
+            elif parts[1] in template_nodes and parts[2] in template_nodes:
+                template.edges.append((parts[1], parts[2]))
+            else:
+                missing = [n for n in parts[1:] if n not in template_nodes]
+                error(lineno, f"Edge references undeclared node(s) {', '.join(missing)} "
+                              f"in template '{template.name}'")
+        elif keyword == "Sensor":
+            sensors.append(SensorDecl(parts[1], parts[2], lineno))
+        elif keyword == "Apply":
+            applies.append(ApplyDecl(parts[1], parts[2], lineno))
+        elif keyword == "Source":
+            network.append(SourceDecl(parts[1], lineno))
+        elif keyword == "Tank":
+            network.append(TankDecl(parts[1], lineno))
+        elif keyword == "Pump":
+            network.append(PumpDecl(parts[1], parts[2], parts[3], lineno))
+        elif keyword == "Template":
+            if template is not None:
+                error(lineno, f"Template '{parts[1]}' starts before '{template.name}' "
+                              f"(opened at line {template.line}) is closed")
+            if parts[1] in result.templates:
+                result.diagnostics.append(result.diagnostic(
+                    "warning", lineno, f"Template '{parts[1]}' redefined "
+                                       f"(first defined at line {result.templates[parts[1]].line})"))
+            template = TemplateDecl(parts[1], [], [], lineno)
+            template_nodes = set()
+            result.templates[parts[1]] = template
+        elif keyword == "EndTemplate":
+            if template is None:
+                error(lineno, "EndTemplate without a matching Template")
+            template = None
+
+    if template is not None:
+        error(template.line, f"Template '{template.name}' is missing EndTemplate")
+    return result
+
+def parse_file(path: str) -> ParseResult:
+    """Parses one DSL file; a missing file yields an empty result with found=False."""
+    if not os.path.exists(path):
+        result = ParseResult(path)
+        result.found = False
+        return result
+    with open(path, 'r') as f:
+        return parse_text(f.read(), path)
+
+def report(result: ParseResult, extra: Optional[List[Diagnostic]] = None):
+    """Prints the file's diagnostics and raises DSLError if any are errors."""
+    if not result.found:
+        print(f"Warning: {result.path} not found.")
+    diagnostics = sorted(result.diagnostics + (extra or []), key=lambda d: d.loc.line)
+    for d in diagnostics:
+        print(d)
+    errors = [d for d in diagnostics if d.level == "error"]
+    if errors:
+        raise DSLError(errors)
@@ -0,0 +1,279 @@
+import argparse
+import csv
+import math
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import generate_data
+import zone_sim
+
+# Extended-period simulation. Tank levels are integrated over time from the
+# demand drawn by each zone and the flow of the feeders (pumps, or fill
+# valves from a source or another tank) that refill them. Feeders run at a
+# fixed rate under level control with hysteresis:
+#
+#   target level <= PUMP_ON_LEVEL   feeder starts
+#   target level >= PUMP_OFF_LEVEL  feeder stops
+#   supply level <= TANK_MIN_LEVEL  feeder locked out until the supply tank
+#                                   is back above PUMP_ON_LEVEL
+#
+# An empty tank passes on no more than flows into it; the draws and feeds
+# it supplies are scaled back to match.
+#
+# Demand follows the hourly diurnal pattern, so between pattern changes and
+# control events every rate is constant and levels move linearly. Each
+# hydraulic step therefore runs to the next hour boundary, anomaly window
+# edge or level threshold, whichever is first, rather than on a fixed grid.
+# Flows are in L/h.
+
+TANK_AREA = 20.0 # m² plan area of each tank
+TANK_INITIAL_LEVEL = 5.0 # m
+TANK_MIN_LEVEL = 0.5 # m, tank empty
+TANK_MAX_LEVEL = 6.0 # m, overflow
+PUMP_ON_LEVEL = 3.0 # m
+PUMP_OFF_LEVEL = 5.5 # m
+
+PUMP_FLOW = 20000.0 # L/h delivered by a running pump
+VALVE_FLOW = 30000.0 # L/h through an open fill valve
+
+# Rates are recomputed at least this often even if nothing changes
+MAX_STEP_HOURS = 1.0
+# Shortest step taken, so events closer together than this merge
+MIN_STEP_SECONDS = 1.0
+
+def demand_factor(hour):
+    """Diurnal demand multiplier for an integer hour of day (as simulate_step)."""
+    return 1.0 + 0.6 * math.sin((hour - 6) * math.pi / 12) + 0.3 * math.sin((hour - 18) * math.pi / 12)
+
+class ExtendedPeriodResult:
+    """Piecewise-linear tank levels and piecewise-constant boundary flows over the run."""
+
+    def __init__(self, start, times, levels, flows, inflows, tanks, events):
+        self.start = np.datetime64(start, 's')
+        self.times = times # step boundaries, seconds from start (n_steps + 1)
+        self.levels = levels # (n_steps + 1) x tanks, metres
+        self.flows = flows # n_steps x zones, flow each zone's root passes on
+        self.inflows = inflows # n_steps x tanks, flow feeding each tank
+        self.tanks = tanks # zone index per levels column
+        self.events = events # (seconds, description)
+
+    @property
+    def n_steps(self):
+        return len(self.times) - 1
+
+    def _seconds(self, timestamps):
+        return (np.asarray(timestamps, dtype='datetime64[s]') - self.start).astype(np.float64)
+
+    def heads(self, timestamps):
+        """{tank zone: level series} at the given timestamps."""
+        seconds = self._seconds(timestamps)
+        return {z: np.interp(seconds, self.times, self.levels[:, k]) for k, z in enumerate(self.tanks)}
+
+    def _steps(self, timestamps):
+        seconds = self._seconds(timestamps)
+        return np.clip(np.searchsorted(self.times, seconds, side="right") - 1, 0, max(self.n_steps - 1, 0))
+
+    def boundary_flows(self, timestamps):
+        """{zone: flow series} at the given timestamps."""
+        step = self._steps(timestamps)
+        return {z: self.flows[step, z] for z in range(self.flows.shape[1])}
+
+    def boundary_inflows(self, timestamps):
+        """{tank zone: series of the flow feeding it} at the given timestamps."""
+        step = self._steps(timestamps)
+        return {z: self.inflows[step, k] for k, z in enumerate(self.tanks)}
+
+class ExtendedPeriodModel:
+    def __init__(self, partition):
+        self.partition = partition
+        zones = partition.zones
+        self.tanks = [z for z, zone in enumerate(zones) if zone.root_type == "Tank"]
+        tank_slot = {z: k for k, z in enumerate(self.tanks)}
+        self.base_demand = np.array([zone.net.base_demand.sum() for zone in zones])
+
+        # Tank that supplies each zone's draw (-1: a source, unlimited)
+        fed_by = {}
+        for z, zone in enumerate(zones):
+            for _, b in zone.exits:
+                fed_by.setdefault(partition.zone_of[b], z)
+        self.supply = np.full(len(zones), -1, dtype=np.int64)
+        for z in range(len(zones)):
+            seen, s = set(), z
+            while s is not None and zones[s].root_type == "Pump" and s not in seen:
+                seen.add(s)
+                s = fed_by.get(s)
+            if s is not None and zones[s].root_type == "Tank":
+                self.supply[z] = tank_slot[s]
+
+        # Feeders: zone -> tank links that refill a tank
+        self.feeder_zone, self.feeder_target, self.feeder_capacity = [], [], []
+        for z, zone in enumerate(zones):
+            for _, b in zone.exits:
+                target = partition.zone_of[b]
+                if target in tank_slot:
+                    self.feeder_zone.append(z)
+                    self.feeder_target.append(tank_slot[target])
+                    self.feeder_capacity.append(PUMP_FLOW if zone.root_type == "Pump" else VALVE_FLOW)
+        self.feeder_zone = np.array(self.feeder_zone, dtype=np.int64)
+        self.feeder_target = np.array(self.feeder_target, dtype=np.int64)
+        self.feeder_capacity = np.array(self.feeder_capacity, dtype=np.float64)
+        self.feeder_supply = self.supply[self.feeder_zone] if len(self.feeder_zone) else self.feeder_zone
+
+    def _tank_flows(self, draws, feed):
+        """(inflow, outflow) of every tank for the given zone draws and feeder flows."""
+        n_tanks = len(self.tanks)
+        inflow = np.bincount(self.feeder_target, feed, minlength=n_tanks)
+        supplied = self.supply >= 0
+        outflow = np.bincount(self.supply[supplied], draws[supplied], minlength=n_tanks)
+        from_tank = self.feeder_supply >= 0
+        outflow += np.bincount(self.feeder_supply[from_tank], feed[from_tank], minlength=n_tanks)
+        return inflow, outflow
+
+    def run(self, start, duration_hours, anomaly_type=None, anomaly_node=None, anomaly_hours=None,
+            magnitude=None, max_step_hours=MAX_STEP_HOURS):
+        """
+        Integrates tank levels over [start, start + duration_hours).
+        `anomaly_hours` is a daily (start_hour, end_hour) window; it runs
+        past midnight when end_hour < start_hour.
+        """
+        partition = self.partition
+        n_zones, n_tanks = len(partition.zones), len(self.tanks)
+        anomaly_zone = -1
+        if anomaly_type and anomaly_node in partition.index:
+            anomaly_zone = int(partition.owner[partition.index[anomaly_node]])
+        extra = magnitude if magnitude is not None else (
+            generate_data.LEAK_FLOW if anomaly_type == "Leak" else generate_data.MISUSE_DEMAND)
+        window = anomaly_hours or (0, 24)
+
+        start = datetime.fromisoformat(str(np.datetime64(start, 's')))
+        start_hour = start.hour + start.minute / 60 + start.second / 3600
+        end = duration_hours * 3600.0
+        max_step = max_step_hours * 3600.0
+        # Hour-of-day breakpoints where rates can change (two days, so one always follows)
+        day = sorted({float(h) for h in range(24)} | {float(window[0]) % 24, float(window[1]) % 24})
+        breaks = day + [b + 24.0 for b in day]
+
+        level = np.full(n_tanks, TANK_INITIAL_LEVEL)
+        feeding = level[self.feeder_target] <= PUMP_ON_LEVEL
+        locked = level <= TANK_MIN_LEVEL
+        thresholds = np.array([TANK_MIN_LEVEL, PUMP_ON_LEVEL, PUMP_OFF_LEVEL, TANK_MAX_LEVEL])
+        to_rate = 1.0 / (1000.0 * TANK_AREA * 3600.0) # L/h -> m/s
+        eps = 1e-9
+
+        times, levels, flows, inflows, events = [0.0], [level.copy()], [], [], []
+        t = 0.0
+        while t < end - eps:
+            # Rounded to the microsecond so accumulated steps land exactly on breakpoints
+            hour = (round(start_hour * 3600.0 + t, 6) / 3600.0) % 24.0
+            draws = self.base_demand * demand_factor(int(hour))
+            if anomaly_zone >= 0 and generate_data.in_window(hour, window[0], window[1]):
+                draws[anomaly_zone] += extra * (demand_factor(int(hour)) if anomaly_type == "Misuse" else 1.0)
+
+            running = feeding & ((self.feeder_supply < 0) | ~locked[np.maximum(self.feeder_supply, 0)])
+            feed = np.where(running, self.feeder_capacity, 0.0)
+            inflow, outflow = self._tank_flows(draws, feed)
+            # An empty tank only passes on what flows into it: scale back the
+            # draws and feeds it supplies. A cut to one tank's feeds can empty
+            # the next one down, so repeat until nothing is short
+            empty = level <= TANK_MIN_LEVEL + eps
+            for _ in range(n_tanks):
+                short = empty & (outflow > inflow + eps)
+                if not short.any():
+                    break
+                scale = np.ones(n_tanks)
+                scale[short] = inflow[short] / outflow[short]
+                supplied = self.supply >= 0
+                draws[supplied] *= scale[self.supply[supplied]]
+                from_tank = self.feeder_supply >= 0
+                feed[from_tank] *= scale[self.feeder_supply[from_tank]]
+                inflow, outflow = self._tank_flows(draws, feed)
+            rate = (inflow - outflow) * to_rate
+
+            # Flow each boundary node passes on during this step. For a tank
+            # that is its outflow, as in the steady-state engines; what
+            # feeds it is kept separately for the zone upstream
+            step_flow = draws.copy()
+            np.add.at(step_flow, self.feeder_zone, feed)
+            step_flow[self.tanks] = outflow
+
+            # Next pattern change
+            next_break = next(b for b in breaks if b > hour + eps)
+            dt = min((next_break - hour) * 3600.0, max_step, end - t)
+            # Next level threshold
+            for k in range(n_tanks):
+                if rate[k] < 0:
+                    below = thresholds[thresholds < level[k] - eps]
+                    if len(below):
+                        dt = min(dt, (below[-1] - level[k]) / rate[k])
+                elif rate[k] > 0:
+                    above = thresholds[thresholds > level[k] + eps]
+                    if len(above):
+                        dt = min(dt, (above[0] - level[k]) / rate[k])
+            dt = max(dt, MIN_STEP_SECONDS)
+            if end - t - dt < MIN_STEP_SECONDS:
+                dt = end - t
+
+            level = np.clip(level + rate * dt, TANK_MIN_LEVEL, TANK_MAX_LEVEL)
+            t += dt
+
+            # Controls at the end of the step
+            was_feeding, was_locked = feeding.copy(), locked.copy()
+            feeding = np.where(level[self.feeder_target] <= PUMP_ON_LEVEL + eps, True,
+                               np.where(level[self.feeder_target] >= PUMP_OFF_LEVEL - eps, False, feeding))
+            locked = np.where(level <= TANK_MIN_LEVEL + eps, True,
+                              np.where(level >= PUMP_ON_LEVEL - eps, False, locked))
+            for f in np.flatnonzero(feeding != was_feeding).tolist():
+                name = partition.zones[self.feeder_zone[f]].name
+                target = partition.zones[self.tanks[self.feeder_target[f]]].name
+                events.append((t, f"{name} -> {target} {'on' if feeding[f] else 'off'}"))
+            for k in np.flatnonzero(locked != was_locked).tolist():
+                name = partition.zones[self.tanks[k]].name
+                events.append((t, f"{name} {'empty' if locked[k] else 'refilled'}"))
+
+            times.append(t)
+            levels.append(level.copy())
+            flows.append(step_flow)
+            inflows.append(inflow)
+
+        flows = np.array(flows) if flows else np.zeros((0, n_zones))
+        inflows = np.array(inflows) if inflows else np.zeros((0, n_tanks))
+        return ExtendedPeriodResult(start, np.array(times), np.array(levels), flows, inflows, self.tanks, events)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extended-period tank and pump simulation")
+    parser.add_argument("--graph", default=generate_data.GRAPH_PATH, help="Path to a graph_arrays directory or graph.pkl")
+    parser.add_argument("--days", type=float, default=7.0)
+    parser.add_argument("--report-minutes", type=float, default=15.0)
+    parser.add_argument("--output", default=None, help="CSV of tank levels and boundary flows at the report interval")
+    args = parser.parse_args(argv)
+
+    partition = zone_sim.ZonePartition(generate_data.load_graph(args.graph))
+    model = ExtendedPeriodModel(partition)
+    t0 = time.perf_counter()
+    result = model.run(generate_data.START_TIME, args.days * 24)
+    elapsed = time.perf_counter() - t0
+
+    fixed = int(args.days * 24 * 60)
+    print(f"{result.n_steps} hydraulic steps ({len(result.events)} control events) in {elapsed:.2f}s; "
+          f"a fixed 1-minute grid needs {fixed}")
+    for seconds, message in result.events[:20]:
+        print(f"  {generate_data.START_TIME + timedelta(seconds=seconds)}  {message}")
+
+    if args.output:
+        timestamps = generate_data.make_timestamps(generate_data.START_TIME, args.days * 24, args.report_minutes)
+        heads = result.heads(timestamps)
+        flows = result.boundary_flows(timestamps)
+        zones = partition.zones
+        columns = [f"{zones[z].name}_level" for z in result.tanks] + [f"{zone.name}_flow" for zone in zones]
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp"] + columns)
+            values = np.column_stack([heads[z] for z in result.tanks] + [flows[z] for z in range(len(zones))])
+            for ts, row in zip(timestamps.tolist(), np.round(values, 3).tolist()):
+                writer.writerow([ts.isoformat()] + row)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
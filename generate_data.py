@@ -1,22 +1,68 @@
 import pickle
-import networkx as nx
 import csv
 import json
 import random
 import math
-import sys
-import io
-from datetime import datetime, timedelta
+import argparse
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+from datetime import datetime
 from pathlib import Path
 
+from counter_rng import CounterNoise
+from graph_artifact import ARTIFACT_DIRNAME, GraphArrays, is_graph_arrays, load_graph_arrays
+from instanced_graph import INSTANCED_DIRNAME, is_instanced, load_instanced
+
 # Configuration
-GRAPH_PATH = r"C:\Users\Administrator\Documents\Project\Water Prediction\build\v1\graph.pkl"
+GRAPH_PATH = "build/v1/graph_arrays"
 START_TIME = datetime(2026, 1, 1, 0, 0, 0)
 DURATION_HOURS = 24
 INTERVAL_MINUTES = 15
+CHUNK_STEPS = 1440 # Timesteps simulated and written per chunk
+
+# Anomaly magnitudes
+MISUSE_DEMAND = 500.0 # Extra demand at the misused fixture
+LEAK_FLOW = 300.0 # Flow lost at the leaking node
+LEAK_PRESSURE_DROP = 20.0 # Local pressure drop for a LEAK_FLOW leak
+
+# Scenarios written by main():
+# (output file stem, anomaly type, anomaly node, start hour, end hour, severity)
+SCENARIOS = [
+    ("normal", None, None, None, None, None),
+    # Leak between 10am and 2pm
+    ("leak_scenarios", "Leak", "Floor5_Junction", 10, 14, "High"),
+    # Misuse between 6pm and 8pm
+    ("misuse_scenarios", "Misuse", "Floor1_Junction.Apt1", 18, 20, "Medium"),
+]
+
+def in_window(hours, start_hour, end_hour):
+    """
+    Whether hour-of-day `hours` (scalar or array) falls in the daily window
+    [start_hour, end_hour); a window with end < start runs past midnight.
+    """
+    if start_hour <= end_hour:
+        return (hours >= start_hour) & (hours < end_hour)
+    return (hours >= start_hour) | (hours < end_hour)
 
-def load_graph():
-    with open(GRAPH_PATH, 'rb') as f:
+def load_graph(path=GRAPH_PATH):
+    """
+    Loads a graph_arrays or graph_instanced artifact directory, or a
+    graph.pkl. A missing artifact directory falls back to the graph.pkl
+    beside it (the only build output kept in the repository).
+    """
+    if is_graph_arrays(path):
+        return load_graph_arrays(path)
+    if is_instanced(path):
+        return load_instanced(path).flatten()
+    if not Path(path).exists() and Path(path).name in (ARTIFACT_DIRNAME, INSTANCED_DIRNAME):
+        pickled = Path(path).parent / "graph.pkl"
+        if not pickled.exists():
+            raise FileNotFoundError(f"No graph at {path} or {pickled}; run "
+                                    f"`python compiler.py --version {Path(path).parent.name}` first")
+        print(f"Warning: {path} not found; loading {pickled} (run compiler.py to build the array artifact)")
+        path = pickled
+    with open(path, 'rb') as f:
         return pickle.load(f)
 
 def get_floor_level(node_name):
@@ -30,7 +76,11 @@ def get_floor_level(node_name):
             return 0
     return 0
 
-def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
+def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None, noise=None, step=0):
+    # `noise` (a CounterNoise) replaces the global random.uniform draws with
+    # the values keyed by (step, node index)
+    noise_row = noise.uniform(step, 1, np.arange(G.number_of_nodes()))[0].tolist() if noise is not None else None
+
     # 1. Calculate Demands
     hour = timestamp.hour
     # Diurnal pattern: Peak at 8am and 8pm
@@ -38,14 +88,15 @@ def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
     
     current_demands = {}
     
-    for n, data in G.nodes(data=True):
+    for i, (n, data) in enumerate(G.nodes(data=True)):
         base_demand = data.get('demand', 0.0)
         
         # Apply anomaly: Misuse
         if anomaly_type == "Misuse" and n == anomaly_node:
-            base_demand += 500.0 # Huge increase
+            base_demand += MISUSE_DEMAND # Huge increase
             
-        current_demands[n] = base_demand * demand_factor * random.uniform(0.9, 1.1)
+        factor = random.uniform(0.9, 1.1) if noise_row is None else noise_row[i]
+        current_demands[n] = base_demand * demand_factor * factor
 
     # 2. Calculate Flows (Bottom-up aggregation)
     # Simplified: Flow in edge u->v is sum of demands in subtree rooted at v
@@ -67,26 +118,38 @@ def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
     # Usually Roof Tank feeds top floor first.
     # Let's assume flow direction follows edges.
     
-    # Recursive function to get total demand downstream
+    # Total demand downstream of u (memoized depth-first walk). Iterative with
+    # an explicit stack so deep chains don't hit the recursion limit; an edge
+    # back into a node still being summed (a loop) carries no flow here.
     memo_demand = {}
     
-    def get_downstream_demand(u):
-        if u in memo_demand:
-            return memo_demand[u]
-        
-        total = current_demands.get(u, 0.0)
-        
-        # Leak adds to demand at the node
-        if anomaly_type == "Leak" and u == anomaly_node:
-             total += 300.0 # Leak flow
-        
-        for v in G.successors(u):
-            flow_to_v = get_downstream_demand(v)
-            edge_flows[(u, v)] = flow_to_v
-            total += flow_to_v
-            
-        memo_demand[u] = total
-        return total
+    def get_downstream_demand(root):
+        stack = [(root, iter(G.successors(root)))]
+        in_progress = {root}
+        while stack:
+            u, children = stack[-1]
+            v = next(children, None)
+            if v is not None:
+                if v not in memo_demand and v not in in_progress:
+                    in_progress.add(v)
+                    stack.append((v, iter(G.successors(v))))
+                continue
+            stack.pop()
+            in_progress.discard(u)
+
+            total = current_demands.get(u, 0.0)
+
+            # Leak adds to demand at the node
+            if anomaly_type == "Leak" and u == anomaly_node:
+                 total += LEAK_FLOW # Leak flow
+
+            for v in G.successors(u):
+                flow_to_v = memo_demand.get(v, 0.0)
+                edge_flows[(u, v)] = flow_to_v
+                total += flow_to_v
+
+            memo_demand[u] = total
+        return memo_demand[root]
 
     total_system_demand = get_downstream_demand(tank_node)
     
@@ -104,11 +167,11 @@ def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
     # Elevation: Assume 3m drop per floor edge.
     # Friction: Proportional to Flow^2
     
-    queue = [(tank_node, node_pressures[tank_node])]
+    queue = deque([(tank_node, node_pressures[tank_node])])
     visited = set([tank_node])
     
     while queue:
-        u, u_p = queue.pop(0)
+        u, u_p = queue.popleft()
         
         for v in G.successors(u):
             if v in visited:
@@ -141,7 +204,7 @@ def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
             
             # Leak at node v causes local pressure drop
             if anomaly_type == "Leak" and v == anomaly_node:
-                v_p -= 20.0 # Significant drop
+                v_p -= LEAK_PRESSURE_DROP # Significant drop
                 
             node_pressures[v] = v_p
             visited.add(v)
@@ -174,88 +237,714 @@ def simulate_step(G, timestamp, anomaly_type=None, anomaly_node=None):
             
     return row
 
-def generate_csv_string(data, fieldnames):
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(data)
-    return output.getvalue()
+# --- Vectorized engine ---
+# Same model as simulate_step, but the DiGraph is compiled once into index
+# arrays so each step is a handful of NumPy operations instead of a Python
+# walk over every node.
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python generate_data.py <output_dir>")
-        return
+EDGE_PIPE = 0
+EDGE_TEMPLATE = 1
+EDGE_OTHER = 2
 
-    output_dir = Path(sys.argv[1])
-    G = load_graph()
-    
-    # Identify nodes for anomalies
-    # Leak: Floor5_Junction
-    # Misuse: Floor1_Junction.Apt1
-    
-    leak_node = "Floor5_Junction"
-    misuse_node = "Floor1_Junction.Apt1"
-    
-    # Generate Normal Data
-    normal_data = []
-    current_time = START_TIME
-    num_steps = int(DURATION_HOURS * 60 / INTERVAL_MINUTES)
-    
-    for _ in range(num_steps):
-        row = simulate_step(G, current_time)
-        normal_data.append(row)
-        current_time += timedelta(minutes=INTERVAL_MINUTES)
-        
-    fieldnames = list(normal_data[0].keys())
-    
-    # Generate Leak Data
-    leak_data = []
-    current_time = START_TIME
-    leak_labels = []
-    
-    for i in range(num_steps):
-        # Leak between 10am and 2pm
-        is_leak = 10 <= current_time.hour < 14
-        
-        if is_leak:
-            row = simulate_step(G, current_time, "Leak", leak_node)
-            leak_labels.append({
-                "timestamp": current_time.isoformat(),
-                "node_id": leak_node,
-                "anomaly_type": "Leak",
-                "severity": "High"
-            })
+# Static head gained across each edge type (3m drop per Pipe, flat otherwise)
+EDGE_ELEVATION_GAIN = np.array([3.0 * 9.81, 0.0, 0.0])
+
+def edge_type_code(etype):
+    if etype == 'Pipe':
+        return EDGE_PIPE
+    if etype == 'TemplateConnection':
+        return EDGE_TEMPLATE
+    return EDGE_OTHER
+
+def graph_adjacency(G):
+    """
+    (nodes, base demand, successor lists, successor edge-type codes) for a
+    networkx DiGraph or a graph_artifact.GraphArrays.
+    """
+    if isinstance(G, GraphArrays):
+        nodes = G.names
+        base_demand = np.nan_to_num(np.asarray(G.demand, dtype=np.float64), nan=0.0)
+        vocab_codes = [edge_type_code(t) for t in G.vocab["edge_type"]]
+        # Missing edge type defaults to Pipe, as in simulate_step
+        codes = [vocab_codes[c] if c >= 0 else EDGE_PIPE for c in G.edge_type.tolist()]
+        indices = G.indices.tolist()
+        bounds = G.indptr.tolist()
+        succ = [indices[bounds[i]:bounds[i + 1]] for i in range(len(nodes))]
+        succ_type = [codes[bounds[i]:bounds[i + 1]] for i in range(len(nodes))]
+        return nodes, base_demand, succ, succ_type
+
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    base_demand = np.array([d.get('demand', 0.0) for _, d in G.nodes(data=True)], dtype=np.float64)
+    succ, succ_type = [], []
+    for n in nodes:
+        adj = G.adj[n]
+        succ.append([index[v] for v in adj])
+        succ_type.append([edge_type_code(d.get('type', 'Pipe')) for d in adj.values()])
+    return nodes, base_demand, succ, succ_type
+
+class CompiledNetwork:
+    """Index-array view of the supply graph below a tank, built once per run."""
+
+    def __init__(self, G, tank_node="RoofTank"):
+        self._compile(*graph_adjacency(G), tank_node)
+
+    @classmethod
+    def from_adjacency(cls, nodes, base_demand, succ, succ_type, tank_node, node_ids=None):
+        """
+        Compiles a graph_adjacency-style tuple directly (e.g. one zone of a
+        larger graph). `node_ids` are the nodes' indices in the full graph,
+        which key their CounterNoise values.
+        """
+        net = cls.__new__(cls)
+        net._compile(nodes, base_demand, succ, succ_type, tank_node, node_ids)
+        return net
+
+    def _compile(self, nodes, base_demand, succ, succ_type, tank_node, node_ids=None):
+        self.nodes, self.base_demand = nodes, base_demand
+        self.node_ids = np.arange(len(nodes)) if node_ids is None else np.asarray(node_ids, dtype=np.int64)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.tank = self.index[tank_node]
+        n_nodes = len(self.nodes)
+
+        self.is_apt = np.array(["Apt" in n for n in self.nodes], dtype=bool)
+        self.pressure_columns = [f"{n}_pressure" for n in self.nodes]
+        self.flow_columns = [f"{n}_flow" for n in self.nodes]
+
+        # BFS from the tank, exactly like the pressure propagation in
+        # simulate_step: the first node to reach v is its parent.
+        self.parent = np.full(n_nodes, -1, dtype=np.int64)
+        self.edge_type = np.full(n_nodes, EDGE_OTHER, dtype=np.int8)
+        bfs_depth = np.full(n_nodes, -1, dtype=np.int64)
+        bfs_depth[self.tank] = 0
+        order = [self.tank]
+        head = 0
+        while head < len(order):
+            u = order[head]
+            head += 1
+            for v, etype in zip(succ[u], succ_type[u]):
+                if bfs_depth[v] >= 0:
+                    continue
+                bfs_depth[v] = bfs_depth[u] + 1
+                self.parent[v] = u
+                self.edge_type[v] = etype
+                order.append(v)
+        self.topo_order = np.array(order, dtype=np.int64)
+        self.reachable = bfs_depth >= 0
+
+        # Every edge leaving a reachable node carries flow. Group them by the
+        # longest-path level of their source so the reverse-topological
+        # accumulation is one np.add.at per level (also correct on DAGs).
+        level = self._longest_path_levels(succ, order)
+        src, dst = [], []
+        for u in order:
+            for v in succ[u]:
+                src.append(u)
+                dst.append(v)
+        src = np.array(src, dtype=np.int64)
+        dst = np.array(dst, dtype=np.int64)
+        self.flow_levels = []
+        if len(src):
+            edge_level = level[src]
+            for lvl in range(int(edge_level.max()), -1, -1):
+                mask = edge_level == lvl
+                if mask.any():
+                    self.flow_levels.append((src[mask], dst[mask]))
+
+        # Number of flow-carrying edges into each node (inflow = count * subtree flow)
+        self.inflow_edges = np.bincount(dst, minlength=n_nodes).astype(np.float64)
+
+        self.pressure_levels = []
+        for d in range(1, int(bfs_depth.max()) + 1):
+            members = np.flatnonzero(bfs_depth == d)
+            self.pressure_levels.append((members, self.parent[members]))
+
+        # A tree iff every reachable node has one feeding edge and nothing
+        # feeds back into the tank; otherwise (DAGs, loops) the looped solver
+        # is needed for physically split flows.
+        self.edge_src, self.edge_dst = src, dst
+        self.is_tree = bool(self.inflow_edges[self.tank] == 0 and (self.inflow_edges <= 1).all())
+        self._looped = None
+
+    def elevation_head(self):
+        """Static head (kPa) of each node relative to the tank along the BFS tree."""
+        z = np.zeros(len(self.nodes))
+        for members, parents in self.pressure_levels:
+            z[members] = z[parents] - EDGE_ELEVATION_GAIN[self.edge_type[members]]
+        return z
+
+    def looped_system(self):
+        """hydraulic_solver.LoopedSystem over the reachable network (built once)."""
+        if self._looped is None:
+            import hydraulic_solver
+            self._looped = hydraulic_solver.LoopedSystem(
+                len(self.nodes), self.edge_src, self.edge_dst, [self.tank], self.elevation_head(),
+                active=self.reachable)
+        return self._looped
+
+    def partial_sweep(self, only):
+        """
+        Plan for evaluating only the nodes in `only` (tree networks): the set
+        K of those nodes plus their BFS ancestors, and a sparse matrix P that
+        sums every reachable node's withdrawal into its nearest K ancestor.
+        Subtree flows on K are then P's block sums accumulated up K alone.
+        """
+        import scipy.sparse as sp
+
+        key = tuple(sorted(set(int(i) for i in only)))
+        if getattr(self, "_partial_key", None) == key:
+            return self._partial
+        n_nodes = len(self.nodes)
+        in_k = np.zeros(n_nodes, dtype=bool)
+        in_k[self.tank] = True
+        for v in key:
+            while v >= 0 and self.reachable[v] and not in_k[v]:
+                in_k[v] = True
+                v = int(self.parent[v])
+
+        owner = np.full(n_nodes, -1, dtype=np.int64)
+        owner[self.tank] = self.tank
+        for members, parents in self.pressure_levels:
+            owner[members] = np.where(in_k[members], members, owner[parents])
+
+        k_nodes = np.flatnonzero(in_k)
+        position = np.full(n_nodes, -1, dtype=np.int64)
+        position[k_nodes] = np.arange(len(k_nodes))
+        rows = np.flatnonzero(owner >= 0)
+        P = sp.csr_matrix((np.ones(len(rows)), (rows, position[owner[rows]])), shape=(n_nodes, len(k_nodes)))
+        # K grouped by BFS depth: (positions, parent positions, node indices)
+        levels = []
+        for members, parents in self.pressure_levels:
+            mask = in_k[members]
+            if mask.any():
+                levels.append((position[members[mask]], position[parents[mask]], members[mask]))
+        self._partial_key = key
+        self._partial = (k_nodes, position, P.T.tocsr(), levels)
+        return self._partial
+
+    def descendants(self, idx):
+        """Indices of idx and every node below it on the BFS (pressure) tree."""
+        children = {}
+        for child in np.flatnonzero(self.parent >= 0).tolist():
+            children.setdefault(int(self.parent[child]), []).append(child)
+        found = [idx]
+        head = 0
+        while head < len(found):
+            found.extend(children.get(found[head], []))
+            head += 1
+        return np.array(found, dtype=np.int64)
+
+    def _longest_path_levels(self, succ, order):
+        level = np.zeros(len(self.nodes), dtype=np.int64)
+        indegree = {u: 0 for u in order}
+        for u in order:
+            for v in succ[u]:
+                indegree[v] += 1
+        ready = [u for u in order if indegree[u] == 0]
+        while ready:
+            u = ready.pop()
+            for v in succ[u]:
+                level[v] = max(level[v], level[u] + 1)
+                indegree[v] -= 1
+                if indegree[v] == 0:
+                    ready.append(v)
+        return level
+
+def simulate_step_arrays(net, timestamp, anomaly_type=None, anomaly_node=None, noise=None, step=0):
+    """Vectorized simulate_step; returns (pressure, flow) arrays in net.nodes order."""
+    hour = timestamp.hour
+    demand_factor = 1.0 + 0.6 * math.sin((hour - 6) * math.pi / 12) + 0.3 * math.sin((hour - 18) * math.pi / 12)
+
+    base_demand = net.base_demand
+    if anomaly_type == "Misuse" and anomaly_node in net.index:
+        base_demand = base_demand.copy()
+        base_demand[net.index[anomaly_node]] += MISUSE_DEMAND
+
+    # Noise comes from the module-level RNG in node order, so a given seed
+    # reproduces simulate_step exactly; or from a CounterNoise at `step`.
+    if noise is not None:
+        factors = noise.uniform(step, 1, net.node_ids)[0]
+    else:
+        factors = np.array([random.uniform(0.9, 1.1) for _ in range(len(net.nodes))])
+    demands = base_demand * demand_factor * factors
+
+    # Subtree flow: reverse-topological accumulation
+    subtree = demands.copy()
+    if anomaly_type == "Leak" and anomaly_node in net.index:
+        subtree[net.index[anomaly_node]] += LEAK_FLOW
+    for src, dst in net.flow_levels:
+        np.add.at(subtree, src, subtree[dst])
+
+    # Pressure: propagate from the tank in topological order
+    tank_level = 5.0
+    tank_level += math.sin(hour * math.pi / 12) * 0.5
+
+    leak_drop = np.zeros(len(net.nodes))
+    if anomaly_type == "Leak" and anomaly_node in net.index:
+        leak_drop[net.index[anomaly_node]] = LEAK_PRESSURE_DROP
+
+    pressure = np.zeros(len(net.nodes))
+    pressure[net.tank] = tank_level * 9.81
+    for members, parents in net.pressure_levels:
+        friction_loss = 0.0001 * (subtree[members] ** 2)
+        gain = EDGE_ELEVATION_GAIN[net.edge_type[members]]
+        pressure[members] = pressure[parents] + gain - friction_loss - leak_drop[members]
+
+    flow = np.where(net.is_apt, demands, net.inflow_edges * subtree)
+    return pressure, flow
+
+def simulate_step_vectorized(net, timestamp, anomaly_type=None, anomaly_node=None, noise=None, step=0):
+    """Drop-in replacement for simulate_step that runs on a CompiledNetwork."""
+    pressure, flow = simulate_step_arrays(net, timestamp, anomaly_type, anomaly_node, noise, step)
+
+    row = {"timestamp": timestamp.isoformat()}
+    for p_col, f_col, p, q in zip(net.pressure_columns, net.flow_columns, pressure.tolist(), flow.tolist()):
+        row[p_col] = round(p, 2)
+        row[f_col] = round(q, 2)
+    return row
+
+# --- Batched engine ---
+# The diurnal factor and tank level only depend on the hour, so a whole
+# horizon can be solved at once as (timesteps x nodes) matrices.
+
+def timestamp_hours(timestamps):
+    """Hour-of-day for a list of datetimes or a datetime64 array."""
+    if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.datetime64):
+        return timestamps.astype('datetime64[h]').astype(np.int64) % 24
+    return np.array([ts.hour for ts in timestamps], dtype=np.int64)
+
+def demand_factor(hours):
+    """Diurnal demand multiplier for an array of hours (same curve as simulate_step)."""
+    return 1.0 + 0.6 * np.sin((hours - 6) * np.pi / 12) + 0.3 * np.sin((hours - 18) * np.pi / 12)
+
+def tank_level(hours):
+    """Tank water level in metres for an array of hours (same curve as simulate_step)."""
+    return 5.0 + np.sin(hours * np.pi / 12) * 0.5
+
+def make_timestamps(start, duration_hours, interval_minutes):
+    """Evenly spaced datetime64[s] grid covering [start, start + duration)."""
+    num_steps = int(duration_hours * 60 / interval_minutes)
+    offsets = np.round(np.arange(num_steps) * interval_minutes * 60).astype(np.int64)
+    return np.datetime64(start, 's') + offsets.astype('timedelta64[s]')
+
+SOLVERS = ("auto", "tree", "looped")
+
+def simulate_batch(net, timestamps, anomaly_type=None, anomaly_node=None, active=None, rng=None,
+                   magnitude=None, head=None, outflow=None, solver="auto", only=None, step_offset=0):
+    """
+    Simulates every timestamp in one pass over the compiled network.
+    Returns (pressure, flow), each shaped (len(timestamps), len(net.nodes)).
+    `active` is a boolean per timestep marking when the anomaly applies
+    (all timesteps if omitted). `magnitude` overrides LEAK_FLOW or
+    MISUSE_DEMAND; a leak's pressure drop scales with it. `rng` is a numpy
+    Generator, drawn in (timestep, node) order, or a counter_rng.CounterNoise
+    keyed by (step_offset + timestep, net.node_ids); by default a Generator
+    is seeded from the module-level RNG so --seed still controls the run. `head` is the tank's head in metres per timestep
+    (tank_level() by default); `outflow` is extra (timesteps x nodes) flow
+    leaving the network at each node, e.g. into a downstream pump. `solver`
+    picks the linear-time tree sweep or the sparse looped solver
+    (hydraulic_solver); "auto" uses the tree sweep whenever net.is_tree.
+    `only` restricts a tree sweep to the given node indices (see solve_batch).
+    """
+    pressure, flow, _ = solve_batch(net, timestamps, anomaly_type, anomaly_node, active, rng,
+                                    magnitude, head, outflow, solver, only, step_offset)
+    return pressure, flow
+
+def _apply_leak_drop(net, pressure, anomaly_type, anomaly_idx, active, leak_flow):
+    """Subtracts a leak's local pressure drop, in place, at the leaking node and below."""
+    if anomaly_type == "Leak" and anomaly_idx is not None and net.reachable[anomaly_idx] and anomaly_idx != net.tank:
+        # The drop is inherited by everything fed through the leaking node
+        affected = net.descendants(anomaly_idx)
+        pressure[np.ix_(active, affected)] -= LEAK_PRESSURE_DROP * leak_flow / LEAK_FLOW
+
+def solve_batch(net, timestamps, anomaly_type=None, anomaly_node=None, active=None, rng=None,
+                magnitude=None, head=None, outflow=None, solver="auto", only=None, step_offset=0):
+    """
+    simulate_batch that also returns the (timesteps x nodes) subtree flow
+    matrix. With `only` (node indices) every matrix has one column per entry
+    of `only`, and a tree sweep evaluates just those nodes and their paths
+    to the tank.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}'. Expected one of {SOLVERS}")
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+
+    hours = timestamp_hours(timestamps).astype(np.float64)
+    n_steps, n_nodes = len(hours), len(net.nodes)
+
+    anomaly_idx = net.index.get(anomaly_node) if anomaly_type else None
+    if anomaly_idx is not None:
+        active = np.ones(n_steps, dtype=bool) if active is None else np.asarray(active, dtype=bool)
+
+    factor = demand_factor(hours)
+    if isinstance(rng, CounterNoise):
+        # Nodes without demand don't need noise; skipping them changes nothing
+        # since every value is keyed by its own (timestep, node)
+        noisy = net.base_demand != 0
+        if anomaly_type == "Misuse" and anomaly_idx is not None:
+            noisy[anomaly_idx] = True
+        noise = np.ones((n_steps, n_nodes))
+        noise[:, noisy] = rng.uniform(step_offset, n_steps, net.node_ids[noisy])
+    else:
+        noise = rng.uniform(0.9, 1.1, size=(n_steps, n_nodes))
+
+    demands = np.broadcast_to(net.base_demand, (n_steps, n_nodes)).copy()
+    if anomaly_type == "Misuse" and anomaly_idx is not None:
+        demands[active, anomaly_idx] += MISUSE_DEMAND if magnitude is None else magnitude
+    demands *= factor[:, None]
+    demands *= noise
+
+    leak_flow = LEAK_FLOW if magnitude is None else magnitude
+    subtree = demands.copy()
+    if outflow is not None:
+        subtree += outflow
+    if anomaly_type == "Leak" and anomaly_idx is not None:
+        subtree[active, anomaly_idx] += leak_flow
+
+    if head is None:
+        head = tank_level(hours)
+
+    if solver == "looped" or (solver == "auto" and not net.is_tree):
+        # The leak's flow is extra withdrawal in the solve; its local
+        # LEAK_PRESSURE_DROP is applied on top, as in the tree sweep
+        import hydraulic_solver
+        withdrawal = np.where(net.reachable, subtree, 0.0)
+        pressure, inflow, _ = hydraulic_solver.solve_batch_looped(net.looped_system(), withdrawal, head * 9.81)
+        _apply_leak_drop(net, pressure, anomaly_type, anomaly_idx, active, leak_flow)
+        subtree = inflow.copy()
+        subtree[:, net.tank] = withdrawal.sum(axis=1)
+        flow = np.where(net.is_apt, demands, np.where(net.reachable, inflow, 0.0))
+        if only is not None:
+            return pressure[:, only], flow[:, only], subtree[:, only]
+        return pressure, flow, subtree
+
+    if only is not None and net.is_tree:
+        return _solve_partial(net, only, demands, subtree, head, anomaly_type, anomaly_idx, active, leak_flow)
+
+    # Accumulate along the node axis; transposing keeps np.add.at on rows
+    subtree_t = subtree.T
+    for src, dst in net.flow_levels:
+        np.add.at(subtree_t, src, subtree_t[dst])
+
+    pressure = np.zeros((n_steps, n_nodes))
+    pressure[:, net.tank] = head * 9.81
+    for members, parents in net.pressure_levels:
+        friction_loss = 0.0001 * (subtree[:, members] ** 2)
+        gain = EDGE_ELEVATION_GAIN[net.edge_type[members]]
+        pressure[:, members] = pressure[:, parents] + gain - friction_loss
+    _apply_leak_drop(net, pressure, anomaly_type, anomaly_idx, active, leak_flow)
+
+    flow = np.where(net.is_apt, demands, net.inflow_edges * subtree)
+    if only is not None:
+        return pressure[:, only], flow[:, only], subtree[:, only]
+    return pressure, flow, subtree
+
+def _solve_partial(net, only, demands, withdrawal, head, anomaly_type, anomaly_idx, active, leak_flow):
+    """Tree sweep restricted to CompiledNetwork.partial_sweep(only)."""
+    k_nodes, position, PT, levels = net.partial_sweep(only)
+    # Block sums, then accumulate children into parents deepest level first
+    sub_k = (PT @ withdrawal.T).T
+    for pos, parent_pos, _ in reversed(levels):
+        np.add.at(sub_k.T, parent_pos, sub_k[:, pos].T)
+
+    p_k = np.zeros_like(sub_k)
+    p_k[:, position[net.tank]] = head * 9.81
+    for pos, parent_pos, members in levels:
+        gain = EDGE_ELEVATION_GAIN[net.edge_type[members]]
+        p_k[:, pos] = p_k[:, parent_pos] + gain - 0.0001 * (sub_k[:, pos] ** 2)
+    if anomaly_type == "Leak" and anomaly_idx is not None and net.reachable[anomaly_idx] and anomaly_idx != net.tank:
+        affected = np.isin(k_nodes, net.descendants(anomaly_idx))
+        p_k[np.ix_(active, np.flatnonzero(affected))] -= LEAK_PRESSURE_DROP * leak_flow / LEAK_FLOW
+
+    # Unreachable nodes are not in K; they read 0 like in the full sweep
+    only = np.asarray(only, dtype=np.int64)
+    pos = position[only]
+    reached = pos >= 0
+    pos = np.where(reached, pos, 0)
+    pressure = np.where(reached, p_k[:, pos], 0.0)
+    subtree = np.where(reached, sub_k[:, pos], 0.0)
+    flow = np.where(net.is_apt[only], demands[:, only], np.where(reached, net.inflow_edges[only] * subtree, 0.0))
+    return pressure, flow, subtree
+
+def batch_rows(net, timestamps, pressure, flow):
+    """Yields simulate_step-style row dicts from simulate_batch output."""
+    pressure = np.round(pressure, 2)
+    flow = np.round(flow, 2)
+    if isinstance(timestamps, np.ndarray):
+        timestamps = timestamps.astype('datetime64[s]').tolist()
+    for t, ts in enumerate(timestamps):
+        row = {"timestamp": ts.isoformat()}
+        for p_col, f_col, p, q in zip(net.pressure_columns, net.flow_columns, pressure[t].tolist(), flow[t].tolist()):
+            row[p_col] = p
+            row[f_col] = q
+        yield row
+
+# --- Streaming output ---
+# Rows are written chunk by chunk so memory stays bounded by the chunk size,
+# not the horizon. Every format shares the same fixed column layout.
+
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow", "store": ".series"}
+
+def output_columns(nodes):
+    """Column names after timestamp: <node>_pressure, <node>_flow per node."""
+    return [c for n in nodes for c in (f"{n}_pressure", f"{n}_flow")]
+
+def interleave(pressure, flow):
+    """(T, N) pressure and flow -> (T, 2N) matrix in output_columns order."""
+    values = np.empty((pressure.shape[0], 2 * pressure.shape[1]))
+    values[:, 0::2] = pressure
+    values[:, 1::2] = flow
+    return values
+
+# Sensor-only output: one column per instrumented node, with the quantity
+# its sensor measures. Level is the tank head in metres.
+SENSOR_QUANTITIES = {"Level": "level", "Flow": "flow", "Pressure": "pressure"}
+
+def node_sensors(G):
+    """`sensor` attribute per node (None if missing), in graph_adjacency order."""
+    if isinstance(G, GraphArrays):
+        vocab = G.vocab["sensor"]
+        return [vocab[c] if c >= 0 else None for c in G.sensor.tolist()]
+    return [d.get("sensor") for _, d in G.nodes(data=True)]
+
+def sensor_channels(nodes, sensors):
+    """[(column, node index, quantity)] for every node with a known sensor kind."""
+    channels, unknown = [], set()
+    for i, (n, kind) in enumerate(zip(nodes, sensors)):
+        if kind is None:
+            continue
+        if kind not in SENSOR_QUANTITIES:
+            unknown.add(kind)
+            continue
+        quantity = SENSOR_QUANTITIES[kind]
+        channels.append((f"{n}_{quantity}", i, quantity))
+    if unknown:
+        print(f"Warning: ignoring unknown sensor type(s) {sorted(unknown)}")
+    return channels
+
+def sensor_values(channels, pressure, flow, only=None):
+    """
+    (T, N) pressure and flow -> (T, len(channels)) matrix of sensor readings.
+    If the matrices only hold the columns of the sorted node indices `only`,
+    pass those so channels can be located.
+    """
+    values = np.empty((pressure.shape[0], len(channels)))
+    for k, (_, i, quantity) in enumerate(channels):
+        if only is not None:
+            i = int(np.searchsorted(only, i))
+        if quantity == "flow":
+            values[:, k] = flow[:, i]
+        elif quantity == "level":
+            values[:, k] = pressure[:, i] / 9.81
         else:
-            row = simulate_step(G, current_time)
-            
-        leak_data.append(row)
-        current_time += timedelta(minutes=INTERVAL_MINUTES)
+            values[:, k] = pressure[:, i]
+    return values
 
-    # Generate Misuse Data
-    misuse_data = []
-    current_time = START_TIME
-    misuse_labels = []
-    
-    for i in range(num_steps):
-        # Misuse between 6pm and 8pm
-        is_misuse = 18 <= current_time.hour < 20
-        
-        if is_misuse:
-            row = simulate_step(G, current_time, "Misuse", misuse_node)
-            misuse_labels.append({
-                "timestamp": current_time.isoformat(),
-                "node_id": misuse_node,
-                "anomaly_type": "Misuse",
-                "severity": "Medium"
-            })
+def _as_datetimes(timestamps):
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype('datetime64[s]').tolist()
+    return list(timestamps)
+
+class StreamWriter(ABC):
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+
+    @abstractmethod
+    def write(self, timestamps, values):
+        """Appends a chunk: timestamps plus a (T, len(columns)) value matrix."""
+
+    def write_rows(self, rows):
+        """Appends simulate_step-style row dicts."""
+        if not rows:
+            return
+        timestamps = [datetime.fromisoformat(r["timestamp"]) for r in rows]
+        values = np.array([[r[c] for c in self.columns] for r in rows], dtype=np.float64)
+        self.write(timestamps, values)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CsvStreamWriter(StreamWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["timestamp"] + self.columns)
+
+    def write(self, timestamps, values):
+        iso = [ts.isoformat() for ts in _as_datetimes(timestamps)]
+        self._writer.writerows([ts] + row for ts, row in zip(iso, np.round(values, 2).tolist()))
+
+    def close(self):
+        self._file.close()
+
+class ArrowStreamWriter(StreamWriter):
+    """Parquet or Arrow IPC file with a fixed float32 schema (needs pyarrow)."""
+
+    def __init__(self, path, columns, fmt):
+        super().__init__(path, columns)
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(f"pyarrow is required for --format {fmt}")
+        self._pa = pa
+        self._schema = pa.schema(
+            [pa.field("timestamp", pa.timestamp('s'))] + [pa.field(c, pa.float32()) for c in self.columns]
+        )
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
         else:
-            row = simulate_step(G, current_time)
-            
-        misuse_data.append(row)
-        current_time += timedelta(minutes=INTERVAL_MINUTES)
-        
-    all_labels = leak_labels + misuse_labels
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            self._writer = pa.ipc.new_file(str(path), self._schema, options=options)
+
+    def write(self, timestamps, values):
+        pa = self._pa
+        ts = np.array(_as_datetimes(timestamps), dtype='datetime64[s]')
+        values = np.round(values, 2).astype(np.float32)
+        arrays = [pa.array(ts, type=pa.timestamp('s'))] + [pa.array(values[:, j]) for j in range(values.shape[1])]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+def open_stream_writer(path, fmt, columns):
+    if fmt == "csv":
+        return CsvStreamWriter(path, columns)
+    if fmt in ("parquet", "arrow"):
+        return ArrowStreamWriter(path, columns, fmt)
+    if fmt == "store":
+        # Memory-mapped store (timeseries_store.py): channels as contiguous float32 arrays
+        from timeseries_store import SeriesWriter
+        return SeriesWriter(path, columns)
+    raise ValueError(f"Unknown output format '{fmt}'. Expected one of {sorted(OUTPUT_FORMATS)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic sensor data")
+    parser.add_argument("output_dir")
+    parser.add_argument("--graph", default=GRAPH_PATH, help="Path to a graph_arrays directory or graph.pkl")
+    parser.add_argument("--engine", choices=["batch", "zones", "numpy", "dict"], default="batch",
+                        help="batch: whole horizon in one pass; zones: batch per pressure zone "
+                             "(split at tanks/pumps) on a process pool; numpy: compiled array engine "
+                             "per step; dict: original per-node loop")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --engine zones (default: CPU count)")
+    parser.add_argument("--solver", choices=SOLVERS, default="auto",
+                        help="batch/zones engines: tree sweep, sparse looped solver, or auto (tree when possible)")
+    parser.add_argument("--extended-period", action="store_true",
+                        help="With --engine zones: tank levels and pump flows from an extended-period "
+                             "mass balance instead of the fixed level curve")
+    parser.add_argument("--sensors-only", action="store_true",
+                        help="With --engine batch/zones: write only the channels of nodes with a `sensor` "
+                             "attribute (Level, Flow or Pressure) and evaluate only what they need")
+    parser.add_argument("--duration-hours", type=float, default=DURATION_HOURS)
+    parser.add_argument("--interval-minutes", type=float, default=INTERVAL_MINUTES)
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="csv")
+    parser.add_argument("--chunk-steps", type=int, default=CHUNK_STEPS,
+                        help="Timesteps simulated and written per chunk (bounds memory)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.sensors_only and args.engine not in ("batch", "zones"):
+        parser.error("--sensors-only requires --engine batch or zones")
+
+    output_dir = Path(args.output_dir)
+    G = load_graph(args.graph)
+
+    if args.engine == "zones":
+        import zone_sim
+        zones = zone_sim.ZoneSimulator(G, workers=args.workers, solver=args.solver)
+        nodes = zones.nodes
+        print(f"Simulating {len(zones.partition.zones)} zones on {zones.workers} worker(s)")
+    elif args.engine in ("batch", "numpy"):
+        net = CompiledNetwork(G)
+        nodes = net.nodes
+        step = lambda ts, *args, **kwargs: simulate_step_vectorized(net, ts, *args, **kwargs)
+    else:
+        if isinstance(G, GraphArrays):
+            G = G.to_networkx()
+        nodes = list(G.nodes())
+        step = lambda ts, *args, **kwargs: simulate_step(G, ts, *args, **kwargs)
     
+    timestamps = make_timestamps(START_TIME, args.duration_hours, args.interval_minutes)
+    step_times = timestamps.astype('datetime64[s]').tolist()
+    hours = timestamp_hours(timestamps)
+
+    columns = output_columns(nodes)
+    channels = only = None
+    if args.sensors_only:
+        channels = sensor_channels(nodes, node_sensors(G))
+        if not channels:
+            print("Warning: no node has a sensor attribute; nothing to write")
+        columns = [c for c, _, _ in channels]
+        only = np.array(sorted({i for _, i, _ in channels}), dtype=np.int64)
+        print(f"Sensor-only output: {len(columns)} channels instead of {2 * len(nodes)}")
+    output = (lambda p, q: sensor_values(channels, p, q, only)) if channels is not None else interleave
+    chunk_steps = max(1, args.chunk_steps)
+
+    # Noise is keyed by (run seed, scenario, timestep, node), so every engine,
+    # chunk size and worker count sees the same values
+    noise_seed = random.getrandbits(64)
+
+    all_labels = []
+    for scenario, (stem, anomaly_type, anomaly_node, start_hour, end_hour, severity) in enumerate(SCENARIOS):
+        if anomaly_type:
+            active = in_window(hours, start_hour, end_hour)
+        else:
+            active = np.zeros(len(hours), dtype=bool)
+
+        path = output_dir / f"{stem}{OUTPUT_FORMATS[args.format]}"
+        print(f"Writing to {path}")
+        noise = CounterNoise(noise_seed, scenario)
+        eps = None
+        if args.engine == "zones" and args.extended_period:
+            import extended_period
+            eps = extended_period.ExtendedPeriodModel(zones.partition).run(
+                START_TIME, args.duration_hours, anomaly_type, anomaly_node,
+                (start_hour, end_hour) if anomaly_type else None)
+            print(f"Extended period: {eps.n_steps} hydraulic steps, {len(eps.events)} control events")
+        with open_stream_writer(path, args.format, columns) as writer:
+            for lo in range(0, len(timestamps), chunk_steps):
+                hi = min(lo + chunk_steps, len(timestamps))
+                if args.engine == "zones":
+                    chunk = timestamps[lo:hi]
+                    pressure, flow = zones.simulate(
+                        chunk, anomaly_type, anomaly_node, active[lo:hi], seed=noise_seed, scenario=scenario,
+                        step_offset=lo,
+                        heads=eps.heads(chunk) if eps else None,
+                        boundary_flows=eps.boundary_flows(chunk) if eps else None,
+                        boundary_inflows=eps.boundary_inflows(chunk) if eps else None, only=only)
+                    writer.write(timestamps[lo:hi], output(pressure, flow))
+                elif args.engine == "batch":
+                    pressure, flow = simulate_batch(net, timestamps[lo:hi], anomaly_type, anomaly_node,
+                                                    active[lo:hi], rng=noise, solver=args.solver, only=only,
+                                                    step_offset=lo)
+                    writer.write(timestamps[lo:hi], output(pressure, flow))
+                else:
+                    writer.write_rows([
+                        step(ts, anomaly_type, anomaly_node, noise, t) if is_active else step(ts, noise=noise, step=t)
+                        for t, ts, is_active in zip(range(lo, hi), step_times[lo:hi], active[lo:hi].tolist())
+                    ])
+
+        for ts, is_active in zip(step_times, active.tolist()):
+            if is_active:
+                all_labels.append({
+                    "timestamp": ts.isoformat(),
+                    "node_id": anomaly_node,
+                    "anomaly_type": anomaly_type,
+                    "severity": severity
+                })
+
     # Helper to write
     def save(name, content):
         p = output_dir / name
@@ -263,10 +952,9 @@ def main():
         with open(p, 'w', newline='') as f:
             f.write(content)
 
-    save("normal.csv", generate_csv_string(normal_data, fieldnames))
-    save("leak_scenarios.csv", generate_csv_string(leak_data, fieldnames))
-    save("misuse_scenarios.csv", generate_csv_string(misuse_data, fieldnames))
     save("labels.json", json.dumps(all_labels, indent=2))
+    if args.engine == "zones":
+        zones.close()
     
     print("Done")
 
@@ -0,0 +1,187 @@
+import json
+import os
+
+import numpy as np
+
+# Array-based graph artifact: a directory of .npy files plus meta.json.
+# Every array is a plain numeric buffer, so loading never unpickles anything
+# and np.load(mmap_mode='r') lets worker processes share the same pages.
+#
+#   names_blob / names_offsets  UTF-8 node-name string table
+#   indptr / indices            CSR out-adjacency (successor order preserved)
+#   edge_type                   code per CSR edge (-1 = no type attribute)
+#   node_type / zone / sensor   code per node (-1 = attribute missing)
+#   demand / elevation          float64 per node (NaN = attribute missing)
+#
+# meta.json holds the format version, counts and the code vocabularies.
+
+ARTIFACT_DIRNAME = "graph_arrays"
+FORMAT_VERSION = 1
+
+NODE_CATEGORICAL = ("type", "zone", "sensor")
+NODE_NUMERIC = ("demand", "elevation")
+
+_ARRAYS = ("names_blob", "names_offsets", "indptr", "indices", "edge_type",
+           "node_type", "zone", "sensor", "demand", "elevation")
+
+def _encode(values):
+    """Categorical column -> (int32 codes, vocabulary); None becomes -1."""
+    vocab = sorted({v for v in values if v is not None})
+    lookup = {v: i for i, v in enumerate(vocab)}
+    codes = np.array([lookup[v] if v is not None else -1 for v in values], dtype=np.int32)
+    return codes, vocab
+
+def encode_strings(strings):
+    """List of str -> (uint8 UTF-8 blob, int64 offsets) string table."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def decode_strings(blob, offsets):
+    data = blob.tobytes()
+    offsets = offsets.tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def _build_arrays(G):
+    """(arrays, meta) of the array artifact for the DiGraph G."""
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+
+    names_blob, names_offsets = encode_strings(nodes)
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices = []
+    edge_types = []
+    for i, n in enumerate(nodes):
+        for v, data in G.adj[n].items():
+            indices.append(index[v])
+            edge_types.append(data.get("type"))
+        indptr[i + 1] = len(indices)
+    edge_type, edge_vocab = _encode(edge_types)
+
+    arrays = {
+        "names_blob": names_blob,
+        "names_offsets": names_offsets,
+        "indptr": indptr,
+        "indices": np.array(indices, dtype=np.int64),
+        "edge_type": edge_type,
+    }
+    vocab = {"edge_type": edge_vocab}
+    node_data = [d for _, d in G.nodes(data=True)]
+    for attr in NODE_CATEGORICAL:
+        key = "node_type" if attr == "type" else attr
+        arrays[key], vocab[key] = _encode([d.get(attr) for d in node_data])
+    for attr in NODE_NUMERIC:
+        arrays[attr] = np.array([d.get(attr, np.nan) for d in node_data], dtype=np.float64)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "nodes": len(nodes),
+        "edges": len(indices),
+        "vocab": vocab,
+    }
+    return arrays, meta
+
+def save_graph_arrays(G, directory):
+    """Writes the DiGraph G as an array artifact into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    arrays, meta = _build_arrays(G)
+    for name, arr in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), arr, allow_pickle=False)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+class GraphArrays:
+    """Read-only view of a saved array artifact."""
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.vocab = meta["vocab"]
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._names = None
+        self._index = None
+
+    def number_of_nodes(self):
+        return self.meta["nodes"]
+
+    def number_of_edges(self):
+        return self.meta["edges"]
+
+    @property
+    def names(self):
+        """Node names in artifact order (decoded once, on first use)."""
+        if self._names is None:
+            self._names = decode_strings(self.names_blob, self.names_offsets)
+        return self._names
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.names)}
+        return self._index
+
+    def successors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_sources(self):
+        """Source index of every CSR edge."""
+        return np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+
+    def decode(self, column, code):
+        return self.vocab[column][code] if code >= 0 else None
+
+    def node_attrs(self, i):
+        """networkx-style attribute dict for node i (missing attributes omitted)."""
+        attrs = {}
+        for attr in NODE_CATEGORICAL:
+            key = "node_type" if attr == "type" else attr
+            value = self.decode(key, int(getattr(self, key)[i]))
+            if value is not None:
+                attrs[attr] = value
+        for attr in NODE_NUMERIC:
+            value = float(getattr(self, attr)[i])
+            if not np.isnan(value):
+                attrs[attr] = value
+        return attrs
+
+    def edge_attrs(self, k):
+        etype = self.decode("edge_type", int(self.edge_type[k]))
+        return {"type": etype} if etype is not None else {}
+
+    def to_networkx(self):
+        """Rebuilds the equivalent nx.DiGraph (for code that still needs one)."""
+        import networkx as nx
+
+        G = nx.DiGraph()
+        names = self.names
+        for i, n in enumerate(names):
+            G.add_node(n, **self.node_attrs(i))
+        for u, (lo, hi) in enumerate(zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())):
+            for k in range(lo, hi):
+                G.add_edge(names[u], names[int(self.indices[k])], **self.edge_attrs(k))
+        return G
+
+def load_graph_arrays(directory, mmap=True):
+    """Loads an array artifact; with mmap=True arrays are shared read-only pages."""
+    with open(os.path.join(directory, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported graph artifact version {meta.get('format_version')} in {directory}")
+    arrays = {}
+    for name in _ARRAYS:
+        path = os.path.join(directory, f"{name}.npy")
+        try:
+            arrays[name] = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        except ValueError:
+            # Zero-length arrays cannot be memory-mapped
+            arrays[name] = np.load(path, allow_pickle=False)
+    return GraphArrays(arrays, meta)
+
+def graph_arrays_from_networkx(G):
+    """The GraphArrays view of the DiGraph G, built in memory."""
+    return GraphArrays(*_build_arrays(G))
+
+def is_graph_arrays(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "indptr.npy"))
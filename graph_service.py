@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from graph_artifact import ARTIFACT_DIRNAME, graph_arrays_from_networkx, is_graph_arrays, load_graph_arrays
+
+# Long-running graph service. Every built version (build/<v>/graph_arrays,
+# or the graph.pkl beside it when there is none) is loaded once and kept resident with what the tools derive from it: the
+# name index, the compiled network for simulation and the validation
+# report. A watcher polls build/ and reloads a version when its artifact
+# changes (compiler builds are swapped in whole, so a reload never sees a
+# half-written one).
+#
+# Protocol: one JSON object per line each way, over a Unix socket or a
+# localhost TCP port.
+#
+#   {"op": "versions"}
+#   {"op": "summary", "version": "v1"}
+#   {"op": "node", "version": "v1", "node": "Floor5_Junction"}
+#   {"op": "validate", "version": "v1"}
+#   {"op": "simulate", "version": "v1", "start": "2026-01-01T00:00:00",
+#    "hours": 24, "interval_minutes": 15, "anomaly_type": null,
+#    "anomaly_node": null, "seed": 0, "scenario": 0, "nodes": [...]}
+#
+# Replies are {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+# Validation and simulation run on a thread pool so slow requests do not
+# hold up other clients.
+
+BUILD_DIR = "build"
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "waterpred.sock")
+POLL_SECONDS = 2.0
+MAX_SIMULATE_STEPS = 100_000
+STREAM_LIMIT = 64 * 2**20 # longest request or reply line
+
+class LoadedVersion:
+    """One version's artifact plus what requests derive from it, built on first use."""
+
+    def __init__(self, version, path, stamp):
+        self.version = version
+        self.path = path
+        self.stamp = stamp
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+        if is_graph_arrays(path):
+            self.graph = load_graph_arrays(path, mmap=False)
+        else:
+            with open(path, "rb") as f:
+                self.graph = graph_arrays_from_networkx(pickle.load(f))
+        self._net = None
+        self._report = None
+        self._predecessors = None
+        summary_path = os.path.join(os.path.dirname(path), "graph_summary.json")
+        self.summary = {}
+        if os.path.exists(summary_path):
+            with open(summary_path, "r") as f:
+                self.summary = json.load(f)
+
+    @property
+    def net(self):
+        if self._net is None:
+            from generate_data import CompiledNetwork
+            self._net = CompiledNetwork(self.graph)
+        return self._net
+
+    def node(self, name):
+        G = self.graph
+        if name not in G.index:
+            raise KeyError(f"Node {name} not found in {self.version}")
+        i = G.index[name]
+        if self._predecessors is None:
+            sources = G.edge_sources()
+            order = np.argsort(G.indices, kind="stable")
+            self._predecessors = (sources[order], np.searchsorted(G.indices[order], np.arange(G.number_of_nodes() + 1)))
+        sources, bounds = self._predecessors
+        names = G.names
+        return {
+            "node": name,
+            "attributes": G.node_attrs(i),
+            "successors": [names[j] for j in G.successors(i).tolist()],
+            "predecessors": [names[j] for j in sources[bounds[i]:bounds[i + 1]].tolist()],
+        }
+
+    def validate(self):
+        if self._report is None:
+            from validation_agent import DEFAULT_RULES, RuleEngine
+            engine = RuleEngine([rule() for rule in DEFAULT_RULES])
+            report = engine.run(self.graph).to_json()
+            report["timings_ms"] = engine.timings_ms()
+            self._report = report
+        return self._report
+
+    def simulate(self, start=None, hours=24, interval_minutes=15, anomaly_type=None, anomaly_node=None,
+                 seed=0, scenario=0, step_offset=0, nodes=None):
+        import generate_data
+        from counter_rng import CounterNoise
+
+        start = datetime.fromisoformat(start) if start else generate_data.START_TIME
+        for name, value in (("hours", hours), ("interval_minutes", interval_minutes)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+                raise ValueError(f"{name} must be a positive number, got {value!r}")
+        if hours * 60 / interval_minutes > MAX_SIMULATE_STEPS:
+            raise ValueError(f"Window has more than {MAX_SIMULATE_STEPS} steps")
+        net = self.net
+        timestamps = generate_data.make_timestamps(start, hours, interval_minutes)
+        only = None
+        if nodes is not None:
+            missing = [n for n in nodes if n not in net.index]
+            if missing:
+                raise KeyError(f"Unknown node(s) {missing[:5]} in {self.version}")
+            only = np.array(sorted({net.index[n] for n in nodes}), dtype=np.int64)
+        pressure, flow = generate_data.simulate_batch(
+            net, timestamps, anomaly_type, anomaly_node, rng=CounterNoise(seed, scenario),
+            only=only, step_offset=step_offset)
+        names = [net.nodes[i] for i in only.tolist()] if only is not None else list(net.nodes)
+        return {
+            "timestamps": [t.isoformat() for t in timestamps.astype("datetime64[s]").tolist()],
+            "columns": generate_data.output_columns(names),
+            "values": np.round(generate_data.interleave(pressure, flow), 2).tolist(),
+        }
+
+def artifact_stamp(path):
+    """Changes whenever the artifact is rewritten or swapped in."""
+    st = os.stat(os.path.join(path, "meta.json") if os.path.isdir(path) else path)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+def scan_builds(build_dir=BUILD_DIR, skipped=None):
+    """
+    {version: (artifact path, stamp)} for every build with an array artifact
+    or, failing that, a graph.pkl. Builds with neither go into `skipped`.
+    """
+    found = {}
+    if not os.path.isdir(build_dir):
+        return found
+    for version in sorted(os.listdir(build_dir)):
+        if version.startswith(".") or not os.path.isdir(os.path.join(build_dir, version)):
+            continue
+        path = os.path.join(build_dir, version, ARTIFACT_DIRNAME)
+        if not is_graph_arrays(path):
+            path = os.path.join(build_dir, version, "graph.pkl")
+            if not os.path.isfile(path):
+                if skipped is not None:
+                    skipped.append(version)
+                continue
+        try:
+            found[version] = (path, artifact_stamp(path))
+        except OSError:
+            continue # swapped out under us; picked up on the next poll
+    return found
+
+class GraphService:
+    def __init__(self, build_dir=BUILD_DIR, poll_seconds=POLL_SECONDS, workers=None):
+        self.build_dir = build_dir
+        self.poll_seconds = poll_seconds
+        self.versions = {}
+        self._failed = {} # version: stamp of the artifact that would not load
+        self._skipped = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.requests = 0
+
+    def _load_changes(self, known):
+        """
+        Scans the build directory and loads every version whose stamp differs
+        from `known` ({version: stamp}). Touches no service state, so it can
+        run on the executor; returns (found, loaded, failed, skipped) for _swap.
+        """
+        skipped = []
+        found = scan_builds(self.build_dir, skipped)
+        loaded, failed = {}, {}
+        for version, (path, stamp) in found.items():
+            if known.get(version) == stamp:
+                continue
+            try:
+                loaded[version] = LoadedVersion(version, path, stamp)
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                print(f"Warning: could not load {version}: {e}")
+                failed[version] = stamp
+        return found, loaded, failed, skipped
+
+    def _swap(self, found, loaded, failed, skipped):
+        """Replaces the loaded versions with what _load_changes found; returns what changed."""
+        for version in sorted(set(skipped) - self._skipped):
+            print(f"Warning: skipping {version}: no {ARTIFACT_DIRNAME}/ or graph.pkl in {self.build_dir}/{version}")
+        self._skipped = set(skipped)
+        versions = {}
+        for version in found:
+            lv = loaded.get(version, self.versions.get(version))
+            if lv is not None:
+                versions[version] = lv
+        changed = sorted(set(loaded) | set(self.versions) - set(versions))
+        self._failed = {v: s for v, s in dict(self._failed, **failed).items()
+                        if v in found and v not in loaded}
+        self.versions = versions # one assignment: a request sees the old dict or the new one
+        return changed
+
+    def _known(self):
+        known = {v: lv.stamp for v, lv in self.versions.items()}
+        known.update(self._failed) # not retried until the artifact changes again
+        return known
+
+    def refresh(self):
+        """Loads new or changed versions and drops removed ones; returns what changed."""
+        return self._swap(*self._load_changes(self._known()))
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            # Loading runs on the executor; the swap happens back on the loop,
+            # so requests iterating self.versions never see it change under them
+            changes = await loop.run_in_executor(self._executor, self._load_changes, self._known())
+            changed = self._swap(*changes)
+            if changed:
+                print(f"Reloaded: {', '.join(changed)}")
+
+    def _version(self, request):
+        version = request.get("version")
+        if version not in self.versions:
+            raise KeyError(f"Unknown version {version!r}; loaded: {sorted(self.versions)}")
+        return self.versions[version]
+
+    async def handle_request(self, request):
+        if not isinstance(request, dict):
+            raise ValueError(f"Request must be a JSON object, got {type(request).__name__}")
+        op = request.get("op")
+        loop = asyncio.get_running_loop()
+        if op == "ping":
+            return "pong"
+        if op == "versions":
+            return {v: {"nodes": lv.graph.number_of_nodes(), "loaded_at": lv.loaded_at}
+                    for v, lv in self.versions.items()}
+        if op == "summary":
+            lv = self._version(request)
+            return dict(lv.summary, nodes=lv.graph.number_of_nodes(), edges=lv.graph.number_of_edges(),
+                        loaded_at=lv.loaded_at)
+        if op == "node":
+            return self._version(request).node(request["node"])
+        if op == "validate":
+            return await loop.run_in_executor(self._executor, self._version(request).validate)
+        if op == "simulate":
+            lv = self._version(request)
+            params = {k: request[k] for k in ("start", "hours", "interval_minutes", "anomaly_type",
+                                              "anomaly_node", "seed", "scenario", "step_offset", "nodes")
+                      if k in request}
+            return await loop.run_in_executor(self._executor, lambda: lv.simulate(**params))
+        raise ValueError(f"Unknown op {op!r}")
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    reply = {"ok": True, "result": await self.handle_request(json.loads(line))}
+                except (KeyError, ValueError, TypeError) as e:
+                    reply = {"ok": False, "error": str(e.args[0]) if e.args else type(e).__name__}
+                except Exception as e:
+                    # A bad request must not take the connection down with it
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=None, port=None):
+        self.refresh()
+        print(f"Loaded {len(self.versions)} version(s): {', '.join(self.versions) or 'none'}")
+        if port is not None:
+            server = await asyncio.start_server(self.handle_client, "127.0.0.1", port, limit=STREAM_LIMIT)
+            print(f"Listening on 127.0.0.1:{port}")
+        else:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self.handle_client, socket_path, limit=STREAM_LIMIT)
+            print(f"Listening on {socket_path}")
+        watcher = asyncio.create_task(self.watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            self._executor.shutdown(wait=False)
+            if port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+# --- Client ---
+
+class GraphClient:
+    """Blocking client: one connection, any number of requests."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, port=None, timeout=60.0):
+        if port is not None:
+            self._sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rb")
+
+    def request(self, op, **params):
+        self._sock.sendall(json.dumps(dict(params, op=op)).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Graph service closed the connection")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- Latency benchmark ---
+
+def _percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 2), "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "mean_ms": round(float(ms.mean()), 2)}
+
+def benchmark(version, runs=10, socket_path=DEFAULT_SOCKET, port=None):
+    """Latency of cold-start CLIs versus the same work through a running service."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    artifact = os.path.join(BUILD_DIR, version, ARTIFACT_DIRNAME)
+    report = os.path.join(tempfile.gettempdir(), "graph_service_bench.json")
+    cold = {
+        "validate": [sys.executable, os.path.join(here, "validation_agent.py"), "--input", artifact, "--output", report],
+        "summary": [sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); "
+                    "from generate_data import load_graph; print(load_graph(sys.argv[2]).number_of_nodes())",
+                    here, artifact],
+    }
+    results = {}
+    for op, command in cold.items():
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append(time.perf_counter() - start)
+        results[f"cold {op}"] = _percentiles(samples)
+    node = load_graph_arrays(artifact).names[-1]
+    with GraphClient(socket_path, port) as client:
+        for op in ("summary", "validate", "node", "simulate"):
+            params = {"version": version}
+            if op == "node":
+                params["node"] = node
+            if op == "simulate":
+                params["hours"] = 24
+            client.request(op, **params) # first call builds what the op caches
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                client.request(op, **params)
+                samples.append(time.perf_counter() - start)
+            results[f"service {op}"] = _percentiles(samples)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident graph service for built versions")
+    parser.add_argument("command", choices=["serve", "query", "bench"])
+    parser.add_argument("op", nargs="?", default="versions",
+                        help="query: versions, summary, node, validate or simulate")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--port", type=int, default=None, help="Use localhost TCP on this port instead")
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="Seconds between build/ scans")
+    parser.add_argument("--version", default="v1")
+    parser.add_argument("--node", default=None)
+    parser.add_argument("--params", default=None, help="query: extra request fields as JSON")
+    parser.add_argument("--runs", type=int, default=10, help="bench: samples per operation")
+    args = parser.parse_args(argv)
+
+    if args.port is None and not hasattr(socket, "AF_UNIX"):
+        parser.error("Unix sockets are not available here; pass --port")
+
+    if args.command == "serve":
+        service = GraphService(args.build_dir, args.poll)
+        try:
+            asyncio.run(service.serve(args.socket, args.port))
+        except KeyboardInterrupt:
+            print(f"Stopped after {service.requests} request(s)")
+    elif args.command == "query":
+        params = json.loads(args.params) if args.params else {}
+        if args.op != "versions":
+            params.setdefault("version", args.version)
+        if args.node:
+            params["node"] = args.node
+        with GraphClient(args.socket, args.port) as client:
+            print(json.dumps(client.request(args.op, **params), indent=2))
+    else:
+        for name, stats in benchmark(args.version, args.runs, args.socket, args.port).items():
+            print(f"{name:<20} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
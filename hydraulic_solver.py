@@ -0,0 +1,122 @@
+import numpy as np
+
+# Global gradient (Todini-Pilati) solver for looped networks. Same physics
+# as the tree engine: each edge loses FRICTION * q|q| kPa, nodes sit at a
+# fixed elevation head Z (the static gain of the BFS path from the tank), and
+# pressure = H - Z. Unknowns are every edge flow q and every free node's
+# head H; the fixed-head nodes (tanks) anchor the system.
+#
+# Each Newton step solves the sparse symmetric system
+#
+#   (A D^-1 A^T) H = A q - d - A D^-1 (r q|q| + Af^T Hf)
+#   q' = q - D^-1 (r q|q| + A^T H + Af^T Hf)
+#
+# where A is the free-node incidence matrix (+1 at an edge's head, -1 at its
+# tail), Af the same for fixed nodes, and D = diag(2 r max(|q|, MIN_FLOW)).
+# Warm-started from the previous timestep it converges in a few steps; on a
+# tree it reproduces the linear-time engine's flows and pressures.
+
+FRICTION = 0.0001 # kPa per (flow unit)^2, as in simulate_step
+MIN_FLOW = 0.5 # |q| below this is linearized (D uses it) so dead-end edges stay well conditioned
+TOLERANCE = 1e-6 # relative change in flows that ends the iteration
+MAX_ITERATIONS = 50
+
+class LoopedSystem:
+    def __init__(self, n_nodes, src, dst, fixed, elevation, active=None, friction=FRICTION):
+        import scipy.sparse as sp
+
+        self.n_nodes = n_nodes
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.fixed = np.asarray(fixed, dtype=np.int64)
+        self.elevation = elevation
+        self.r = np.full(len(self.src), friction)
+
+        active = np.ones(n_nodes, dtype=bool) if active is None else active
+        is_free = active.copy()
+        is_free[self.fixed] = False
+        self.free = np.flatnonzero(is_free)
+        position = np.full(n_nodes, -1, dtype=np.int64)
+        position[self.free] = np.arange(len(self.free))
+        fixed_position = np.full(n_nodes, -1, dtype=np.int64)
+        fixed_position[self.fixed] = np.arange(len(self.fixed))
+
+        edges = np.arange(len(self.src))
+        self.A = self._incidence(sp, position, edges, len(self.free))
+        self.Af = self._incidence(sp, fixed_position, edges, len(self.fixed))
+        self.AT = self.A.T.tocsr()
+        self.AfT = self.Af.T.tocsr()
+
+    def _incidence(self, sp, position, edges, n_rows):
+        rows, cols, vals = [], [], []
+        for ends, sign in ((self.dst, 1.0), (self.src, -1.0)):
+            pos = position[ends]
+            keep = pos >= 0
+            rows.append(pos[keep])
+            cols.append(edges[keep])
+            vals.append(np.full(int(keep.sum()), sign))
+        return sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(n_rows, len(edges)))
+
+    def initial_flows(self, demand):
+        """Flows of the zero-friction-loop guess: every edge carries the mean withdrawal."""
+        return np.full(len(self.src), max(float(np.abs(demand).sum()) / max(len(self.src), 1), 1.0))
+
+    def solve(self, demand, fixed_head, q=None, tol=TOLERANCE, max_iter=MAX_ITERATIONS):
+        """
+        demand: withdrawal at every node (length n_nodes); fixed_head: kPa at
+        each fixed node. Returns (H for every node, q per edge, iterations).
+        """
+        import scipy.sparse as sp
+        from scipy.sparse.linalg import splu
+
+        d = demand[self.free]
+        hf = fixed_head + self.elevation[self.fixed]
+        fixed_term = self.AfT @ hf
+        q = self.initial_flows(d) if q is None else q.copy()
+        H_free = np.zeros(len(self.free))
+
+        for iteration in range(1, max_iter + 1):
+            loss = self.r * q * np.abs(q)
+            d_inv = 1.0 / (2.0 * self.r * np.maximum(np.abs(q), MIN_FLOW))
+            energy = loss + fixed_term
+            rhs = self.A @ q - d - self.A @ (d_inv * energy)
+            if len(self.free):
+                M = (self.A @ sp.diags(d_inv) @ self.AT).tocsc()
+                # Minimum-degree ordering on the symmetric pattern keeps fill-in
+                # near zero on tree-like networks (default COLAMD is ~4x slower)
+                H_free = splu(M, permc_spec="MMD_AT_PLUS_A", options=dict(SymmetricMode=True)).solve(rhs)
+            q_new = q - d_inv * (energy + self.AT @ H_free)
+            converged = np.max(np.abs(q_new - q), initial=0.0) <= tol * (1.0 + np.max(np.abs(q_new), initial=0.0))
+            q = q_new
+            if converged:
+                break
+
+        H = np.zeros(self.n_nodes)
+        H[self.free] = H_free
+        H[self.fixed] = hf
+        return H, q, iteration
+
+    def inflow(self, q):
+        """Total flow entering each node, whichever way each edge runs."""
+        into = np.where(q > 0, self.dst, self.src)
+        return np.bincount(into, np.abs(q), minlength=self.n_nodes)
+
+def solve_batch_looped(system, demand, head):
+    """
+    Solves each timestep of a (timesteps x nodes) withdrawal matrix, warm
+    starting from the previous step's flows. `head` is the tank head in kPa
+    per timestep. Returns (pressure, inflow, q) with q shaped (timesteps x edges).
+    """
+    n_steps = demand.shape[0]
+    pressure = np.zeros((n_steps, system.n_nodes))
+    inflow = np.zeros((n_steps, system.n_nodes))
+    flows = np.zeros((n_steps, len(system.src)))
+    q = None
+    for t in range(n_steps):
+        H, q, _ = system.solve(demand[t], np.atleast_1d(head[t]), q)
+        solved = np.concatenate([system.free, system.fixed])
+        pressure[t, solved] = H[solved] - system.elevation[solved]
+        inflow[t] = system.inflow(q)
+        flows[t] = q
+    return pressure, inflow, flows
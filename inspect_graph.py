@@ -1,9 +1,36 @@
+import argparse
+import os
 import pickle
-import networkx as nx
-import sys
+
+from graph_artifact import ARTIFACT_DIRNAME, is_graph_arrays, load_graph_arrays
+
+def inspect_graph_arrays(path, output_path):
+    G = load_graph_arrays(path)
+    names = G.names
+    with open(output_path, "w") as out:
+        out.write(f"Graph Type: {type(G)}\n")
+        out.write(f"Nodes: {G.number_of_nodes()}\n")
+        out.write(f"Edges: {G.number_of_edges()}\n")
+
+        out.write("\nNodes:\n")
+        for i, n in enumerate(names):
+            out.write(f"  {n}: {G.node_attrs(i)}\n")
+
+        out.write("\nEdges:\n")
+        for k, (u, v) in enumerate(zip(G.edge_sources().tolist(), G.indices.tolist())):
+            out.write(f"  {names[u]} -> {names[v]}: {G.edge_attrs(k)}\n")
 
 def inspect_graph(pkl_path, output_path):
     try:
+        if is_graph_arrays(pkl_path):
+            inspect_graph_arrays(pkl_path, output_path)
+            print(f"Graph details written to {output_path}")
+            return
+        if not os.path.exists(pkl_path) and os.path.basename(os.path.normpath(pkl_path)) == ARTIFACT_DIRNAME:
+            pickled = os.path.join(os.path.dirname(os.path.normpath(pkl_path)), "graph.pkl")
+            print(f"Warning: {pkl_path} not found; reading {pickled}")
+            pkl_path = pickled
+
         with open(pkl_path, 'rb') as f:
             G = pickle.load(f)
         
@@ -24,9 +51,13 @@ def inspect_graph(pkl_path, output_path):
     except Exception as e:
         print(f"Error reading graph: {e}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a graph's nodes and edges to a text file")
+    parser.add_argument("output", nargs="?", default="graph_details.txt")
+    parser.add_argument("graph", nargs="?", default="build/v1/graph.pkl",
+                        help="graph_arrays directory or graph.pkl")
+    args = parser.parse_args(argv)
+    inspect_graph(args.graph, args.output)
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        output_path = "graph_details.txt"
-    else:
-        output_path = sys.argv[1]
-    inspect_graph(r"C:\Users\Administrator\Documents\Project\Water Prediction\build\v1\graph.pkl", output_path)
+    main()
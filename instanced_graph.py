@@ -0,0 +1,264 @@
+import json
+import os
+
+import numpy as np
+
+# Instanced representation of a compiled building. Each floor template is
+# compiled once into a TemplatePrototype; every Apply line is stored as one
+# (attach node, template id, offset) record instead of copying the template's
+# nodes and edges. Node ids are global integers:
+#
+#   [0, n_base)                          base nodes from WaterSystem.txt
+#   n_base + offset[k] + local           node `local` of instance k
+#
+# Attribute lookups and traversals resolve through the prototype; a flat
+# networkx graph identical to apply_templates' output is only built by
+# flatten().
+
+INSTANCED_DIRNAME = "graph_instanced"
+
+class TemplatePrototype:
+    def __init__(self, name, nodes, edges):
+        self.name = name
+        self.nodes = list(nodes)
+        self.local_index = {n: i for i, n in enumerate(self.nodes)}
+        self.edges = [(self.local_index[u], self.local_index[v]) for u, v in edges]
+        self.successors = [[] for _ in self.nodes]
+        for u, v in self.edges:
+            self.successors[u].append(v)
+        # Same attachment rule as apply_templates
+        root = self.local_index.get("FloorInlet")
+        if root is None:
+            root = self.local_index.get("Riser")
+        self.root = root
+        self.node_attrs = [{} for _ in self.nodes]
+
+    @property
+    def size(self):
+        return len(self.nodes)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "nodes": self.nodes,
+            "edges": [[self.nodes[u], self.nodes[v]] for u, v in self.edges],
+            "node_attrs": self.node_attrs,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        proto = cls(data["name"], data["nodes"], data["edges"])
+        proto.node_attrs = data.get("node_attrs", proto.node_attrs)
+        return proto
+
+class _NodeView:
+    """Minimal G.nodes stand-in so attach_demands/attach_sensors work unchanged."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __contains__(self, name):
+        return self._graph.lookup(name) is not None
+
+    def __getitem__(self, name):
+        gid = self._graph.lookup(name)
+        if gid is None:
+            raise KeyError(name)
+        return self._graph.writable_attrs(gid)
+
+class InstancedGraph:
+    def __init__(self, base, prototypes=None):
+        # base: nx.DiGraph of the non-template network (WaterSystem.txt)
+        self.base = base
+        self.base_nodes = list(base.nodes())
+        self.base_index = {n: i for i, n in enumerate(self.base_nodes)}
+        self.prototypes = list(prototypes or [])
+        self.prototype_ids = {p.name: i for i, p in enumerate(self.prototypes)}
+        self._attach = []
+        self._template = []
+        self._offset = []
+        self._instance_nodes = 0
+        self._instances_by_attach = {}
+        self._arrays = None
+        # Sparse per-node attributes for instance nodes, keyed by global id
+        self.overrides = {}
+
+    # --- Construction ---
+
+    def add_prototype(self, name, nodes, edges):
+        self.prototype_ids[name] = len(self.prototypes)
+        self.prototypes.append(TemplatePrototype(name, nodes, edges))
+
+    def add_instance(self, template_name, attach_node):
+        if attach_node not in self.base_index:
+            # apply_templates would create it implicitly via the connection edge
+            self.base.add_node(attach_node)
+            self.base_index[attach_node] = len(self.base_nodes)
+            self.base_nodes.append(attach_node)
+        template_id = self.prototype_ids[template_name]
+        self._instances_by_attach.setdefault(attach_node, []).append(len(self._attach))
+        self._attach.append(self.base_index[attach_node])
+        self._template.append(template_id)
+        self._offset.append(self._instance_nodes)
+        self._instance_nodes += self.prototypes[template_id].size
+        self._arrays = None
+
+    # --- Instance table ---
+
+    def instance_arrays(self):
+        """(attach, template, offset) as int arrays, one entry per instance."""
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self._attach, dtype=np.int64),
+                np.array(self._template, dtype=np.int32),
+                np.array(self._offset, dtype=np.int64),
+            )
+        return self._arrays
+
+    @property
+    def n_base(self):
+        return len(self.base_nodes)
+
+    @property
+    def n_instances(self):
+        return len(self._attach)
+
+    def number_of_nodes(self):
+        return self.n_base + self._instance_nodes
+
+    def number_of_edges(self):
+        connected = sum(1 for t in self._template if self.prototypes[t].root is not None)
+        template_edges = sum(len(self.prototypes[t].edges) for t in self._template)
+        return self.base.number_of_edges() + template_edges + connected
+
+    # --- Resolution ---
+
+    def resolve(self, gid):
+        """gid -> (instance index, local node index); (-1, gid) for base nodes."""
+        if gid < self.n_base:
+            return -1, gid
+        rel = gid - self.n_base
+        _, _, offset = self.instance_arrays()
+        k = int(np.searchsorted(offset, rel, side="right")) - 1
+        return k, rel - int(offset[k])
+
+    def name(self, gid):
+        k, local = self.resolve(gid)
+        if k < 0:
+            return self.base_nodes[local]
+        proto = self.prototypes[self._template[k]]
+        return f"{self.base_nodes[self._attach[k]]}.{proto.nodes[local]}"
+
+    def lookup(self, name):
+        """Global id for a node name, or None."""
+        gid = self.base_index.get(name)
+        if gid is not None:
+            return gid
+        # Attach and template node names may themselves contain dots, so try
+        # every split point whose prefix is a known attach node, longest first
+        dot = name.rfind(".")
+        while dot > 0:
+            local_name = name[dot + 1:]
+            for k in self._instances_by_attach.get(name[:dot], ()):
+                local = self.prototypes[self._template[k]].local_index.get(local_name)
+                if local is not None:
+                    return self.n_base + self._offset[k] + local
+            dot = name.rfind(".", 0, dot)
+        return None
+
+    def node_attrs(self, gid):
+        k, local = self.resolve(gid)
+        if k < 0:
+            return dict(self.base.nodes[self.base_nodes[local]])
+        attrs = dict(self.prototypes[self._template[k]].node_attrs[local])
+        attrs.update(self.overrides.get(gid, {}))
+        return attrs
+
+    def writable_attrs(self, gid):
+        if gid < self.n_base:
+            return self.base.nodes[self.base_nodes[gid]]
+        return self.overrides.setdefault(gid, {})
+
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    def successors(self, gid):
+        k, local = self.resolve(gid)
+        if k < 0:
+            name = self.base_nodes[local]
+            result = [self.base_index[v] for v in self.base.successors(name)]
+            for j in self._instances_by_attach.get(name, ()):
+                root = self.prototypes[self._template[j]].root
+                if root is not None:
+                    result.append(self.n_base + self._offset[j] + root)
+            return result
+        offset = self.n_base + self._offset[k]
+        return [offset + v for v in self.prototypes[self._template[k]].successors[local]]
+
+    def count_nodes(self, predicate):
+        """Counts nodes whose attribute dict satisfies predicate, without expanding."""
+        total = sum(1 for _, d in self.base.nodes(data=True) if predicate(d))
+        for t in self._template:
+            total += sum(1 for attrs in self.prototypes[t].node_attrs if predicate(attrs))
+        for gid, attrs in self.overrides.items():
+            k, local = self.resolve(gid)
+            proto_attrs = self.prototypes[self._template[k]].node_attrs[local]
+            total += predicate(dict(proto_attrs, **attrs)) - predicate(proto_attrs)
+        return total
+
+    # --- Expansion ---
+
+    def flatten(self):
+        """Builds the equivalent flat nx.DiGraph (same order as apply_templates)."""
+        G = self.base.copy()
+        for k in range(self.n_instances):
+            attach = self.base_nodes[self._attach[k]]
+            proto = self.prototypes[self._template[k]]
+            names = [f"{attach}.{n}" for n in proto.nodes]
+            for local, n in enumerate(names):
+                G.add_node(n, **proto.node_attrs[local])
+            for u, v in proto.edges:
+                G.add_edge(names[u], names[v])
+            if proto.root is not None:
+                G.add_edge(attach, names[proto.root], type="TemplateConnection")
+        for gid, attrs in self.overrides.items():
+            G.nodes[self.name(gid)].update(attrs)
+        return G
+
+def save_instanced(graph, directory):
+    """Writes base graph, prototypes and overrides as JSON, instances as .npy."""
+    os.makedirs(directory, exist_ok=True)
+    attach, template, offset = graph.instance_arrays()
+    np.save(os.path.join(directory, "attach.npy"), attach, allow_pickle=False)
+    np.save(os.path.join(directory, "template.npy"), template, allow_pickle=False)
+    np.save(os.path.join(directory, "offset.npy"), offset, allow_pickle=False)
+    meta = {
+        "base_nodes": [[n, d] for n, d in graph.base.nodes(data=True)],
+        "base_edges": [[u, v, d] for u, v, d in graph.base.edges(data=True)],
+        "prototypes": [p.to_dict() for p in graph.prototypes],
+        "overrides": {str(gid): attrs for gid, attrs in graph.overrides.items()},
+    }
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def load_instanced(directory):
+    import networkx as nx
+
+    with open(os.path.join(directory, "meta.json"), "r") as f:
+        meta = json.load(f)
+    base = nx.DiGraph()
+    for n, d in meta["base_nodes"]:
+        base.add_node(n, **d)
+    for u, v, d in meta["base_edges"]:
+        base.add_edge(u, v, **d)
+    graph = InstancedGraph(base, [TemplatePrototype.from_dict(p) for p in meta["prototypes"]])
+    attach = np.load(os.path.join(directory, "attach.npy"), allow_pickle=False)
+    template = np.load(os.path.join(directory, "template.npy"), allow_pickle=False)
+    for a, t in zip(attach.tolist(), template.tolist()):
+        graph.add_instance(graph.prototypes[t].name, graph.base_nodes[a])
+    graph.overrides = {int(gid): attrs for gid, attrs in meta["overrides"].items()}
+    return graph
+
+def is_instanced(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "attach.npy"))
@@ -1,8 +1,10 @@
-import networkx as nx
+import argparse
 import pickle
 import os
 
-def generate_mock_graph():
+def generate_mock_graph(output_path="graph.pkl"):
+    import networkx as nx
+
     G = nx.DiGraph()
 
     # Define Nodes
@@ -42,9 +44,6 @@ def generate_mock_graph():
     G.add_edge("Junction_C1", "Junction_C_High", type="PIPE", length=100)
 
     # Save graph
-    artifact_dir = r"c:/Users/Administrator/.gemini/antigravity/brain/34d2cc9b-7e64-4143-81f7-37a588066865"
-    output_path = os.path.join(artifact_dir, "graph.pkl")
-    
     print(f"Writing to: {output_path}")
     with open(output_path, "wb") as f:
         pickle.dump(G, f)
@@ -52,5 +51,11 @@ def generate_mock_graph():
     print(f"Mock graph generated at {os.path.abspath(output_path)}")
     print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a small graph.pkl that trips each validation rule")
+    parser.add_argument("output", nargs="?", default="graph.pkl")
+    args = parser.parse_args(argv)
+    generate_mock_graph(args.output)
+
 if __name__ == "__main__":
-    generate_mock_graph()
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+import generate_data
+from counter_rng import CounterNoise
+
+# Spec file format (JSON):
+# {
+#   "graph": "build/v1/graph.pkl",
+#   "start": "2026-01-01T00:00:00",
+#   "duration_hours": 24,
+#   "interval_minutes": 15,
+#   "seed": 1234,
+#   "scenarios": [
+#     {"anomaly_type": "Leak", "nodes": "junctions", "windows": [[10, 14], [2, 4]], "magnitudes": [300, 150]},
+#     {"anomaly_type": "Misuse", "nodes": ["Floor1_Junction.Apt1"], "windows": [[18, 20]]}
+#   ]
+# }
+# "nodes" is an explicit list or one of the selectors in NODE_SELECTORS.
+# Each entry expands to nodes x windows x magnitudes scenarios.
+
+DEFAULT_MAGNITUDE = {
+    "Leak": generate_data.LEAK_FLOW,
+    "Misuse": generate_data.MISUSE_DEMAND,
+}
+
+SEVERITY = {
+    "Leak": "High",
+    "Misuse": "Medium",
+}
+
+def _fixtures(net):
+    return [n for n, d in zip(net.nodes, net.base_demand.tolist()) if d > 0]
+
+def _junctions(net):
+    # Reachable nodes that feed something downstream, other than the tank
+    feeds = set(net.parent[net.parent >= 0].tolist())
+    return [n for i, n in enumerate(net.nodes) if i in feeds and i != net.tank]
+
+NODE_SELECTORS = {
+    "fixtures": _fixtures,
+    "junctions": _junctions,
+    "all": lambda net: [net.nodes[i] for i in np.flatnonzero(net.reachable).tolist()],
+}
+
+def load_spec(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def expand_scenarios(spec, net):
+    """Expands the spec into a flat, ordered list of scenario dicts."""
+    scenarios = []
+    for entry in spec["scenarios"]:
+        anomaly_type = entry["anomaly_type"]
+        nodes = entry["nodes"]
+        if isinstance(nodes, str):
+            if nodes not in NODE_SELECTORS:
+                raise ValueError(f"Unknown node selector '{nodes}'. Expected one of {sorted(NODE_SELECTORS)}")
+            nodes = NODE_SELECTORS[nodes](net)
+        windows = entry.get("windows", [[0, 24]])
+        magnitudes = entry.get("magnitudes", [DEFAULT_MAGNITUDE[anomaly_type]])
+
+        for node, (start_hour, end_hour), magnitude in product(nodes, windows, magnitudes):
+            if node not in net.index:
+                print(f"Warning: Scenario node {node} not found in graph.")
+                continue
+            scenarios.append({
+                "id": len(scenarios),
+                "anomaly_type": anomaly_type,
+                "node_id": node,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+                "magnitude": float(magnitude),
+            })
+    return scenarios
+
+# --- Worker ---
+# Each worker process loads and compiles the graph once in its initializer;
+# tasks then only carry the small scenario dict.
+
+_worker = {}
+
+def _init_worker(graph_path, start, duration_hours, interval_minutes, seed, output_dir, fmt,
+                 chunk_steps=generate_data.CHUNK_STEPS):
+    G = generate_data.load_graph(graph_path)
+    timestamps = generate_data.make_timestamps(start, duration_hours, interval_minutes)
+    net = generate_data.CompiledNetwork(G)
+    _worker.update(
+        net=net,
+        columns=generate_data.output_columns(net.nodes),
+        fmt=fmt,
+        timestamps=timestamps,
+        hours=generate_data.timestamp_hours(timestamps),
+        seed=seed,
+        output_dir=Path(output_dir),
+        chunk_steps=max(1, chunk_steps),
+    )
+
+def scenario_rng(seed, scenario_id):
+    """Per-scenario noise: depends only on (seed, id, timestep, node), never on worker layout."""
+    return CounterNoise(seed, scenario_id)
+
+def _run_scenario(scenario):
+    net = _worker["net"]
+    timestamps = _worker["timestamps"]
+    hours = _worker["hours"]
+
+    active = generate_data.in_window(hours, scenario["start_hour"], scenario["end_hour"])
+    rng = scenario_rng(_worker["seed"], scenario["id"])
+    chunk_steps = _worker["chunk_steps"]
+
+    fmt = _worker["fmt"]
+    filename = f"scenario_{scenario['id']:06d}{generate_data.OUTPUT_FORMATS[fmt]}"
+    with generate_data.open_stream_writer(_worker["output_dir"] / filename, fmt, _worker["columns"]) as writer:
+        # Chunked like generate_data.main(), so memory is bounded by chunk_steps
+        # rather than the horizon; counter noise keeps the output chunk-invariant
+        for lo in range(0, len(timestamps), chunk_steps):
+            hi = min(lo + chunk_steps, len(timestamps))
+            pressure, flow = generate_data.simulate_batch(
+                net, timestamps[lo:hi], scenario["anomaly_type"], scenario["node_id"], active[lo:hi],
+                rng=rng, magnitude=scenario["magnitude"], step_offset=lo,
+            )
+            writer.write(timestamps[lo:hi], generate_data.interleave(pressure, flow))
+
+    labels = []
+    for ts in timestamps[active].astype('datetime64[s]').tolist():
+        labels.append({
+            "timestamp": ts.isoformat(),
+            "node_id": scenario["node_id"],
+            "anomaly_type": scenario["anomaly_type"],
+            "severity": SEVERITY[scenario["anomaly_type"]],
+            "scenario": scenario["id"],
+        })
+    return dict(scenario, file=filename), labels
+
+def run_sweep(spec_path, output_dir, workers=None, graph_path=None, fmt="csv",
+              chunk_steps=generate_data.CHUNK_STEPS):
+    spec = load_spec(spec_path)
+    graph_path = graph_path or spec.get("graph", generate_data.GRAPH_PATH)
+    start = datetime.fromisoformat(spec.get("start", generate_data.START_TIME.isoformat()))
+    duration_hours = spec.get("duration_hours", generate_data.DURATION_HOURS)
+    interval_minutes = spec.get("interval_minutes", generate_data.INTERVAL_MINUTES)
+    seed = spec.get("seed", 0)
+    workers = workers or os.cpu_count() or 1
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    init_args = (graph_path, start, duration_hours, interval_minutes, seed, str(output_dir), fmt, chunk_steps)
+    _init_worker(*init_args)
+    scenarios = expand_scenarios(spec, _worker["net"])
+    print(f"Running {len(scenarios)} scenarios on {workers} worker(s)...")
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [_run_scenario(s) for s in scenarios]
+    else:
+        chunksize = max(1, len(scenarios) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_run_scenario, scenarios, chunksize=chunksize))
+    elapsed = time.perf_counter() - t0
+
+    manifest = [r for r, _ in results]
+    all_labels = [label for _, labels in results for label in labels]
+    with open(output_dir / "scenarios.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    with open(output_dir / "labels.json", "w") as f:
+        json.dump(all_labels, f, indent=2)
+
+    rate = len(scenarios) / elapsed if elapsed > 0 else float("inf")
+    print(f"Done: {len(scenarios)} scenarios in {elapsed:.2f}s ({rate:.1f} scenarios/s)")
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a scenario sweep over a process pool")
+    parser.add_argument("spec", help="Path to scenario spec JSON")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--graph", default=None, help="Override the spec's graph path")
+    parser.add_argument("--format", choices=sorted(generate_data.OUTPUT_FORMATS), default="csv")
+    parser.add_argument("--chunk-steps", type=int, default=generate_data.CHUNK_STEPS,
+                        help="Timesteps simulated and written per chunk (bounds memory)")
+    args = parser.parse_args(argv)
+
+    run_sweep(args.spec, args.output_dir, args.workers, args.graph, args.format, args.chunk_steps)
+
+if __name__ == "__main__":
+    main()
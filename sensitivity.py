@@ -0,0 +1,235 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import generate_data
+from graph_artifact import decode_strings, encode_strings
+
+# Sensitivity of every sensor reading to extra demand at every node, at one
+# operating point (the noise-free demand of a given hour and the tank head
+# of that hour). Row k, column j of the Jacobian is d(reading k)/d(demand j):
+# how far sensor k moves per unit of flow withdrawn at node j. Computing it
+# costs about one simulation instead of one simulation per candidate node.
+# It covers the flow a fixture or a leak draws, not the simulator's extra
+# LEAK_PRESSURE_DROP below a leak, which is not a function of the demand
+# (generate_data.solve_batch); a leak's pressure response is the column
+# times its flow, minus that constant drop at its descendants.
+#
+# Tree networks: adding demand at j raises the subtree flow s_u of every
+# node u on j's path from the tank by one, and each such edge then loses
+# c_u = 2 * FRICTION * s_u more kPa. The pressure at v therefore drops by
+# C(lca(v, j)), where C is c summed down the tree. One bottom-up sweep
+# gives s, and one top-down sweep fills in every sensor row at once.
+#
+# Looped networks: linearizing the gradient solver's equations at the
+# solved flows gives dH = -M^-1 dd with M = A D^-1 A^T (see
+# hydraulic_solver). M is symmetric, so each sensor row is one solve with
+# M (the adjoint), sharing a single factorization, not one solve per node.
+#
+# Saved as a directory in the timeseries_store layout:
+#
+#   jacobian.npy                      float32 (channels, nodes)
+#   channels_blob / channels_offsets  sensor column names (rows)
+#   nodes_blob / nodes_offsets        node names (columns)
+#   meta.json                         operating point; written last
+
+FORMAT_VERSION = 1
+OUTPUT_SUFFIX = ".sensitivity"
+DEFAULT_HOUR = 8 # morning peak: friction terms, and so pressure sensitivities, are largest
+
+def operating_point(net, hour):
+    """(withdrawal per node, tank head in metres) for the noise-free demand at `hour`."""
+    hours = np.array([hour], dtype=np.float64)
+    withdrawal = np.where(net.reachable, net.base_demand * generate_data.demand_factor(hours)[0], 0.0)
+    return withdrawal, float(generate_data.tank_level(hours)[0])
+
+def tree_jacobian(net, channels, withdrawal):
+    """Sensitivity rows for a tree network (CompiledNetwork.is_tree)."""
+    import hydraulic_solver
+
+    n_nodes = len(net.nodes)
+    subtree = withdrawal.copy()
+    for src, dst in net.flow_levels:
+        np.add.at(subtree, src, subtree[dst])
+
+    # Extra friction loss per unit of extra flow, summed from the tank down
+    loss_rate = np.zeros(n_nodes)
+    for members, parents in net.pressure_levels:
+        loss_rate[members] = loss_rate[parents] + 2.0 * hydraulic_solver.FRICTION * subtree[members]
+
+    # on_path[k, u]: u is the sensor's node or one of its tree ancestors
+    sensor_nodes = np.array([i for _, i, _ in channels], dtype=np.int64)
+    on_path = np.zeros((len(channels), n_nodes), dtype=bool)
+    for k, i in enumerate(sensor_nodes.tolist()):
+        while i >= 0 and net.reachable[i] and not on_path[k, i]:
+            on_path[k, i] = True
+            i = int(net.parent[i])
+    is_sensor = np.zeros((len(channels), n_nodes), dtype=bool)
+    is_sensor[np.arange(len(channels)), sensor_nodes] = True
+
+    # Top-down: shared loss is C at the deepest common ancestor; a sensor's
+    # subtree is every node at or below it
+    shared = np.zeros((len(channels), n_nodes))
+    below = np.zeros((len(channels), n_nodes), dtype=bool)
+    below[:, net.tank] = is_sensor[:, net.tank]
+    for members, parents in net.pressure_levels:
+        shared[:, members] = np.where(on_path[:, members], loss_rate[members], shared[:, parents])
+        below[:, members] = below[:, parents] | is_sensor[:, members]
+
+    jacobian = np.zeros((len(channels), n_nodes))
+    for k, (_, i, quantity) in enumerate(channels):
+        if quantity == "flow":
+            if net.is_apt[i]:
+                jacobian[k, i] = 1.0 # a fixture's meter reads its own demand
+            else:
+                jacobian[k] = net.inflow_edges[i] * below[k]
+        elif quantity == "level":
+            jacobian[k] = -shared[k] / 9.81
+        else:
+            jacobian[k] = -shared[k]
+    return jacobian
+
+def looped_jacobian(net, channels, withdrawal, head):
+    """Sensitivity rows for any network, from the looped solver's linearization."""
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import splu
+    import hydraulic_solver
+
+    system = net.looped_system()
+    _, q, _ = system.solve(withdrawal, np.atleast_1d(head * 9.81))
+    d_inv = 1.0 / (2.0 * system.r * np.maximum(np.abs(q), hydraulic_solver.MIN_FLOW))
+
+    n_nodes, n_free = len(net.nodes), len(system.free)
+    position = np.full(n_nodes, -1, dtype=np.int64)
+    position[system.free] = np.arange(n_free)
+
+    # Adjoint right-hand sides, one column per channel that needs a solve
+    rhs = np.zeros((n_free, len(channels)))
+    # Edges with (near) zero flow take their drawn direction: the sign of q
+    # there is roundoff, and extra demand below pulls flow that way
+    forward = (q > 0) | (np.abs(q) < hydraulic_solver.MIN_FLOW)
+    into = np.where(forward, system.dst, system.src)
+    direction = np.where(forward, 1.0, -1.0)
+    for k, (_, i, quantity) in enumerate(channels):
+        if position[i] < 0 or (quantity == "flow" and net.is_apt[i]):
+            continue
+        if quantity == "flow":
+            # d(inflow)/dq: sign of each edge currently flowing into the node
+            w = np.where(into == i, direction, 0.0)
+            rhs[:, k] = system.A @ (d_inv * w)
+        else:
+            rhs[position[i], k] = -1.0
+
+    jacobian = np.zeros((len(channels), n_nodes))
+    if n_free:
+        M = (system.A @ sp.diags(d_inv) @ system.AT).tocsc()
+        lu = splu(M, permc_spec="MMD_AT_PLUS_A", options=dict(SymmetricMode=True))
+        jacobian[:, system.free] = lu.solve(rhs).T
+    for k, (_, i, quantity) in enumerate(channels):
+        if quantity == "flow" and net.is_apt[i]:
+            jacobian[k] = 0.0
+            jacobian[k, i] = 1.0
+        elif quantity == "level":
+            jacobian[k] /= 9.81
+    return jacobian
+
+def compute_jacobian(net, channels, hour=DEFAULT_HOUR, solver="auto"):
+    """
+    (channels x nodes) sensitivity matrix and the operating point it was
+    taken at. `channels` is generate_data.sensor_channels output; `solver`
+    is as in simulate_batch ("auto": tree sweep whenever net.is_tree).
+    """
+    if solver not in generate_data.SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}'. Expected one of {generate_data.SOLVERS}")
+    withdrawal, head = operating_point(net, hour)
+    use_tree = solver == "tree" or (solver == "auto" and net.is_tree)
+    if use_tree:
+        jacobian = tree_jacobian(net, channels, withdrawal)
+    else:
+        jacobian = looped_jacobian(net, channels, withdrawal, head)
+    meta = {"hour": hour, "tank_head_m": round(head, 6), "solver": "tree" if use_tree else "looped",
+            "total_demand": round(float(withdrawal.sum()), 6)}
+    return jacobian, meta
+
+def save_sensitivity(path, jacobian, channels, nodes, meta):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    meta_path = path / "meta.json"
+    if meta_path.exists():
+        meta_path.unlink()
+    np.save(path / "jacobian.npy", jacobian.astype(np.float32), allow_pickle=False)
+    for name, strings in (("channels", [c for c, _, _ in channels]), ("nodes", list(nodes))):
+        blob, offsets = encode_strings(strings)
+        np.save(path / f"{name}_blob.npy", blob, allow_pickle=False)
+        np.save(path / f"{name}_offsets.npy", offsets, allow_pickle=False)
+    with open(meta_path, "w") as f:
+        json.dump(dict(meta, format_version=FORMAT_VERSION, channels=len(channels), nodes=len(nodes)), f, indent=2)
+
+class SensitivityMatrix:
+    """Read-only, memory-mapped view of a saved sensitivity directory."""
+
+    def __init__(self, directory):
+        self.path = Path(directory)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No finished sensitivity matrix at {directory} (missing meta.json)")
+        with open(meta_path, "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported sensitivity format version {self.meta.get('format_version')} in {directory}")
+        self.values = np.load(self.path / "jacobian.npy", mmap_mode="r", allow_pickle=False)
+        self.channels = decode_strings(np.load(self.path / "channels_blob.npy"), np.load(self.path / "channels_offsets.npy"))
+        self.nodes = decode_strings(np.load(self.path / "nodes_blob.npy"), np.load(self.path / "nodes_offsets.npy"))
+        self._node_index = None
+
+    def row(self, channel):
+        """Sensitivity of one sensor column to demand at every node."""
+        return self.values[self.channels.index(channel)]
+
+    def column(self, node):
+        """Response of every sensor to extra demand at one node."""
+        if self._node_index is None:
+            self._node_index = {n: j for j, n in enumerate(self.nodes)}
+        return self.values[:, self._node_index[node]]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sensitivity of each sensor reading to extra demand at every node")
+    parser.add_argument("--graph", default=generate_data.GRAPH_PATH, help="Path to a graph_arrays directory or graph.pkl")
+    parser.add_argument("--output", default=None, help=f"Output directory (default: <graph>{OUTPUT_SUFFIX})")
+    parser.add_argument("--hour", type=int, default=DEFAULT_HOUR, help="Hour of day of the operating point")
+    parser.add_argument("--tank", default="RoofTank", help="Fixed-head node the network is solved from")
+    parser.add_argument("--solver", choices=generate_data.SOLVERS, default="auto")
+    parser.add_argument("--threshold", type=float, default=0.01,
+                        help="|sensitivity| a node needs at some sensor to count as observed")
+    args = parser.parse_args(argv)
+
+    G = generate_data.load_graph(args.graph)
+    net = generate_data.CompiledNetwork(G, args.tank)
+    channels = generate_data.sensor_channels(net.nodes, generate_data.node_sensors(G))
+    if not channels:
+        print("Warning: graph has no sensors; nothing to compute.")
+        return 1
+
+    t0 = time.perf_counter()
+    jacobian, meta = compute_jacobian(net, channels, args.hour, args.solver)
+    elapsed = time.perf_counter() - t0
+    output = args.output or str(Path(args.graph).with_suffix("")) + OUTPUT_SUFFIX
+    save_sensitivity(output, jacobian, channels, net.nodes, meta)
+
+    print(f"{len(channels)} sensors x {len(net.nodes)} nodes ({meta['solver']} solver, hour {args.hour}) "
+          f"in {elapsed * 1000:.1f} ms")
+    for k, (column, _, _) in enumerate(channels):
+        j = int(np.argmax(np.abs(jacobian[k])))
+        if jacobian[k, j] == 0:
+            print(f"  {column:<48} unaffected (fixed head, or not below the tank)")
+        else:
+            print(f"  {column:<48} max |d/dq| {abs(jacobian[k, j]):10.4g} at {net.nodes[j]}")
+    observed = (np.abs(jacobian) >= args.threshold).any(axis=0) & net.reachable
+    print(f"{int(observed.sum())} of {int(net.reachable.sum())} supplied nodes move some sensor by >= {args.threshold}")
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import functools
+import json
+import time
+import tracemalloc
+
+# Opt-in stage instrumentation. Functions decorated with @traced record a
+# span (wall time, items processed and, with memory tracing, the
+# tracemalloc peak) while a tracer is active. With none active the wrapper
+# is one global check and a call, so decorated code can ship as is.
+#
+# Spans nest: a stage called from another shows up inside it, and the
+# outer stage's peak includes its children's.
+
+_tracer = None
+
+class StageTracer:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        else:
+            self._started_tracemalloc = False
+
+    def begin(self, name):
+        span = {"name": name, "start": time.perf_counter() - self._origin, "depth": len(self._stack)}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            span["_base"] = current
+            span["_peak"] = current
+        self._stack.append(span)
+        return span
+
+    def end(self, span):
+        span["seconds"] = time.perf_counter() - self._origin - span["start"]
+        self._stack.pop()
+        if self.memory:
+            peak = max(span.pop("_peak"), tracemalloc.get_traced_memory()[1])
+            span["peak_bytes"] = peak - span.pop("_base")
+            if self._stack:
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+        self.spans.append(span)
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def to_json(self):
+        return {"memory": self.memory, "stages": sorted(self.spans, key=lambda s: s["start"])}
+
+    def to_chrome_trace(self):
+        """Chrome trace-event format (chrome://tracing, Perfetto)."""
+        events = []
+        for span in self.to_json()["stages"]:
+            args = {k: v for k, v in span.items() if k not in ("name", "start", "seconds", "depth")}
+            events.append({"name": span["name"], "ph": "X", "pid": 1, "tid": 1,
+                           "ts": span["start"] * 1e6, "dur": span["seconds"] * 1e6, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path, fmt="json"):
+        content = self.to_chrome_trace() if fmt == "chrome" else self.to_json()
+        with open(path, "w") as f:
+            json.dump(content, f, indent=2)
+
+    def summary(self):
+        lines = []
+        for span in self.to_json()["stages"]:
+            line = f"{'  ' * span['depth']}{span['name']}: {span['seconds'] * 1000:.1f} ms"
+            if "items" in span:
+                line += f", {span['items']} items"
+            if "peak_bytes" in span:
+                line += f", peak {span['peak_bytes'] / 2**20:.1f} MiB"
+            lines.append(line)
+        return "\n".join(lines)
+
+def record_items(count):
+    """
+    Sets the item count of the innermost active stage, for stages whose
+    count is only known inside the function (no-op when not tracing).
+    """
+    if _tracer is not None and _tracer._stack:
+        _tracer._stack[-1]["items"] = count
+
+def start_tracing(memory=False):
+    """Activates a new tracer for @traced functions and returns it."""
+    global _tracer
+    _tracer = StageTracer(memory)
+    return _tracer
+
+def stop_tracing():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+def traced(name, items=None):
+    """
+    Records calls to the decorated function as stage `name`. `items` maps
+    (result, *args) to the number of items the stage processed; it only
+    runs while tracing.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            span = tracer.begin(name)
+            try:
+                result = fn(*args, **kwargs)
+                if items is not None:
+                    span["items"] = items(result, *args)
+            finally:
+                tracer.end(span)
+            return result
+        return wrapper
+    return decorate
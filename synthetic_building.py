@@ -0,0 +1,134 @@
+import argparse
+import os
+import random
+
+# Synthetic high-rise generator. Writes the five DSL inputs compiler.py reads
+# (WaterSystem, Floor_Templates, Template_Application, Demand_Profiles,
+# Sensors) for a building laid out like data/v2:
+#
+#   MunicipalMain -> BasementSump -pump-> Zone1Tank -pump-> ... -> RoofTank
+#   ZoneNTank -> ZoneN_Riser -> FloorX_Inlet -> template (Riser + fixtures)
+#
+# Floors are split evenly over the zones; each zone's tank feeds its floors
+# by gravity and the pump chain lifts water zone to zone. With loops, each
+# floor inlet is also piped to the next one in its zone (a ring main), so
+# every inlet but the first has two feeds.
+
+DEMAND_CHOICES = (50.0, 100.0, 150.0, 250.0)
+
+def nodes_per_floor(fixtures):
+    """Inlet + template riser + fixtures."""
+    return fixtures + 2
+
+def floors_for_nodes(n_nodes, zones=4, fixtures=8):
+    """Floor count whose building has about n_nodes nodes."""
+    fixed = 2 + 3 * zones # source, sump, and a tank, pump and riser per zone
+    return max(zones, round((n_nodes - fixed) / nodes_per_floor(fixtures)))
+
+def zone_tank(z, zones):
+    return "RoofTank" if z == zones else f"Zone{z}Tank"
+
+def write_building(directory, floors, zones=4, fixtures=8, templates=3, loops=False, seed=0):
+    """
+    Writes the DSL files into `directory`. Returns a summary dict with the
+    node and edge counts the compiled graph will have.
+    """
+    if zones < 1 or floors < zones:
+        raise ValueError(f"Need at least one floor per zone (floors={floors}, zones={zones})")
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    edges = 0
+
+    def write(name, lines):
+        with open(os.path.join(directory, name), "w") as f:
+            f.write("\n".join(lines))
+            f.write("\n")
+
+    # Floor templates: same shape, different names, so apply order matters
+    template_names = [f"Floor{k}Fixtures" for k in range(1, templates + 1)]
+    lines = []
+    for name in template_names:
+        lines.append(f"Template {name}")
+        lines.append("Node Riser")
+        for j in range(1, fixtures + 1):
+            lines.append(f"Node Apt{j}")
+            lines.append(f"Edge Riser Apt{j}")
+        lines.append("EndTemplate")
+        lines.append("")
+    write("Floor_Templates.txt", lines)
+
+    # Which zone each floor belongs to (floor 1 is the bottom)
+    bounds = [round(floors * z / zones) for z in range(zones + 1)]
+    zone_floors = [range(bounds[z] + 1, bounds[z + 1] + 1) for z in range(zones)]
+
+    lines = ["Source MunicipalMain", "Tank BasementSump", "Pipe MunicipalMain BasementSump"]
+    edges += 1
+    supply = "BasementSump"
+    for z in range(1, zones + 1):
+        tank = zone_tank(z, zones)
+        lines.append(f"Tank {tank}")
+        lines.append(f"Pump Pump{z} {supply} {tank}")
+        lines.append(f"Pipe {tank} Zone{z}_Riser")
+        edges += 3
+        for i in zone_floors[z - 1]:
+            lines.append(f"Pipe Zone{z}_Riser Floor{i}_Inlet")
+            edges += 1
+        if loops:
+            for i in zone_floors[z - 1][:-1]:
+                lines.append(f"Pipe Floor{i}_Inlet Floor{i + 1}_Inlet")
+                edges += 1
+        supply = tank
+    write("WaterSystem.txt", lines)
+
+    lines = [f"Apply {template_names[(i - 1) % templates]} Floor{i}_Inlet" for i in range(1, floors + 1)]
+    edges += floors * (fixtures + 1)
+    write("Template_Application.txt", lines)
+
+    lines = []
+    for i in range(1, floors + 1):
+        for j in range(1, fixtures + 1):
+            lines.append(f"Demand Floor{i}_Inlet.Apt{j} {rng.choice(DEMAND_CHOICES):g}")
+    write("Demand_Profiles.txt", lines)
+
+    lines = ["Sensor MunicipalMain Flow", "Sensor BasementSump Level"]
+    for z in range(1, zones + 1):
+        lines.append(f"Sensor {zone_tank(z, zones)} Level")
+        lines.append(f"Sensor Pump{z} Flow")
+        lines.append(f"Sensor Zone{z}_Riser Flow")
+        # Critical pressures at the top and bottom of each zone
+        lines.append(f"Sensor Floor{zone_floors[z - 1][0]}_Inlet Pressure")
+        if len(zone_floors[z - 1]) > 1:
+            lines.append(f"Sensor Floor{zone_floors[z - 1][-1]}_Inlet Pressure")
+    write("Sensors.txt", lines)
+
+    return {
+        "floors": floors,
+        "zones": zones,
+        "fixtures": fixtures,
+        "templates": templates,
+        "loops": loops,
+        "nodes": 2 + 3 * zones + floors * nodes_per_floor(fixtures),
+        "edges": edges,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write DSL inputs for a synthetic high-rise")
+    parser.add_argument("directory", help="Output directory, e.g. data/synthetic")
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--floors", type=int)
+    size.add_argument("--nodes", type=int, help="Approximate node count (sets --floors)")
+    parser.add_argument("--zones", type=int, default=4, help="Pressure zones (break tanks)")
+    parser.add_argument("--fixtures", type=int, default=8, help="Fixtures per floor template")
+    parser.add_argument("--templates", type=int, default=3, help="Distinct floor templates")
+    parser.add_argument("--loops", action="store_true", help="Ring main between floor inlets of each zone")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    floors = args.floors or floors_for_nodes(args.nodes, args.zones, args.fixtures)
+    summary = write_building(args.directory, floors, args.zones, args.fixtures, args.templates,
+                             args.loops, args.seed)
+    print(f"Wrote {args.directory}: {summary['floors']} floors, {summary['zones']} zones, "
+          f"{summary['nodes']} nodes, {summary['edges']} edges")
+
+if __name__ == "__main__":
+    main()
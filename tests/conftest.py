@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+V1_GRAPH = os.path.join(REPO_ROOT, "build", "v1", "graph.pkl")
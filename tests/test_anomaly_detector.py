@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import anomaly_detector
+import generate_data
+from conftest import REPO_ROOT, V1_GRAPH
+
+@pytest.fixture(scope="module")
+def week(tmp_path_factory):
+    """Seven days of 15-minute data from the v1 building, with the daily leak and misuse scenarios."""
+    directory = tmp_path_factory.mktemp("week")
+    generate_data.main([str(directory), "--graph", V1_GRAPH, "--duration-hours", "168", "--format", "csv", "--seed", "1"])
+    with open(directory / "labels.json") as f:
+        labels = json.load(f)
+    return directory, labels
+
+def run(directory, labels, stem, anomaly_type, fixtures=None):
+    alerts, _ = anomaly_detector.detect_file(str(directory / f"{stem}.csv"), fixtures=fixtures)
+    return anomaly_detector.score(alerts, anomaly_detector.expected_labels(labels, anomaly_type))
+
+def v1_fixtures():
+    nodes, base_demand, _, _ = generate_data.graph_adjacency(generate_data.load_graph(V1_GRAPH))
+    return [n for n, d in zip(nodes, base_demand.tolist()) if d > 0]
+
+def test_ai_data_fixture_scores_perfectly():
+    directory = os.path.join(REPO_ROOT, "ai_data", "v1")
+    with open(os.path.join(directory, "labels.json")) as f:
+        labels = json.load(f)
+    for stem, anomaly_type in (("normal", None), ("leak_scenarios", "Leak"), ("misuse_scenarios", "Misuse")):
+        alerts, _ = anomaly_detector.detect_file(os.path.join(directory, f"{stem}.csv"))
+        s = anomaly_detector.score(alerts, anomaly_detector.expected_labels(labels, anomaly_type))
+        assert (s["precision"], s["recall"]) == (1.0, 1.0), stem
+
+def test_graph_that_names_no_channel_is_ignored(capsys):
+    directory = os.path.join(REPO_ROOT, "ai_data", "v1")
+    with open(os.path.join(directory, "labels.json")) as f:
+        labels = json.load(f)
+    fixtures = v1_fixtures()
+    graph_nodes = set(generate_data.graph_adjacency(generate_data.load_graph(V1_GRAPH))[0])
+    alerts, _ = anomaly_detector.detect_file(os.path.join(directory, "misuse_scenarios.csv"), graph_nodes, fixtures=fixtures)
+    assert "names a graph node" in capsys.readouterr().out
+    s = anomaly_detector.score(alerts, anomaly_detector.expected_labels(labels, "Misuse"))
+    assert (s["precision"], s["recall"]) == (1.0, 1.0)
+
+@pytest.mark.parametrize("fixtures", [False, True])
+def test_daily_leak_keeps_alerting(week, fixtures):
+    directory, labels = week
+    s = run(directory, labels, "leak_scenarios", "Leak", v1_fixtures() if fixtures else None)
+    # The leak recurs 10:00-14:00 every day; every day's window must alert
+    assert s["windows"] == 7
+    assert s["windows_detected"] == 7
+    assert s["recall"] >= 0.95
+    assert s["precision"] >= 0.7
+    assert s["node_accuracy"] >= 0.95
+
+def test_daily_misuse_is_told_from_leaks(week):
+    directory, labels = week
+    s = run(directory, labels, "misuse_scenarios", "Misuse")
+    # Until enough normal rows show the flow hierarchy the first day may read as a leak
+    assert s["windows_detected"] >= 5
+    assert s["recall"] >= 0.7
+    assert run(directory, labels, "misuse_scenarios", "Misuse", v1_fixtures())["recall"] >= 0.95
+
+def test_normal_week_is_quiet(week):
+    directory, labels = week
+    alerts, rows = anomaly_detector.detect_file(str(directory / "normal.csv"))
+    # The tank's daily cycle can only be learned from the first day
+    assert len([a for a in alerts if a.timestamp[:10] != "2026-01-01"]) <= 0.02 * rows
+
+def test_row_by_row_catches_the_same_anomalies(week):
+    directory, labels = week
+    path = str(directory / "leak_scenarios.csv")
+    expected = anomaly_detector.expected_labels(labels, "Leak")
+    detector, single = None, []
+    for columns, timestamps, values in anomaly_detector.read_batches(path):
+        detector = detector or anomaly_detector.StreamingDetector(columns)
+        single.extend(a for t, x in zip(timestamps, values) if (a := detector.update(t, x)))
+    batched, _ = anomaly_detector.detect_file(path)
+    caught = [{(a.timestamp, a.node_id) for a in alerts if a.timestamp in expected} for alerts in (single, batched)]
+    assert caught[0] == caught[1]
+    assert len(caught[0]) == len(expected)
+
+def test_score_reports_each_window():
+    expected = {f"2026-01-0{d}T10:{m:02d}:00": {"anomaly_type": "Leak", "node_id": "A"} for d in (1, 2) for m in (0, 15, 30)}
+    alerts = [anomaly_detector.Alert("2026-01-01T10:15:00", "A", "Leak", 6.0),
+              anomaly_detector.Alert("2026-01-02T10:30:00", "A", "Leak", 6.0)]
+    s = anomaly_detector.score(alerts, expected, interval_minutes=15)
+    assert (s["windows"], s["windows_detected"]) == (2, 2)
+    assert s["detection_delay_minutes"] == 22.5
+    assert s["max_detection_delay_minutes"] == 30
@@ -0,0 +1,76 @@
+import os
+import shutil
+
+import pytest
+
+import compiler
+from conftest import REPO_ROOT
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A scratch checkout of data/v1 with an empty build/ (the compiler works relative to the cwd)."""
+    shutil.copytree(os.path.join(REPO_ROOT, "data", "v1"), tmp_path / "data" / "v1")
+    (tmp_path / "build").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_rebuilds_drop_the_other_representation(workdir):
+    build = workdir / "build" / "v1"
+    assert compiler.compile_version("v1") == "full"
+    assert {"graph.pkl", "graph_arrays", compiler.CACHE_DIRNAME} <= set(os.listdir(build))
+
+    assert compiler.compile_version("v1", instanced=True) == "instanced"
+    names = set(os.listdir(build))
+    assert "graph_instanced" in names
+    assert not names & {"graph.pkl", "graph_arrays", compiler.MANIFEST_NAME}
+
+    assert compiler.compile_version("v1") == "full"
+    assert "graph_instanced" not in os.listdir(build)
+
+def test_rebuilds_keep_files_the_compiler_does_not_own(workdir):
+    build = workdir / "build" / "v1"
+    assert compiler.compile_version("v1") == "full"
+    (build / "dummy.txt").write_text("kept")
+    (build / "graph.sensitivity").mkdir()
+    (build / "graph.sensitivity" / "part-0.csv").write_text("kept")
+
+    assert compiler.compile_version("v1", instanced=True) == "instanced"
+    assert compiler.compile_version("v1", use_cache=False) == "full"
+    assert (build / "dummy.txt").read_text() == "kept"
+    assert (build / "graph.sensitivity" / "part-0.csv").read_text() == "kept"
+
+def test_attribute_rebuild_keeps_the_topology_cache(workdir):
+    assert compiler.compile_version("v1") == "full"
+    with open(workdir / "data" / "v1" / "Sensors.txt", "a") as f:
+        f.write("\n")
+    assert compiler.compile_version("v1") == "attributes"
+    assert os.path.isdir(workdir / "build" / "v1" / compiler.CACHE_DIRNAME / "topology")
+    assert compiler.compile_version("v1") == "up-to-date"
+
+def test_attach_stages_trace_what_they_attached(workdir):
+    import stage_trace
+
+    with open(workdir / "data" / "v1" / "Sensors.txt", "a") as f:
+        f.write("Sensor NoSuchNode Flow\n")
+    stage_trace.start_tracing()
+    try:
+        compiler.compile_version("v1", use_cache=False)
+    finally:
+        tracer = stage_trace.stop_tracing()
+    items = {s["name"]: s.get("items") for s in tracer.spans}
+    assert items["attach_sensors"] == 4
+    assert items["attach_demands"] == 40
+    assert items["save_artifacts"] == 62
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_build_all_reports_shared_template_warnings(workdir, capsys, workers):
+    templates = workdir / "data" / "v1" / "Floor_Templates.txt"
+    with open(templates, "a") as f:
+        f.write("\nTemplate ResidentialFloor\nNode FloorInlet\nEndTemplate\n")
+    shutil.copytree(workdir / "data" / "v1", workdir / "data" / "v3")
+    results = compiler.build_all(["v1", "v3"], workers=workers)
+    assert {v: r for v, (r, _) in results.items()} == {"v1": "full", "v3": "full"}
+    out = capsys.readouterr().out
+    warnings = [line for line in out.splitlines() if "redefined" in line]
+    assert sorted(line.split(":")[0] for line in warnings) == \
+        ["data/v1/Floor_Templates.txt", "data/v3/Floor_Templates.txt"]
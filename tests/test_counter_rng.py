@@ -0,0 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from counter_rng import NODE_BLOCK, CounterNoise
+
+def _draw(args):
+    seed, scenario, lo, n, nodes = args
+    return CounterNoise(seed, scenario).uniform(lo, n, nodes)
+
+def test_any_piece_matches_the_whole_field():
+    noise = CounterNoise(42, scenario=3)
+    nodes = np.arange(2 * NODE_BLOCK + 100)
+    whole = noise.uniform(0, 50, nodes)
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        lo, hi = sorted(rng.choice(51, 2, replace=False))
+        subset = rng.permutation(nodes)[:300]
+        assert np.array_equal(noise.uniform(lo, hi - lo, subset), whole[lo:hi, subset])
+    assert not np.array_equal(CounterNoise(42, scenario=4).uniform(0, 50, nodes), whole)
+
+def test_processes_match_serial():
+    nodes = np.arange(0, 3 * NODE_BLOCK, 7)
+    tasks = [(9, 1, lo, 16, nodes) for lo in range(0, 64, 16)]
+    serial = np.vstack([_draw(t) for t in tasks])
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        parallel = np.vstack(list(pool.map(_draw, tasks)))
+    assert np.array_equal(serial, parallel)
+    assert np.array_equal(serial, CounterNoise(9, 1).uniform(0, 64, nodes))
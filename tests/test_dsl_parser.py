@@ -0,0 +1,30 @@
+import pytest
+
+import compiler
+import dsl_parser
+
+def test_records_are_named_tuples():
+    result = dsl_parser.parse_text("Source Main\nPipe Main Tank1\nPump P1 Tank1 Roof\n")
+    assert result.network == [
+        dsl_parser.SourceDecl("Main", 1),
+        dsl_parser.PipeDecl("Main", "Tank1", 2),
+        dsl_parser.PumpDecl("P1", "Tank1", "Roof", 3),
+    ]
+    assert result.network[1].dst == "Tank1"
+
+def test_directive_in_wrong_file_is_an_error():
+    result = dsl_parser.parse_text("Sensor Main Flow\nPipe Main Tank1\n", "data/v1/Sensors.txt")
+    assert [str(d) for d in result.errors] == [
+        "data/v1/Sensors.txt:2: error: 'Pipe' does not belong in Sensors.txt (expected Sensor)"]
+    assert result.network == []
+    assert result.sensors == [dsl_parser.SensorDecl("Main", "Flow", 1)]
+
+def test_compile_fails_on_misplaced_directive(tmp_path, monkeypatch, capsys):
+    data = tmp_path / "data" / "v9"
+    data.mkdir(parents=True)
+    (data / "WaterSystem.txt").write_text("Source Main\nPipe Main Floor1\n")
+    (data / "Sensors.txt").write_text("Sensor Main Flow\nPipe Floor1 Floor2\n")
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(dsl_parser.DSLError):
+        compiler.compile_version("v9")
+    assert "data/v9/Sensors.txt:2: error: 'Pipe' does not belong in Sensors.txt" in capsys.readouterr().out
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import generate_data
+from conftest import V1_GRAPH
+from counter_rng import CounterNoise
+
+SCENARIOS = [(None, None), ("Leak", "Floor5_Junction"), ("Misuse", "Floor1_Junction.Apt1")]
+
+@pytest.fixture(scope="module")
+def graph():
+    G = generate_data.load_graph(str(V1_GRAPH))
+    return G, generate_data.CompiledNetwork(G)
+
+def _timestamps(n=24, minutes=60):
+    return generate_data.make_timestamps(generate_data.START_TIME, n * minutes / 60, minutes)
+
+@pytest.mark.parametrize("anomaly_type, anomaly_node", SCENARIOS)
+def test_vectorized_step_matches_dict_engine(graph, anomaly_type, anomaly_node):
+    G, net = graph
+    noise = CounterNoise(11, scenario=2)
+    for step, ts in enumerate(_timestamps().astype("datetime64[s]").tolist()):
+        expected = generate_data.simulate_step(G, ts, anomaly_type, anomaly_node, noise, step)
+        row = generate_data.simulate_step_vectorized(net, ts, anomaly_type, anomaly_node, noise, step)
+        assert row == expected, step
+
+@pytest.mark.parametrize("anomaly_type, anomaly_node", SCENARIOS)
+def test_batch_matches_per_step_engine(graph, anomaly_type, anomaly_node):
+    _, net = graph
+    timestamps = _timestamps(48, 30)
+    steps = timestamps.astype("datetime64[s]").tolist()
+    noise = CounterNoise(11, scenario=2)
+    expected = [generate_data.simulate_step_arrays(net, ts, anomaly_type, anomaly_node, noise, step)
+                for step, ts in enumerate(steps)]
+    pressure = np.array([p for p, _ in expected])
+    flow = np.array([q for _, q in expected])
+
+    whole = generate_data.simulate_batch(net, timestamps, anomaly_type, anomaly_node, rng=noise)
+    np.testing.assert_allclose(whole[0], pressure, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(whole[1], flow, rtol=0, atol=1e-9)
+
+    # Split at an uneven offset, each part keyed by its first global step
+    split = 17
+    parts = [generate_data.simulate_batch(net, timestamps[lo:hi], anomaly_type, anomaly_node, rng=noise,
+                                          step_offset=lo)
+             for lo, hi in ((0, split), (split, len(timestamps)))]
+    assert np.array_equal(np.vstack([p for p, _ in parts]), whole[0])
+    assert np.array_equal(np.vstack([q for _, q in parts]), whole[1])
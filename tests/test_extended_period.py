@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import numpy as np
+
+import extended_period
+import generate_data
+import zone_sim
+from conftest import V1_GRAPH
+
+def _model():
+    return extended_period.ExtendedPeriodModel(zone_sim.ZonePartition(generate_data.load_graph(str(V1_GRAPH))))
+
+def test_tank_flow_is_outflow_and_levels_balance():
+    model = _model()
+    result = model.run(generate_data.START_TIME, 48)
+    (tank,) = result.tanks
+    assert result.inflows[:, 0].max() > 0 # the fill valve runs at some point
+    # A tank reports what it passes on (its zone's draw), like the steady-state engines
+    np.testing.assert_allclose(result.flows[:, tank], model.base_demand[tank] * np.array([
+        extended_period.demand_factor(int(round(t / 3600, 6) % 24)) for t in result.times[:-1]]))
+    to_rate = 1.0 / (1000.0 * extended_period.TANK_AREA * 3600.0)
+    expected = (result.inflows[:, 0] - result.flows[:, tank]) * np.diff(result.times) * to_rate
+    np.testing.assert_allclose(np.diff(result.levels[:, 0]), expected, atol=1e-9)
+
+def test_anomaly_window_past_midnight():
+    model = _model()
+    node = "Floor1_Junction.Apt1"
+    base = model.run(generate_data.START_TIME, 24)
+    wrapped = model.run(generate_data.START_TIME, 24, "Misuse", node, (22, 2))
+    (tank,) = base.tanks
+    # Mid-hour samples, away from step boundaries
+    timestamps = generate_data.make_timestamps(generate_data.START_TIME + timedelta(minutes=30), 23, 60)
+    extra = wrapped.boundary_flows(timestamps)[tank] - base.boundary_flows(timestamps)[tank]
+    hours = generate_data.timestamp_hours(timestamps)
+    assert (extra[(hours >= 22) | (hours < 2)] > 0).all()
+    assert (extra[(hours >= 2) & (hours < 22)] == 0).all()
+
+def test_in_window_wraps():
+    hours = np.arange(24)
+    assert np.flatnonzero(generate_data.in_window(hours, 22, 2)).tolist() == [0, 1, 22, 23]
+    assert np.flatnonzero(generate_data.in_window(hours, 10, 14)).tolist() == [10, 11, 12, 13]
+    assert generate_data.in_window(23.5, 22, 2)
+
+def test_empty_tank_passes_on_only_its_inflow():
+    model = _model()
+    # A fill valve too small for the building's demand: the tank drains to empty
+    model.feeder_capacity[:] = 1000.0
+    result = model.run(generate_data.START_TIME, 72)
+    (tank,) = result.tanks
+    empty = np.isclose(result.levels[:-1, 0], extended_period.TANK_MIN_LEVEL)
+    assert empty.any()
+    assert any(message.endswith("empty") for _, message in result.events)
+    np.testing.assert_allclose(result.flows[empty, tank], result.inflows[empty, 0])
+    assert (result.flows[empty, tank] < model.base_demand[tank]).all()
+    # Levels never fall below empty and still balance inflow against outflow
+    assert result.levels.min() >= extended_period.TANK_MIN_LEVEL
+    to_rate = 1.0 / (1000.0 * extended_period.TANK_AREA * 3600.0)
+    expected = (result.inflows[:, 0] - result.flows[:, tank]) * np.diff(result.times) * to_rate
+    np.testing.assert_allclose(np.diff(result.levels[:, 0]), expected, atol=1e-9)
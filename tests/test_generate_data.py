@@ -0,0 +1,59 @@
+import csv
+import shutil
+
+import numpy as np
+import pytest
+
+import generate_data
+from conftest import V1_GRAPH
+
+def test_missing_artifact_falls_back_to_graph_pkl(tmp_path):
+    shutil.copy(V1_GRAPH, tmp_path / "graph.pkl")
+    G = generate_data.load_graph(str(tmp_path / "graph_arrays"))
+    assert G.number_of_nodes() == 62
+    with pytest.raises(FileNotFoundError, match="compiler.py"):
+        generate_data.load_graph(str(tmp_path / "missing" / "graph_arrays"))
+
+def test_stream_writer_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        generate_data.StreamWriter(tmp_path / "out.csv", ["a"])
+
+@pytest.mark.parametrize("engine", ["batch", "zones"])
+def test_output_does_not_depend_on_chunk_size_or_workers(tmp_path, engine):
+    outputs = []
+    for chunk_steps, workers in ((7, 1), (96, 2)):
+        out = tmp_path / f"{chunk_steps}"
+        out.mkdir()
+        generate_data.main([str(out), "--graph", str(V1_GRAPH), "--engine", engine, "--seed", "5",
+                            "--chunk-steps", str(chunk_steps), "--workers", str(workers)])
+        outputs.append(out)
+    for name in ("normal.csv", "leak_scenarios.csv", "misuse_scenarios.csv", "labels.json"):
+        assert (outputs[0] / name).read_bytes() == (outputs[1] / name).read_bytes()
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    return rows[0], [r[0] for r in rows[1:]], np.array([r[1:] for r in rows[1:]], dtype=np.float64)
+
+@pytest.mark.parametrize("engine", ["batch", "zones"])
+def test_sensors_only_matches_full_output(tmp_path, engine):
+    full, sensors = tmp_path / "full", tmp_path / "sensors"
+    for out, extra in ((full, []), (sensors, ["--sensors-only"])):
+        out.mkdir()
+        generate_data.main([str(out), "--graph", str(V1_GRAPH), "--engine", engine, "--seed", "3",
+                            "--duration-hours", "6"] + extra)
+    G = generate_data.load_graph(str(V1_GRAPH))
+    nodes = generate_data.graph_adjacency(G)[0]
+    channels = generate_data.sensor_channels(nodes, generate_data.node_sensors(G))
+    assert channels
+    for name in ("normal.csv", "leak_scenarios.csv", "misuse_scenarios.csv"):
+        header, times, values = _read_csv(full / name)
+        s_header, s_times, s_values = _read_csv(sensors / name)
+        assert s_header[1:] == [c for c, _, _ in channels]
+        assert s_times == times
+        for k, (column, i, quantity) in enumerate(channels):
+            if quantity == "level":
+                expected = values[:, header.index(f"{nodes[i]}_pressure") - 1] / 9.81
+                np.testing.assert_allclose(s_values[:, k], expected, atol=0.01)
+            else:
+                assert np.array_equal(s_values[:, k], values[:, header.index(column) - 1]), column
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import pickle
+import shutil
+
+import pytest
+
+import graph_service
+from graph_artifact import ARTIFACT_DIRNAME, save_graph_arrays
+from conftest import V1_GRAPH
+
+@pytest.fixture(scope="module")
+def build_dir(tmp_path_factory):
+    build = tmp_path_factory.mktemp("build")
+    with open(V1_GRAPH, "rb") as f:
+        save_graph_arrays(pickle.load(f), build / "v1" / ARTIFACT_DIRNAME)
+    return build
+
+def exchange(service, lines):
+    """Replies to newline-delimited requests sent over one connection."""
+    async def run():
+        server = await asyncio.start_server(service.handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for line in lines:
+            writer.write(line.encode("utf-8") + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return replies
+    return asyncio.run(run())
+
+def test_bad_requests_get_an_error_reply_and_keep_the_connection(build_dir):
+    service = graph_service.GraphService(str(build_dir), workers=1)
+    service.refresh()
+    replies = exchange(service, [
+        '{"op": "simulate", "version": "v1", "interval_minutes": 0}',
+        '{"op": "simulate", "version": "v1", "hours": -1}',
+        '{"op": "simulate", "version": "v1", "hours": "24"}',
+        '["op", "ping"]',
+        'not json',
+        '{"op": "ping"}',
+        '{"op": "simulate", "version": "v1", "hours": 1, "nodes": ["RoofTank"]}',
+    ])
+    assert [r["ok"] for r in replies] == [False, False, False, False, False, True, True]
+    assert "interval_minutes" in replies[0]["error"]
+    assert replies[5]["result"] == "pong"
+    assert replies[6]["result"]["columns"] == ["RoofTank_pressure", "RoofTank_flow"]
+
+def test_builds_without_an_array_artifact_serve_their_pickle(tmp_path, capsys):
+    (tmp_path / "v1").mkdir()
+    shutil.copy(V1_GRAPH, tmp_path / "v1" / "graph.pkl")
+    (tmp_path / "v2").mkdir()
+    (tmp_path / "v2" / "graph.pkl").write_bytes(b"not a pickle")
+    (tmp_path / "v3").mkdir()
+    service = graph_service.GraphService(str(tmp_path), workers=1)
+    assert service.refresh() == ["v1"]
+    out = capsys.readouterr().out
+    assert "could not load v2" in out and "skipping v3" in out
+    assert service.refresh() == []
+    assert capsys.readouterr().out == "" # each problem is reported once
+
+    with open(V1_GRAPH, "rb") as f:
+        G = pickle.load(f)
+    node = service.versions["v1"].node("RoofTank")
+    assert node["attributes"] == G.nodes["RoofTank"]
+    assert node["successors"] == list(G.successors("RoofTank"))
+
+def test_watch_reloads_a_version_whose_artifact_is_rewritten(tmp_path):
+    with open(V1_GRAPH, "rb") as f:
+        save_graph_arrays(pickle.load(f), tmp_path / "v1" / ARTIFACT_DIRNAME)
+    service = graph_service.GraphService(str(tmp_path), poll_seconds=0.01, workers=1)
+    service.refresh()
+    before = service.versions["v1"]
+
+    meta = tmp_path / "v1" / ARTIFACT_DIRNAME / "meta.json"
+    meta.write_text(meta.read_text())
+    os.utime(meta, ns=(before.stamp[0] + 10**9, before.stamp[0] + 10**9))
+
+    async def run():
+        watcher = asyncio.create_task(service.watch())
+        try:
+            for _ in range(500):
+                versions = await service.handle_request({"op": "versions"})
+                if service.versions["v1"] is not before:
+                    return versions
+                await asyncio.sleep(0.01)
+        finally:
+            watcher.cancel()
+    assert asyncio.run(run()) is not None
+    assert service.versions["v1"].stamp != before.stamp
@@ -0,0 +1,19 @@
+import networkx as nx
+
+from instanced_graph import InstancedGraph
+
+def test_lookup_with_dotted_attach_and_local_names():
+    base = nx.DiGraph()
+    base.add_edge("Main", "Zone.A")
+    base.add_edge("Main", "Zone")
+    graph = InstancedGraph(base)
+    graph.add_prototype("Floor", ["Riser", "Apt.1", "B.Tap"], [("Riser", "Apt.1"), ("Riser", "B.Tap")])
+    graph.add_instance("Floor", "Zone.A")
+    graph.add_instance("Floor", "Zone")
+
+    for gid in range(graph.number_of_nodes()):
+        assert graph.lookup(graph.name(gid)) == gid
+    assert graph.name(graph.lookup("Zone.A.Apt.1")) == "Zone.A.Apt.1"
+    assert "Zone.A.Riser" in graph.nodes
+    assert graph.name(graph.lookup("Zone.B.Tap")) == "Zone.B.Tap"
+    assert graph.lookup("Zone.B.Riser") is None
@@ -0,0 +1,52 @@
+import networkx as nx
+import numpy as np
+
+import generate_data
+import hydraulic_solver
+from conftest import V1_GRAPH
+
+def solve(net, timestamps, solver, **anomaly):
+    rng = generate_data.CounterNoise(7)
+    return generate_data.solve_batch(net, timestamps, rng=rng, solver=solver, **anomaly)
+
+def test_looped_matches_tree_on_a_tree():
+    net = generate_data.CompiledNetwork(generate_data.load_graph(V1_GRAPH), "RoofTank")
+    timestamps = generate_data.make_timestamps(generate_data.START_TIME, 24, 60)
+    active = np.zeros(len(timestamps), dtype=bool)
+    active[10:14] = True
+    for anomaly in ({}, dict(anomaly_type="Leak", anomaly_node="Floor5_Junction", active=active),
+                    dict(anomaly_type="Misuse", anomaly_node="Floor1_Junction.Apt1", active=active)):
+        tree = solve(net, timestamps, "tree", **anomaly)
+        looped = solve(net, timestamps, "looped", **anomaly)
+        for a, b in zip(tree, looped):
+            np.testing.assert_allclose(b, a, rtol=1e-6, atol=1e-3)
+
+def looped_building(floors, fixtures=8):
+    """Gravity-fed building whose floor inlets form a ring main, built directly as a graph."""
+    G = nx.DiGraph()
+    G.add_node("RoofTank", type="Tank")
+    G.add_edge("RoofTank", "Riser", type="Pipe")
+    for i in range(floors):
+        inlet = f"Floor{i}_Inlet"
+        G.add_edge("Riser", inlet, type="Pipe")
+        if i:
+            G.add_edge(f"Floor{i - 1}_Inlet", inlet, type="Pipe")
+        for j in range(fixtures):
+            G.add_node(f"{inlet}.Apt{j}", demand=float(50 + 50 * ((i + j) % 4)))
+            G.add_edge(inlet, f"{inlet}.Apt{j}", type="TemplateConnection")
+    return G
+
+def test_100k_node_looped_building_converges():
+    G = looped_building(11_111)
+    assert G.number_of_nodes() > 100_000
+    net = generate_data.CompiledNetwork(G, "RoofTank")
+    assert not net.is_tree
+    timestamps = generate_data.make_timestamps(generate_data.START_TIME, 2, 60)
+    withdrawal, head = generate_data.demand_factor(np.array([8.0]))[0] * net.base_demand, 5.0 * 9.81
+    _, q, iterations = net.looped_system().solve(np.where(net.reachable, withdrawal, 0.0), np.atleast_1d(head))
+    assert iterations < hydraulic_solver.MAX_ITERATIONS
+    # Mass balance: the tank supplies every withdrawal
+    pressure, flow, subtree = solve(net, timestamps, "looped", anomaly_type="Leak", anomaly_node="Floor500_Inlet")
+    assert np.isfinite(pressure).all()
+    expected = (net.base_demand.sum() * generate_data.demand_factor(generate_data.timestamp_hours(timestamps)))
+    np.testing.assert_allclose(subtree[:, net.tank], expected + generate_data.LEAK_FLOW, rtol=0.01)
@@ -0,0 +1,20 @@
+import json
+
+import scenario_sweep
+from conftest import V1_GRAPH
+
+def test_chunked_sweep_matches_single_chunk(tmp_path):
+    spec = tmp_path / "spec.json"
+    spec.write_text(json.dumps({
+        "graph": str(V1_GRAPH),
+        "duration_hours": 24,
+        "interval_minutes": 15,
+        "seed": 7,
+        "scenarios": [{"anomaly_type": "Leak", "nodes": ["Floor5_Junction"], "windows": [[10, 14]]}],
+    }))
+    whole, chunked = tmp_path / "whole", tmp_path / "chunked"
+    scenario_sweep.run_sweep(str(spec), whole, workers=1, chunk_steps=1000)
+    manifest = scenario_sweep.run_sweep(str(spec), chunked, workers=1, chunk_steps=7)
+    for entry in manifest:
+        assert (chunked / entry["file"]).read_text() == (whole / entry["file"]).read_text()
+    assert (chunked / "labels.json").read_text() == (whole / "labels.json").read_text()
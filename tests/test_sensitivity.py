@@ -0,0 +1,39 @@
+import networkx as nx
+import numpy as np
+
+import generate_data
+import sensitivity
+from conftest import V1_GRAPH
+
+def jacobians(G):
+    net = generate_data.CompiledNetwork(G, "RoofTank")
+    channels = generate_data.sensor_channels(net.nodes, generate_data.node_sensors(G))
+    tree, _ = sensitivity.compute_jacobian(net, channels, solver="tree")
+    looped, _ = sensitivity.compute_jacobian(net, channels, solver="looped")
+    return net, channels, tree, looped
+
+def test_tree_and_looped_agree_on_v1():
+    _, _, tree, looped = jacobians(generate_data.load_graph(V1_GRAPH))
+    np.testing.assert_allclose(looped, tree, atol=1e-6)
+
+def test_zero_flow_branch_is_oriented_by_edge_direction():
+    # A riser feeding floors that draw nothing at the operating point: its
+    # edge flows are roundoff, but extra demand below still passes the meter
+    G = nx.DiGraph()
+    G.add_node("RoofTank", type="Tank", sensor="Level")
+    G.add_node("Riser", sensor="Flow")
+    G.add_edge("RoofTank", "Riser", type="Pipe")
+    G.add_node("Busy", demand=5.0)
+    G.add_edge("RoofTank", "Busy", type="Pipe")
+    previous = "Riser"
+    for k in range(3):
+        G.add_node(f"Floor{k}", demand=0.0, sensor="Pressure")
+        G.add_edge(previous, f"Floor{k}", type="Pipe")
+        previous = f"Floor{k}"
+    net, channels, tree, looped = jacobians(G)
+    k = [c for c, _, _ in channels].index("Riser_flow")
+    floors = [net.nodes.index(f"Floor{k}") for k in range(3)]
+    np.testing.assert_allclose(looped[k, floors], 1.0)
+    # Pressures differ by the looped solver's MIN_FLOW regularization at zero flow
+    flows = [k for k, (_, _, quantity) in enumerate(channels) if quantity == "flow"]
+    np.testing.assert_allclose(looped[flows], tree[flows], atol=1e-9)
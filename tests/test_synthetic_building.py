@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import benchmark
+import compiler
+import synthetic_building
+import validation_agent
+from graph_artifact import load_graph_arrays
+
+@pytest.mark.parametrize("loops", [False, True])
+def test_written_building_compiles_and_validates(tmp_path, monkeypatch, loops):
+    summary = synthetic_building.write_building(tmp_path / "data" / "syn", floors=12, zones=3, fixtures=4,
+                                                templates=2, loops=loops, seed=1)
+    monkeypatch.chdir(tmp_path)
+    assert compiler.compile_version("syn", use_cache=False) == "full"
+
+    with open(tmp_path / "build" / "syn" / "graph_summary.json") as f:
+        built = json.load(f)
+    assert (built["nodes"], built["edges"]) == (summary["nodes"], summary["edges"])
+    assert built["sensors"] == 2 + 3 * 5
+
+    graph = load_graph_arrays(str(tmp_path / "build" / "syn" / "graph_arrays"))
+    engine = validation_agent.RuleEngine([rule() for rule in validation_agent.DEFAULT_RULES])
+    report = engine.run(graph)
+    assert report.hard_failures == []
+    assert {validation_agent.rule_name(r) for r in engine.rules} <= set(engine.timings_ms())
+
+def test_floors_for_nodes_hits_the_requested_size():
+    floors = synthetic_building.floors_for_nodes(1000, zones=4, fixtures=8)
+    nodes = 2 + 3 * 4 + floors * synthetic_building.nodes_per_floor(8)
+    assert abs(nodes - 1000) <= synthetic_building.nodes_per_floor(8)
+
+def test_benchmark_records_each_stage(capsys):
+    results = benchmark.run_benchmarks([200], ["compile", "validate"], zones=2)
+    assert [r["stage"] for r in results] == ["compile", "validate"]
+    assert all(r["seconds"] > 0 and r["items"] > 0 for r in results), results
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import numpy as np
+
+import timeseries_store
+from timeseries_store import SeriesWriter, open_store
+
+def _store(tmp_path, rows=500, channels=6):
+    columns = [f"c{j}" for j in range(channels)]
+    timestamps = np.datetime64("2026-01-01T00:00:00") + np.arange(rows) * np.timedelta64(60, "s")
+    values = np.round(np.random.default_rng(0).uniform(0, 100, (rows, channels)), 2)
+    path = tmp_path / f"data{timeseries_store.STORE_SUFFIX}"
+    with SeriesWriter(path, columns) as writer:
+        for lo in range(0, rows, 128):
+            writer.write(timestamps[lo:lo + 128], values[lo:lo + 128])
+    return open_store(path), timestamps, values.astype(np.float32)
+
+def test_contiguous_reads_are_views_of_the_mapped_file(tmp_path):
+    store, timestamps, values = _store(tmp_path)
+    assert isinstance(store.values, np.memmap)
+    start, end = datetime(2026, 1, 1, 1, 0), datetime(2026, 1, 1, 3, 0)
+    ts, v = store.read(start, end, ["c2", "c3", "c4"])
+    rows = slice(60, 180)
+    assert np.array_equal(ts, timestamps[rows].astype(np.int64))
+    assert np.array_equal(v, values[rows, 2:5])
+    assert np.shares_memory(v, store.values) and np.shares_memory(ts, store.timestamps)
+    channel = store.channel("c1", start, end)
+    assert np.shares_memory(channel, store.values)
+    assert np.array_equal(channel, values[rows, 1])
+
+def test_scattered_channels_are_gathered(tmp_path):
+    store, _, values = _store(tmp_path)
+    _, v = store.read(channels=["c5", "c0"])
+    assert not np.shares_memory(v, store.values)
+    assert np.array_equal(v, values[:, [5, 0]])
+    assert store.time_slice("2027-01-01T00:00:00") == slice(500, 500)
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+import training_loader
+from conftest import REPO_ROOT
+
+AI_DATA = os.path.join(REPO_ROOT, "ai_data", "v1")
+
+def test_batch_matches_the_windows_it_indexes():
+    sources = training_loader.ai_data_sources(AI_DATA)
+    dataset = training_loader.WindowDataset(sources, window=8, stride=3)
+    columns = dataset.columns[::2]
+    subset = training_loader.WindowDataset(sources, window=8, stride=3, channels=columns)
+    picked = [dataset.columns.index(c) for c in columns]
+    indices = np.random.default_rng(0).permutation(len(dataset))
+    full, part = dataset.batch(indices), subset.batch(indices)
+    for b, k in enumerate(indices.tolist()):
+        s, row = dataset.locate(k)
+        source = dataset.sources[s]
+        _, values, _ = training_loader.read_csv_source(source.path)
+        np.testing.assert_array_equal(full["x"][b], values[row:row + 8])
+        np.testing.assert_array_equal(part["x"][b], values[row:row + 8][:, picked])
+        rows_y, rows_node = dataset._labels[s]
+        np.testing.assert_array_equal(full["y"][b], rows_y[row:row + 8])
+        hits = np.flatnonzero(rows_y[row:row + 8])
+        assert full["node"][b] == (rows_node[row + hits[0]] if len(hits) else -1)
+        assert full["label"][b] == (rows_y[row + hits[0]] if len(hits) else 0)
+        assert full["start"][b] == source.timestamps[row]
+    assert full["label"].any()
+
+def test_overlapping_intervals():
+    intervals = training_loader.LabelIntervals(["a", "b", "c"], ["Leak", "Misuse", "Leak"],
+                                               [0, 100, 10], [500, 200, 20])
+    assert intervals.overlapping(150, 160).tolist() == [0, 2] # sorted by start: a, c, b
+    assert intervals.overlapping(20, 100).tolist() == [0]
+    assert intervals.overlapping(500, 600).tolist() == []
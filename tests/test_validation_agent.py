@@ -0,0 +1,64 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from validation_agent import GraphIndex, ReachabilityIndex
+
+def _random_network(seed, n=300, extra_edges=60, back_edges=0):
+    """Random supply tree from two sources, plus forward (and optionally backward) extra edges."""
+    rng = random.Random(seed)
+    G = nx.DiGraph()
+    G.add_node(0, type="Source")
+    G.add_node(1, type="Source")
+    for v in range(2, n):
+        G.add_node(v, type=rng.choice(["Junction", "Fixture", "Tank"]))
+        G.add_edge(rng.randrange(v), v, type=rng.choice(["Pipe", "Pipe", "Pipe", "Pump"]))
+    for _ in range(extra_edges):
+        u, v = sorted(rng.sample(range(2, n), 2))
+        G.add_edge(u, v, type="Pipe")
+    for _ in range(back_edges):
+        u, v = sorted(rng.sample(range(2, n), 2))
+        G.add_edge(v, u, type="Pipe")
+    G.add_nodes_from(range(n, n + 10), type="Junction") # islands, never reached
+    G.add_edge(n, n + 1, type="Pipe")
+    return G
+
+def _reach(G):
+    return ReachabilityIndex(GraphIndex.build(G))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("back_edges", [0, 8])
+def test_reachability_matches_networkx(seed, back_edges):
+    G = _random_network(seed, back_edges=back_edges)
+    reach = _reach(G)
+    nodes = list(G.nodes())
+    reached = {0, 1} | nx.descendants(G, 0) | nx.descendants(G, 1)
+    assert reach.is_reachable().tolist() == [n in reached for n in nodes]
+
+    rng = random.Random(seed)
+    for _ in range(500):
+        a, d = rng.randrange(len(nodes)), rng.randrange(len(nodes))
+        assert reach.reaches(a, d) == nx.has_path(G, nodes[a], nodes[d]), (a, d)
+
+    cycles = sorted(sorted(c) for c in nx.strongly_connected_components(G) if len(c) > 1)
+    assert sorted(reach.cycles) == cycles
+    assert reach.is_acyclic == (back_edges == 0 or not cycles)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_tree_intervals_and_pump_prefixes(seed):
+    G = _random_network(seed, extra_edges=0)
+    reach = _reach(G)
+    pumps = {(u, v) for u, v, t in G.edges(data="type") if t == "Pump"}
+    rng = random.Random(seed)
+    for _ in range(500):
+        a, d = rng.randrange(G.number_of_nodes()), rng.randrange(G.number_of_nodes())
+        ancestor = nx.has_path(G, a, d) and reach.is_reachable(d)
+        assert bool(reach.is_ancestor(a, d)) == ancestor
+        if ancestor:
+            path = nx.shortest_path(G, a, d)
+            assert reach.pumps_between(a, d) == sum((u, v) in pumps for u, v in zip(path, path[1:]))
+    # Vectorised form agrees with the scalar one
+    a = np.arange(G.number_of_nodes())
+    assert reach.is_ancestor(a, 5).tolist() == [bool(reach.is_ancestor(i, 5)) for i in a]
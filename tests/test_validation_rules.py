@@ -0,0 +1,118 @@
+import os
+import pickle
+import random
+import shutil
+
+import compiler
+import mock_data_generator
+import validation_agent
+from conftest import REPO_ROOT, V1_GRAPH
+from graph_artifact import load_graph_arrays, save_graph_arrays
+from validation_agent import CrossZoneFeedRule, ElevationConsistencyRule, ValidationResult
+
+# --- Per-edge reference rules (the pre-vectorization implementations) ---
+
+def baseline_cross_zone(graph):
+    results = []
+    for u, v in graph.edges():
+        zone_u, zone_v = graph.nodes[u].get("zone"), graph.nodes[v].get("zone")
+        if zone_u and zone_v and zone_u != zone_v:
+            results.append(ValidationResult("CROSS_ZONE_FEED", f"{zone_u}→{zone_v} ({u}→{v})",
+                                            f"Connection detected between different zones: {zone_u} and {zone_v}",
+                                            False))
+    return results
+
+def baseline_elevation(graph):
+    results = []
+    for u, v, data in graph.edges(data=True):
+        elev_u, elev_v = graph.nodes[u].get("elevation"), graph.nodes[v].get("elevation")
+        if elev_u is None or elev_v is None:
+            continue
+        diff = elev_v - elev_u
+        if data.get("type", "PIPE") not in validation_agent.PUMP_EDGE_TYPES:
+            if diff > 5.0:
+                results.append(ValidationResult("ELEVATION_CONSISTENCY", f"{u}→{v}",
+                                                f"Flow uphill ({diff}m) without pump.", True))
+        elif diff < -10.0:
+            results.append(ValidationResult("PUMP_FEASIBILITY", f"{u}→{v}",
+                                            f"Pump pushing water downhill ({diff}m). Potential energy waste "
+                                            f"or configuration error.", False))
+    return results
+
+def _key(results):
+    return [(r.rule_name, r.location, r.message, r.is_hard_failure) for r in results]
+
+def _with_attributes(G, seed):
+    """Copy of G with random zones and elevations on most nodes, so every rule branch fires."""
+    rng = random.Random(seed)
+    G = G.copy()
+    for _, data in G.nodes(data=True):
+        if rng.random() < 0.8:
+            data["zone"] = rng.choice(["ZONE_A", "ZONE_B", "ZONE_C"])
+        if rng.random() < 0.9:
+            data["elevation"] = round(rng.uniform(0, 60), 1)
+    return G
+
+def _graphs(tmp_path, monkeypatch):
+    mock = tmp_path / "mock.pkl"
+    mock_data_generator.generate_mock_graph(str(mock))
+    # v2 is compiled from its DSL inputs (the tracked build/v2/graph.pkl does not unpickle)
+    shutil.copytree(os.path.join(REPO_ROOT, "data", "v2"), tmp_path / "data" / "v2")
+    monkeypatch.chdir(tmp_path)
+    compiler.compile_version("v2", use_cache=False)
+    graphs = {"mock": str(mock), "v1": V1_GRAPH, "v2": str(tmp_path / "build" / "v2" / "graph.pkl")}
+    loaded = {}
+    for name, path in graphs.items():
+        with open(path, "rb") as f:
+            loaded[name] = pickle.load(f)
+    for seed, version in enumerate(("v1", "v2")):
+        loaded[f"{version}-attributes"] = _with_attributes(loaded[version], seed)
+    return loaded
+
+def test_vectorized_edge_rules_match_per_edge_baseline(tmp_path, monkeypatch):
+    fired = set()
+    for name, G in _graphs(tmp_path, monkeypatch).items():
+        arrays_dir = tmp_path / f"{name}_arrays"
+        save_graph_arrays(G, str(arrays_dir))
+        for graph in (G, load_graph_arrays(str(arrays_dir))):
+            for rule, baseline in ((CrossZoneFeedRule(), baseline_cross_zone),
+                                   (ElevationConsistencyRule(), baseline_elevation)):
+                expected = _key(baseline(G))
+                assert _key(rule.check(graph)) == expected, (name, rule.name)
+                fired |= {r[0] for r in expected}
+    assert fired == {"CROSS_ZONE_FEED", "ELEVATION_CONSISTENCY", "PUMP_FEASIBILITY"}
+
+def _edit(G, rng, step):
+    """One random node, edge or attribute edit."""
+    nodes = list(G.nodes())
+    kind = step % 6
+    if kind == 0:
+        new = f"Added{step}"
+        G.add_node(new, zone=rng.choice(["ZONE_A", "ZONE_B"]), elevation=rng.uniform(0, 60))
+        G.add_edge(rng.choice(nodes), new, type="Pipe")
+    elif kind == 1:
+        G.remove_edge(*rng.choice(list(G.edges())))
+    elif kind == 2:
+        G.remove_node(rng.choice(nodes))
+    elif kind == 3:
+        G.nodes[rng.choice(nodes)]["zone"] = rng.choice(["ZONE_A", "ZONE_B", "ZONE_C"])
+    elif kind == 4:
+        G.nodes[rng.choice(nodes)]["elevation"] = rng.uniform(0, 60)
+    else:
+        u, v = rng.sample(nodes, 2)
+        G.add_edge(u, v, type=rng.choice(["Pipe", "PUMP"]))
+
+def test_incremental_run_matches_full_run_after_edits(tmp_path):
+    with open(V1_GRAPH, "rb") as f:
+        G = _with_attributes(pickle.load(f), seed=3)
+    rules = lambda: [rule() for rule in validation_agent.DEFAULT_RULES]
+    incremental = validation_agent.RuleEngine(rules())
+    cache = str(tmp_path / "cache")
+    assert incremental.run_incremental(G, cache).to_json() == validation_agent.RuleEngine(rules()).run(G).to_json()
+
+    rng = random.Random(0)
+    for step in range(30):
+        _edit(G, rng, step)
+        full = validation_agent.RuleEngine(rules()).run(G).to_json()
+        assert incremental.run_incremental(G, cache).to_json() == full, step
+        assert incremental.reevaluated_edges < G.number_of_edges()
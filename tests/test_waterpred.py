@@ -0,0 +1,30 @@
+import sys
+
+import waterpred
+from conftest import REPO_ROOT
+
+def test_check_startup_passes_within_budget(capsys):
+    assert waterpred.check_startup(["--runs", "3"]) == 0
+    out = capsys.readouterr().out
+    assert "Start-up check passed" in out
+    for name in waterpred.COMMANDS:
+        assert f"{name} --help" in out
+
+def test_check_startup_fails_over_budget(capsys):
+    assert waterpred.check_startup(["--runs", "1", "--budget-ms", "0", "--command-budget-ms", "1e6"]) == 1
+    assert "Start-up check failed: --help" in capsys.readouterr().out
+
+def test_gen_commands_write_to_given_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", list(sys.argv)) # main() rewrites argv for argparse
+    for command in ("gen-all", "gen-local"):
+        out = tmp_path / command
+        waterpred.main([command, str(out)])
+        assert sorted(p.name for p in out.iterdir()) == [
+            "Demand_Profiles.txt", "Template_Application.txt", "WaterSystem.txt"]
+
+def test_inspect_defaults_to_the_shipped_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", list(sys.argv))
+    monkeypatch.chdir(REPO_ROOT)
+    out = tmp_path / "graph_details.txt"
+    waterpred.main(["inspect", str(out)])
+    assert "Nodes: 62" in out.read_text()
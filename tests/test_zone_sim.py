@@ -0,0 +1,18 @@
+import pytest
+
+import generate_data
+from conftest import V1_GRAPH
+from zone_sim import ZoneSimulator
+
+def test_unresolvable_exit_raises_instead_of_looping():
+    timestamps = generate_data.make_timestamps(generate_data.START_TIME, 2, 15)
+    with ZoneSimulator(generate_data.load_graph(str(V1_GRAPH)), workers=1) as sim:
+        pressure, _ = sim.simulate(timestamps)
+        assert pressure.shape == (len(timestamps), len(sim.nodes))
+
+        # An interior exit back into its own zone can never be resolved
+        zone = next(z for z in sim.partition.zones if len(z.members) > 1)
+        inner = next(int(m) for m in zone.members if m != zone.root)
+        zone.exits.append((inner, zone.root))
+        with pytest.raises(ValueError, match="never resolve"):
+            sim.simulate(timestamps)
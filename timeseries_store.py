@@ -0,0 +1,232 @@
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from graph_artifact import decode_strings, encode_strings
+
+# Memory-mapped time-series store: a directory of .npy files plus meta.json,
+# in the spirit of graph_artifact.py. Opening a store reads only meta.json
+# and maps the arrays; a read touches only the pages of the rows and
+# channels it asks for.
+#
+#   timestamps.npy              int64 epoch seconds per row, ascending
+#   values.npy                  float32 (channels, rows): each channel is
+#                               one contiguous run, so a time range of a
+#                               channel is a single slice of the file
+#   names_blob / names_offsets  UTF-8 channel-name string table
+#
+# Writers append row chunks to a scratch file (row-major, as simulated) and
+# transpose it into values.npy on close; meta.json is written last, so a
+# directory without one is an unfinished store.
+
+STORE_SUFFIX = ".series"
+FORMAT_VERSION = 1
+SCRATCH_NAME = "rows.tmp"
+TRANSPOSE_BYTES = 64 * 2**20 # scratch rows transposed per pass
+
+def to_epoch_seconds(t):
+    """datetime, ISO string, numpy datetime64 or epoch int -> int epoch seconds."""
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    return int(np.datetime64(t, "s").astype(np.int64))
+
+def _load(path):
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        # Zero-length arrays cannot be memory-mapped
+        return np.load(path, allow_pickle=False)
+
+class SeriesWriter:
+    """Streams (timestamps, (T, len(columns)) values) chunks into a new store."""
+
+    def __init__(self, path, columns):
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta = self.path / "meta.json"
+        if meta.exists():
+            meta.unlink()
+        self._scratch = open(self.path / SCRATCH_NAME, "wb")
+        self._timestamps = []
+        self.rows = 0
+
+    def write(self, timestamps, values):
+        """Appends a chunk: timestamps plus a (T, len(columns)) value matrix."""
+        values = np.round(values, 2).astype(np.float32)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Expected a (T, {len(self.columns)}) chunk, got shape {values.shape}")
+        ts = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+        if len(ts) != len(values):
+            raise ValueError(f"{len(ts)} timestamps for {len(values)} rows")
+        self._scratch.write(np.ascontiguousarray(values).tobytes())
+        self._timestamps.append(ts)
+        self.rows += len(ts)
+
+    def write_rows(self, rows):
+        """Appends simulate_step-style row dicts."""
+        if not rows:
+            return
+        timestamps = [datetime.fromisoformat(r["timestamp"]) for r in rows]
+        self.write(timestamps, np.array([[r[c] for c in self.columns] for r in rows], dtype=np.float64))
+
+    def close(self):
+        if self._scratch is None:
+            return
+        self._scratch.close()
+        self._scratch = None
+        scratch = self.path / SCRATCH_NAME
+        n_rows, n_channels = self.rows, len(self.columns)
+
+        timestamps = np.concatenate(self._timestamps) if self._timestamps else np.zeros(0, dtype=np.int64)
+        if n_rows > 1 and (np.diff(timestamps) < 0).any():
+            raise ValueError("Timestamps must be written in ascending order")
+        np.save(self.path / "timestamps.npy", timestamps, allow_pickle=False)
+
+        if n_rows and n_channels:
+            rows = np.memmap(scratch, dtype=np.float32, mode="r", shape=(n_rows, n_channels))
+            values = np.lib.format.open_memmap(self.path / "values.npy", mode="w+",
+                                               dtype=np.float32, shape=(n_channels, n_rows))
+            step = max(1, TRANSPOSE_BYTES // (4 * n_channels))
+            for lo in range(0, n_rows, step):
+                values[:, lo:lo + step] = rows[lo:lo + step].T
+            values.flush()
+            del rows, values
+        else:
+            np.save(self.path / "values.npy", np.zeros((n_channels, n_rows), dtype=np.float32), allow_pickle=False)
+        scratch.unlink()
+
+        blob, offsets = encode_strings(self.columns)
+        np.save(self.path / "names_blob.npy", blob, allow_pickle=False)
+        np.save(self.path / "names_offsets.npy", offsets, allow_pickle=False)
+        with open(self.path / "meta.json", "w") as f:
+            json.dump({"format_version": FORMAT_VERSION, "rows": n_rows, "channels": n_channels}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TimeSeriesStore:
+    """Read-only, memory-mapped view of a saved store."""
+
+    def __init__(self, directory):
+        self.path = Path(directory)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No finished time-series store at {directory} (missing meta.json)")
+        with open(meta_path, "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported time-series store version {self.meta.get('format_version')} in {directory}")
+        self.timestamps = _load(self.path / "timestamps.npy")
+        self.values = _load(self.path / "values.npy")
+        self._names_blob = _load(self.path / "names_blob.npy")
+        self._names_offsets = _load(self.path / "names_offsets.npy")
+        self._columns = None
+        self._index = None
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def columns(self):
+        """Channel names in store order (decoded once, on first use)."""
+        if self._columns is None:
+            self._columns = decode_strings(self._names_blob, self._names_offsets)
+        return self._columns
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {c: i for i, c in enumerate(self.columns)}
+        return self._index
+
+    def time_slice(self, start=None, end=None):
+        """Row slice for start <= timestamp < end (either bound may be None)."""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, to_epoch_seconds(start), "left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, to_epoch_seconds(end), "left"))
+        return slice(lo, max(lo, hi))
+
+    def channel_selector(self, channels=None):
+        """
+        Channel names, indices or a slice -> slice where the selection is a
+        contiguous ascending run (reads stay views), else an index array.
+        """
+        if channels is None:
+            return slice(None)
+        if isinstance(channels, slice):
+            return channels
+        if isinstance(channels, str):
+            channels = [channels]
+        idx = np.array([self.index[c] if isinstance(c, str) else int(c) for c in channels], dtype=np.int64)
+        if len(idx) and (idx[-1] - idx[0] == len(idx) - 1) and (np.diff(idx) == 1).all():
+            return slice(int(idx[0]), int(idx[-1]) + 1)
+        return idx
+
+    def read(self, start=None, end=None, channels=None):
+        """
+        (timestamps, values) for start <= t < end and the given channels;
+        values is (rows, channels) like the CSV layout. Both are views of the
+        mapped files (no copy) unless the channels are not one contiguous
+        run, in which case only the selected rows of each are gathered.
+        """
+        rows = self.time_slice(start, end)
+        values = self.values[self.channel_selector(channels), rows]
+        return self.timestamps[rows], values.T
+
+    def channel(self, name, start=None, end=None):
+        """One channel's readings for start <= t < end, as a 1-D view."""
+        return self.values[self.index[name], self.time_slice(start, end)]
+
+    def datetimes(self, timestamps=None):
+        """Epoch seconds -> datetime64[s] (all rows by default)."""
+        return (self.timestamps if timestamps is None else np.asarray(timestamps)).astype("datetime64[s]")
+
+def is_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json")) \
+        and os.path.exists(os.path.join(path, "values.npy"))
+
+def open_store(path):
+    return TimeSeriesStore(path)
+
+def convert_csv(csv_path, store_path, batch_rows=4096):
+    """Converts a generate_data CSV (timestamp, then channels) into a store."""
+    with open(csv_path, "r", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)[1:]
+        with SeriesWriter(store_path, columns) as writer:
+            timestamps, rows = [], []
+            for record in reader:
+                timestamps.append(record[0])
+                rows.append(record[1:])
+                if len(rows) == batch_rows:
+                    writer.write(np.array(timestamps, dtype="datetime64[s]"), np.array(rows, dtype=np.float64))
+                    timestamps, rows = [], []
+            if rows:
+                writer.write(np.array(timestamps, dtype="datetime64[s]"), np.array(rows, dtype=np.float64))
+    return writer.rows, len(columns)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert sensor CSVs into memory-mapped time-series stores")
+    parser.add_argument("inputs", nargs="+", help="CSV files written by generate_data.py")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write <stem>.series/ (default: next to each CSV)")
+    args = parser.parse_args(argv)
+
+    for csv_path in map(Path, args.inputs):
+        output_dir = Path(args.output_dir) if args.output_dir else csv_path.parent
+        store_path = output_dir / f"{csv_path.stem}{STORE_SUFFIX}"
+        rows, channels = convert_csv(csv_path, store_path)
+        print(f"Wrote {store_path}: {rows} rows, {channels} channels")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from timeseries_store import STORE_SUFFIX, TimeSeriesStore, to_epoch_seconds
+
+# Windowed training batches over sensor data with interval labels.
+#
+# labels.json holds one record per anomalous timestep. LabelIntervals merges
+# consecutive timesteps of the same (node, type) into [start, end) intervals
+# sorted by start, with a running maximum of the ends, so the intervals
+# overlapping a time range are found with two binary searches.
+#
+# WindowDataset cuts each source (a CSV, parsed once, or a memory-mapped
+# .series store) into fixed-length sliding windows and labels every row
+# from the intervals once, up front; a batch is one fancy-indexed gather
+# per source. WindowLoader streams window indices through a shuffle buffer
+# and has background threads assemble the batches (numpy copies release
+# the GIL), keeping `prefetch` batches ready.
+#
+# Batches are dicts:
+#   x       float32 (batch, window, channels)
+#   y       int8 (batch, window): 0 normal, else LABEL_TYPES index + 1
+#   label   int8 (batch,): y of the window's first anomalous row (0 if none)
+#   node    int32 (batch,): index into node_vocab of that row's node (-1)
+#   start   int64 (batch,): epoch seconds of each window's first row
+
+LABEL_TYPES = ("Leak", "Misuse")
+DEFAULT_STEP_SECONDS = 15 * 60 # label spacing when it cannot be inferred
+
+class LabelIntervals:
+    def __init__(self, node_ids, types, starts, ends):
+        order = np.argsort(starts, kind="stable")
+        self.node_ids = [node_ids[i] for i in order.tolist()]
+        self.types = [types[i] for i in order.tolist()]
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+        self._max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_records(cls, records, anomaly_type=None, step_seconds=None):
+        """
+        Merges per-timestep label records ({timestamp, node_id, anomaly_type})
+        into intervals, optionally keeping one anomaly type. Each record
+        covers step_seconds (default: the smallest spacing between labels).
+        """
+        groups = {}
+        for r in records:
+            if anomaly_type is not None and r["anomaly_type"] != anomaly_type:
+                continue
+            key = (r["node_id"], r["anomaly_type"], r.get("scenario"))
+            groups.setdefault(key, []).append(to_epoch_seconds(r["timestamp"]))
+        times = {key: np.unique(np.array(ts, dtype=np.int64)) for key, ts in groups.items()}
+        if step_seconds is None:
+            gaps = [np.diff(ts) for ts in times.values() if len(ts) > 1]
+            gaps = np.concatenate(gaps) if gaps else np.zeros(0, dtype=np.int64)
+            step_seconds = int(gaps.min()) if len(gaps) else DEFAULT_STEP_SECONDS
+
+        node_ids, types, starts, ends = [], [], [], []
+        for (node, kind, _), ts in times.items():
+            breaks = np.flatnonzero(np.diff(ts) > step_seconds) + 1
+            for run in np.split(ts, breaks):
+                node_ids.append(node)
+                types.append(kind)
+                starts.append(int(run[0]))
+                ends.append(int(run[-1]) + step_seconds)
+        return cls(node_ids, types, starts, ends)
+
+    @classmethod
+    def load(cls, path, anomaly_type=None, step_seconds=None):
+        with open(path, "r") as f:
+            return cls.from_records(json.load(f), anomaly_type, step_seconds)
+
+    def overlapping(self, start, end):
+        """Indices of intervals with start_i < end and end_i > start."""
+        start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+        hi = int(np.searchsorted(self.starts, end, "left"))
+        # Intervals before lo all end by `start` (running max of the ends)
+        lo = int(np.searchsorted(self._max_end[:hi], start, "right"))
+        candidates = np.arange(lo, hi)
+        return candidates[self.ends[lo:hi] > start]
+
+    def to_json(self):
+        return [{"node_id": n, "anomaly_type": t, "start": str(np.datetime64(s, "s")), "end": str(np.datetime64(e, "s"))}
+                for n, t, s, e in zip(self.node_ids, self.types, self.starts.tolist(), self.ends.tolist())]
+
+    def label_rows(self, timestamps, node_vocab):
+        """Per-row (type code, node index) for ascending epoch timestamps; later intervals win."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        y = np.zeros(len(timestamps), dtype=np.int8)
+        node = np.full(len(timestamps), -1, dtype=np.int32)
+        if not len(timestamps):
+            return y, node
+        # Only the intervals overlapping this source's time span, in start order
+        for i in self.overlapping(int(timestamps[0]), int(timestamps[-1]) + 1).tolist():
+            lo, hi = np.searchsorted(timestamps, (self.starts[i], self.ends[i]), "left")
+            y[lo:hi] = LABEL_TYPES.index(self.types[i]) + 1
+            node[lo:hi] = node_vocab[self.node_ids[i]]
+        return y, node
+
+def read_csv_source(path):
+    """(epoch seconds, float32 (rows, channels), columns) from a generate_data CSV."""
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)[1:]
+        records = list(reader)
+    timestamps = np.array([r[0] for r in records], dtype="datetime64[s]").astype(np.int64)
+    values = np.array([r[1:] for r in records], dtype=np.float32).reshape(len(records), len(columns))
+    return timestamps, values, columns
+
+class _Source:
+    """One file's rows: a (rows, channels) matrix, or a store's (channels, rows) mapping."""
+
+    def __init__(self, path, intervals):
+        self.path = str(path)
+        self.intervals = intervals if intervals is not None else LabelIntervals([], [], [], [])
+        if os.path.isdir(path):
+            store = TimeSeriesStore(path)
+            self.timestamps, self.columns = store.timestamps, store.columns
+            self._by_channel = store.values
+            self._rows = None
+        else:
+            self.timestamps, self._rows, self.columns = read_csv_source(path)
+            self._by_channel = None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def windows(self, rows, channels):
+        """(windows, length, k) copy of the selected channels at a (windows, length) row index."""
+        if self._rows is not None:
+            if isinstance(channels, slice):
+                return self._rows[rows, channels]
+            return self._rows[rows[:, :, None], channels]
+        return np.moveaxis(self._by_channel[channels, rows] if isinstance(channels, slice)
+                           else self._by_channel[channels[:, None, None], rows], 0, -1)
+
+class WindowDataset:
+    """
+    Sliding windows over sources [(path, LabelIntervals or None)] that share
+    their channel layout. `channels` picks a subset by name (default: all).
+    """
+
+    def __init__(self, sources, window, stride=1, channels=None):
+        if window < 1 or stride < 1:
+            raise ValueError("window and stride must be positive")
+        self.window = window
+        self.stride = stride
+        self.sources = [_Source(path, intervals) for path, intervals in sources]
+        if not self.sources:
+            raise ValueError("No sources")
+        columns = self.sources[0].columns
+        for source in self.sources[1:]:
+            if source.columns != columns:
+                raise ValueError(f"{source.path} has different channels from {self.sources[0].path}")
+        index = {c: i for i, c in enumerate(columns)}
+        self.columns = list(channels) if channels is not None else list(columns)
+        missing = [c for c in self.columns if c not in index]
+        if missing:
+            raise ValueError(f"Unknown channel(s): {missing[:5]}")
+        picked = np.array([index[c] for c in self.columns], dtype=np.int64)
+        contiguous = len(picked) and (np.diff(picked) == 1).all()
+        self._channels = slice(int(picked[0]), int(picked[-1]) + 1) if contiguous else picked
+
+        self.node_vocab = sorted({n for s in self.sources for n in s.intervals.node_ids})
+        vocab = {n: i for i, n in enumerate(self.node_vocab)}
+        self._labels = [s.intervals.label_rows(s.timestamps, vocab) for s in self.sources]
+
+        # Window k of source s starts at row (k - offset[s]) * stride
+        counts = [max(0, (len(s) - window) // stride + 1) for s in self.sources]
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def locate(self, k):
+        """Window k -> (source index, first row)."""
+        s = int(np.searchsorted(self._offsets, k, "right")) - 1
+        return s, int(k - self._offsets[s]) * self.stride
+
+    def batch(self, indices):
+        """Assembles the batch dict for window indices: one gather per source."""
+        indices = np.asarray(indices, dtype=np.int64)
+        n, w = len(indices), self.window
+        x = np.empty((n, w, len(self.columns)), dtype=np.float32)
+        y = np.empty((n, w), dtype=np.int8)
+        node = np.full(n, -1, dtype=np.int32)
+        start = np.empty(n, dtype=np.int64)
+        src = np.searchsorted(self._offsets, indices, "right") - 1
+        first = (indices - self._offsets[src]) * self.stride
+        for s in np.unique(src).tolist():
+            picked = np.flatnonzero(src == s)
+            rows = first[picked, None] + np.arange(w)
+            source = self.sources[s]
+            rows_y, rows_node = self._labels[s]
+            x[picked] = source.windows(rows, self._channels)
+            y[picked] = rows_y[rows]
+            start[picked] = source.timestamps[first[picked]]
+            hit = np.argmax(y[picked] != 0, axis=1)
+            node[picked] = np.where(y[picked, hit] != 0, rows_node[rows[np.arange(len(picked)), hit]], -1)
+        label = np.where(node >= 0, y[np.arange(n), np.argmax(y != 0, axis=1)], 0).astype(np.int8)
+        return {"x": x, "y": y, "label": label, "node": node, "start": start}
+
+def shuffled(n, buffer_size, rng):
+    """0..n-1 through a shuffle buffer: random order, but reads stay local."""
+    if buffer_size <= 1:
+        yield from range(n)
+        return
+    buffer = []
+    for i in range(n):
+        if len(buffer) < buffer_size:
+            buffer.append(i)
+            continue
+        j = int(rng.integers(buffer_size))
+        yield buffer[j]
+        buffer[j] = i
+    rng.shuffle(buffer)
+    yield from buffer
+
+class WindowLoader:
+    """
+    Iterates batches of a WindowDataset; each iteration is one epoch.
+    Batches are assembled by `workers` threads with up to `prefetch` ready
+    ahead of the consumer. Order depends only on (seed, epoch).
+    """
+
+    def __init__(self, dataset, batch_size=32, shuffle_buffer=4096, workers=2, prefetch=4,
+                 seed=0, drop_last=False):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.workers = max(1, workers)
+        self.prefetch = max(1, prefetch)
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def __len__(self):
+        n = len(self.dataset)
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+    def _index_batches(self, epoch):
+        rng = np.random.default_rng([self.seed, epoch])
+        batch = []
+        for k in shuffled(len(self.dataset), self.shuffle_buffer, rng):
+            batch.append(k)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch and not self.drop_last:
+            yield batch
+
+    def __iter__(self):
+        epoch, self.epoch = self.epoch, self.epoch + 1
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for indices in self._index_batches(epoch):
+                pending.append(pool.submit(self.dataset.batch, indices))
+                if len(pending) >= self.prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+def ai_data_sources(data_dir, labels_path=None):
+    """
+    [(path, LabelIntervals)] for the scenario files generate_data.py wrote
+    to data_dir (a <stem>.series store is preferred over <stem>.csv). Each
+    file only gets the labels of its own anomaly type.
+    """
+    from generate_data import SCENARIOS
+
+    labels_path = labels_path or os.path.join(data_dir, "labels.json")
+    records = []
+    if os.path.exists(labels_path):
+        with open(labels_path, "r") as f:
+            records = json.load(f)
+    else:
+        print(f"Warning: {labels_path} not found; all windows are labelled normal")
+    sources = []
+    for stem, anomaly_type, *_ in SCENARIOS:
+        for suffix in (STORE_SUFFIX, ".csv"):
+            path = os.path.join(data_dir, f"{stem}{suffix}")
+            if os.path.exists(path):
+                kept = [r for r in records if anomaly_type is not None and r["anomaly_type"] == anomaly_type]
+                sources.append((path, LabelIntervals.from_records(kept)))
+                break
+    return sources
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Iterate windowed training batches and report throughput")
+    parser.add_argument("data_dir", help="Directory of scenario files, e.g. ai_data/v1")
+    parser.add_argument("--labels", default=None, help="labels.json (default: <data_dir>/labels.json)")
+    parser.add_argument("--window", type=int, default=16, help="Rows per window")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--shuffle-buffer", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=2, help="Batch assembly threads")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sources = ai_data_sources(args.data_dir, args.labels)
+    if not sources:
+        print(f"No scenario files in {args.data_dir}")
+        return
+    dataset = WindowDataset(sources, args.window, args.stride)
+    intervals = sum(len(s.intervals) for s in dataset.sources)
+    print(f"{len(dataset)} windows of {args.window} x {len(dataset.columns)} from {len(sources)} file(s), "
+          f"{intervals} label interval(s)")
+    loader = WindowLoader(dataset, args.batch_size, args.shuffle_buffer, args.workers, seed=args.seed)
+    for epoch in range(args.epochs):
+        start = time.perf_counter()
+        windows = 0
+        counts = np.zeros(len(LABEL_TYPES) + 1, dtype=np.int64)
+        for batch in loader:
+            windows += len(batch["label"])
+            counts += np.bincount(batch["label"], minlength=len(counts))
+        elapsed = time.perf_counter() - start
+        summary = ", ".join(f"{n} {name}" for n, name in zip(counts.tolist(), ("normal",) + LABEL_TYPES))
+        print(f"epoch {epoch}: {windows} windows in {elapsed:.2f}s "
+              f"({windows / max(elapsed, 1e-9):,.0f} windows/s); {summary}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
-import networkx as nx
 import pickle
 import json
 import argparse
+import hashlib
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+import numpy as np
+
+from graph_artifact import (GraphArrays, decode_strings, encode_strings, is_graph_arrays,
+                            load_graph_arrays)
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 # --- Data Structures ---
 
 class ValidationResult:
-    def __init__(self, rule_name: str, location: str, message: str, is_hard_failure: bool):
+    def __init__(self, rule_name: str, location: str, message: str, is_hard_failure: bool,
+                 edge: Optional[int] = None):
         self.rule_name = rule_name
         self.location = location
         self.message = message
         self.is_hard_failure = is_hard_failure
+        # Position of the offending edge in the GraphIndex, for edge rules
+        self.edge = edge
 
     def to_dict(self):
         return {
@@ -26,6 +38,7 @@ class ValidationReport:
     def __init__(self):
         self.hard_failures: List[ValidationResult] = []
         self.soft_warnings: List[ValidationResult] = []
+        self.timings_ms: Dict[str, float] = {}
 
     def add_result(self, result: ValidationResult):
         if result.is_hard_failure:
@@ -41,83 +54,849 @@ class ValidationReport:
         return "PASS"
 
     def to_json(self):
-        return {
+        data = {
             "status": self.get_status(),
             "hard_failures": [r.to_dict() for r in self.hard_failures],
             "soft_warnings": [r.to_dict() for r in self.soft_warnings]
         }
+        if self.timings_ms:
+            data["timings_ms"] = self.timings_ms
+        return data
+
+# --- Graph Index ---
+
+PUMP_EDGE_TYPES = ("PUMP", "Pump")
+
+class GraphIndex:
+    """
+    Column view of a graph for vectorized rules: node attributes are pulled
+    into arrays once and gathered per edge, so every edge-local rule is a
+    set of masks over the same edge columns instead of its own graph scan.
+    """
+
+    def __init__(self, names: Optional[List[str]], zone_codes: np.ndarray, zone_vocab: List[Any],
+                 elevation: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                 edge_type_codes: np.ndarray, edge_type_vocab: List[str],
+                 edge_ids: Optional[np.ndarray] = None, string_table=None,
+                 node_type: Optional[np.ndarray] = None, node_type_vocab: Optional[List[str]] = None,
+                 demand: Optional[np.ndarray] = None):
+        # Either names or a (blob, offsets) string table; names decode lazily
+        self._names = names
+        self.string_table = string_table
+        self.zone_vocab = zone_vocab
+        self.zone = zone_codes
+        self.elevation = elevation
+        # Node type codes (-1 = none) and demand (NaN = none), for path rules
+        self.node_type = np.full(len(zone_codes), -1, dtype=np.int64) if node_type is None else node_type
+        self.node_type_vocab = node_type_vocab or []
+        self.demand = np.full(len(zone_codes), np.nan) if demand is None else demand
+        self.src = src
+        self.dst = dst
+        self.edge_type_codes = edge_type_codes
+        self.edge_type_vocab = edge_type_vocab
+        self.edge_type = np.array(edge_type_vocab, dtype=object)[edge_type_codes]
+        # Position of each edge in the full graph (differs only for subsets)
+        self.edge_ids = np.arange(len(src), dtype=np.int64) if edge_ids is None else edge_ids
+
+        # Shared per-edge columns
+        self.zone_u = zone_codes[src]
+        self.zone_v = zone_codes[dst]
+        self.elev_u = elevation[src]
+        self.elev_v = elevation[dst]
+        self.elevation_diff = self.elev_v - self.elev_u
+        pump_codes = [c for c, t in enumerate(edge_type_vocab) if t in PUMP_EDGE_TYPES]
+        self.is_pump = np.isin(edge_type_codes, pump_codes)
+        self._node_hashes = None
+
+    @property
+    def names(self) -> List[str]:
+        if self._names is None:
+            self._names = decode_strings(*self.string_table)
+        return self._names
+
+    @classmethod
+    def build(cls, graph) -> "GraphIndex":
+        if isinstance(graph, GraphArrays):
+            return cls._from_arrays(graph)
+        return cls._from_networkx(graph)
+
+    @classmethod
+    def _from_networkx(cls, graph: "nx.DiGraph") -> "GraphIndex":
+        names = list(graph.nodes())
+        index = {n: i for i, n in enumerate(names)}
+        zone_vocab, zone_lookup, zone_codes, elevation = [], {}, [], []
+        type_vocab, type_lookup, node_types, demand = [], {}, [], []
+        for _, data in graph.nodes(data=True):
+            ntype = data.get("type")
+            if ntype is not None and ntype not in type_lookup:
+                type_lookup[ntype] = len(type_vocab)
+                type_vocab.append(ntype)
+            node_types.append(type_lookup[ntype] if ntype is not None else -1)
+            value = data.get("demand")
+            demand.append(np.nan if value is None else value)
+            zone = data.get("zone")
+            if zone:
+                if zone not in zone_lookup:
+                    zone_lookup[zone] = len(zone_vocab)
+                    zone_vocab.append(zone)
+                zone_codes.append(zone_lookup[zone])
+            else:
+                zone_codes.append(-1)
+            elev = data.get("elevation")
+            elevation.append(np.nan if elev is None else elev)
+
+        src, dst, edge_codes, edge_vocab, edge_lookup = [], [], [], [], {}
+        for u, v, data in graph.edges(data=True):
+            src.append(index[u])
+            dst.append(index[v])
+            etype = data.get("type", "PIPE")
+            if etype not in edge_lookup:
+                edge_lookup[etype] = len(edge_vocab)
+                edge_vocab.append(etype)
+            edge_codes.append(edge_lookup[etype])
+        return cls(names, np.array(zone_codes, dtype=np.int64), zone_vocab,
+                   np.array(elevation, dtype=np.float64),
+                   np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64),
+                   np.array(edge_codes, dtype=np.int64), edge_vocab,
+                   node_type=np.array(node_types, dtype=np.int64), node_type_vocab=type_vocab,
+                   demand=np.array(demand, dtype=np.float64))
+
+    @classmethod
+    def _from_arrays(cls, graph: GraphArrays) -> "GraphIndex":
+        zone_vocab = list(graph.vocab["zone"])
+        zone_codes = np.asarray(graph.zone, dtype=np.int64).copy()
+        # Falsy zones count as "no zone", as in the original rule
+        for code, zone in enumerate(zone_vocab):
+            if not zone:
+                zone_codes[zone_codes == code] = -1
+        # Code -1 (no type attribute) maps to the trailing "PIPE" entry
+        type_vocab = list(graph.vocab["edge_type"]) + ["PIPE"]
+        type_codes = np.asarray(graph.edge_type, dtype=np.int64).copy()
+        type_codes[type_codes < 0] = len(type_vocab) - 1
+        return cls(None, zone_codes, zone_vocab, np.asarray(graph.elevation, dtype=np.float64),
+                   graph.edge_sources(), np.asarray(graph.indices, dtype=np.int64),
+                   type_codes, type_vocab, string_table=(graph.names_blob, graph.names_offsets),
+                   node_type=np.asarray(graph.node_type, dtype=np.int64),
+                   node_type_vocab=list(graph.vocab["node_type"]),
+                   demand=np.asarray(graph.demand, dtype=np.float64))
+
+    def subset(self, edges: np.ndarray) -> "GraphIndex":
+        """Index over only the given edge positions; node columns are shared."""
+        return GraphIndex(self._names, self.zone, self.zone_vocab, self.elevation,
+                          self.src[edges], self.dst[edges], self.edge_type_codes[edges],
+                          self.edge_type_vocab, edge_ids=self.edge_ids[edges],
+                          string_table=self.string_table, node_type=self.node_type,
+                          node_type_vocab=self.node_type_vocab, demand=self.demand)
+
+    def name(self, i: int) -> str:
+        if self._names is None:
+            blob, offsets = self.string_table
+            return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+        return self._names[i]
+
+    def edge_label(self, k: int) -> str:
+        return f"{self.name(self.src[k])}→{self.name(self.dst[k])}"
+
+    # --- Attribute hashes (for incremental validation) ---
+
+    def node_hashes(self) -> np.ndarray:
+        """Per-node int64 hash of the attributes rules read (zone, elevation)."""
+        if self._node_hashes is None:
+            zone_hash = np.array([_stable_hash(z) for z in self.zone_vocab] + [0], dtype=np.int64)
+            # -1 (no zone) picks the trailing 0; NaN payloads and -0.0 normalized
+            elev = np.where(np.isnan(self.elevation), np.nan, self.elevation + 0.0)
+            self._node_hashes = zone_hash[self.zone] * np.int64(1000003) ^ elev.view(np.int64)
+        return self._node_hashes
+
+    def edge_hashes(self) -> np.ndarray:
+        type_hash = np.array([_stable_hash(t) for t in self.edge_type_vocab], dtype=np.int64)
+        return type_hash[self.edge_type_codes] if len(type_hash) else np.zeros(0, dtype=np.int64)
+
+def _stable_hash(value) -> int:
+    # hash() of a str is salted per process; this must survive restarts
+    digest = hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+# --- Reachability Index ---
+
+SOURCE_NODE_TYPES = ("SOURCE",)
+# Nodes that set the available head for everything downstream of them
+HEAD_NODE_TYPES = ("SOURCE", "TANK", "RESERVOIR")
+
+def _csr(n: int, src: np.ndarray, dst: np.ndarray):
+    """Out-edge CSR: (indptr, neighbour per slot, edge position per slot)."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order], order
+
+def _expand(indptr: np.ndarray, frontier: np.ndarray) -> np.ndarray:
+    """CSR slots of every out-edge of the frontier nodes, grouped by node."""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.arange(total, dtype=np.int64) - np.repeat(offsets - starts, counts)
+
+class ReachabilityIndex:
+    """
+    Path-level view of a GraphIndex, built once per graph for the path rules.
+
+    The supply forest is the breadth-first tree from the source nodes (each
+    node keeps the edge it was first reached over). Numbering the forest in
+    preorder gives every node an interval [tin, tout) containing exactly its
+    tree descendants, so "is a upstream of d" on the tree is two
+    comparisons, and per-node prefixes along the tree path (pumps passed,
+    zone changes, nearest head node) answer path questions without walking
+    the path. Everything is built level by level with array operations, so
+    construction is linear in nodes plus edges.
+
+    Networks that are not trees (loops, parallel feeds) also get a
+    topological rank; reaches() uses the tree intervals first and only
+    falls back to a search, pruned by rank, for off-tree paths. Directed
+    cycles are found with Kahn's algorithm and resolved into strongly
+    connected components on the leftover nodes only.
+    """
+
+    def __init__(self, index: GraphIndex):
+        n = len(index.zone)
+        self.n = n
+        src, dst = index.src, index.dst
+        self.indptr, self.succ, self.succ_edge = _csr(n, src, dst)
+
+        type_names = [str(t).upper() for t in index.node_type_vocab]
+        def type_mask(types):
+            codes = [c for c, t in enumerate(type_names) if t in types]
+            return np.isin(index.node_type, codes) if codes else np.zeros(n, dtype=bool)
+        self.is_source = type_mask(SOURCE_NODE_TYPES)
+        self.roots = np.flatnonzero(self.is_source)
+        is_head = type_mask(HEAD_NODE_TYPES)
+
+        self._build_forest(index, is_head)
+        self._build_order(src, dst)
+
+        # Reached edges that are not tree edges: paths the intervals miss
+        reached_edge = self.depth[src] >= 0
+        tree_edge = np.zeros(len(src), dtype=bool)
+        tree_edge[self.parent_edge[self.parent_edge >= 0]] = True
+        self.off_tree_edges = int((reached_edge & ~tree_edge).sum())
+
+    def _build_forest(self, index: GraphIndex, is_head: np.ndarray):
+        n = self.n
+        self.parent = np.full(n, -1, dtype=np.int64)
+        self.parent_edge = np.full(n, -1, dtype=np.int64)
+        self.depth = np.full(n, -1, dtype=np.int64)
+        # Prefixes along the tree path from the root
+        self.pumps_above = np.zeros(n, dtype=np.int64)
+        self.zone_changes = np.zeros(n, dtype=np.int64)
+        self.last_zone = index.zone.copy()
+        self.root = np.full(n, -1, dtype=np.int64)
+        self.root[self.roots] = self.roots
+        # Nearest node at or above each node that sets the head: a source,
+        # a tank or a pump discharge
+        self.head = np.where(is_head, np.arange(n), -1)
+
+        levels = []
+        frontier = self.roots
+        self.depth[frontier] = 0
+        while len(frontier):
+            levels.append(frontier)
+            slots = _expand(self.indptr, frontier)
+            targets = self.succ[slots]
+            new = self.depth[targets] < 0
+            # First slot reaching each new node wins: grouped by parent in
+            # frontier order, so the tree is deterministic
+            nodes, first = np.unique(targets[new], return_index=True)
+            slots = slots[new][first]
+            edges = self.succ_edge[slots]
+            parents = index.src[edges]
+
+            self.parent[nodes] = parents
+            self.parent_edge[nodes] = edges
+            self.depth[nodes] = len(levels)
+            self.root[nodes] = self.root[parents]
+            pump = index.is_pump[edges]
+            self.pumps_above[nodes] = self.pumps_above[parents] + pump
+            zone, above = index.zone[nodes], self.last_zone[parents]
+            self.zone_changes[nodes] = self.zone_changes[parents] + ((zone >= 0) & (above >= 0) & (zone != above))
+            self.last_zone[nodes] = np.where(zone >= 0, zone, above)
+            self.head[nodes] = np.where(pump | (self.head[nodes] >= 0), nodes, self.head[parents])
+            # Keep each level in preorder-friendly order: sorted by parent
+            frontier = nodes[np.argsort(parents, kind="stable")]
+
+        # Preorder intervals: subtree sizes bottom-up, then each child starts
+        # after its parent and the subtrees of its earlier siblings
+        size = np.ones(n, dtype=np.int64)
+        for level in reversed(levels[1:]):
+            np.add.at(size, self.parent[level], size[level])
+        self.tin = np.full(n, -1, dtype=np.int64)
+        if levels:
+            roots = levels[0]
+            self.tin[roots] = np.cumsum(size[roots]) - size[roots]
+        for level in levels[1:]:
+            parents, sizes = self.parent[level], size[level]
+            before = np.cumsum(sizes) - sizes
+            group_start = np.r_[True, parents[1:] != parents[:-1]]
+            before -= np.maximum.accumulate(np.where(group_start, before, 0))
+            self.tin[level] = self.tin[parents] + 1 + before
+        self.tout = np.where(self.tin >= 0, self.tin + size, -1)
+
+    def _build_order(self, src: np.ndarray, dst: np.ndarray):
+        """Kahn's algorithm, level by level: topological rank and cycles."""
+        n = self.n
+        indegree = np.bincount(dst, minlength=n)
+        self.rank = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(indegree == 0)
+        placed = 0
+        while len(frontier):
+            self.rank[frontier] = placed + np.arange(len(frontier))
+            placed += len(frontier)
+            targets = self.succ[_expand(self.indptr, frontier)]
+            hit, counts = np.unique(targets, return_counts=True)
+            indegree[hit] -= counts
+            frontier = hit[indegree[hit] == 0]
+        self.is_acyclic = placed == n
+        self.cycles = [] if self.is_acyclic else self._find_cycles(src, dst, self.rank < 0)
+
+    def _find_cycles(self, src: np.ndarray, dst: np.ndarray, left: np.ndarray) -> List[List[int]]:
+        """
+        Strongly connected components with more than one node (or a self
+        loop) among the nodes Kahn could not place: they sit on or
+        downstream of a cycle. Iterative Tarjan, so deep graphs are fine.
+        """
+        keep = left[src] & left[dst]
+        sub_src, sub_dst = src[keep], dst[keep]
+        nodes = np.flatnonzero(left)
+        local = np.full(self.n, -1, dtype=np.int64)
+        local[nodes] = np.arange(len(nodes))
+        m = len(nodes)
+        indptr, succ, _ = _csr(m, local[sub_src], local[sub_dst])
+        indptr, succ = indptr.tolist(), succ.tolist()
+        self_loop = set(local[sub_src[sub_src == sub_dst]].tolist())
+
+        order, low = [-1] * m, [0] * m
+        on_stack, stack, components = [False] * m, [], []
+        counter = 0
+        for start in range(m):
+            if order[start] >= 0:
+                continue
+            work = [(start, indptr[start])]
+            order[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = True
+            while work:
+                v, slot = work[-1]
+                if slot < indptr[v + 1]:
+                    work[-1] = (v, slot + 1)
+                    w = succ[slot]
+                    if order[w] < 0:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, indptr[w]))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], order[w])
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == order[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(w)
+                        if w == v:
+                            break
+                    if len(component) > 1 or v in self_loop:
+                        components.append(sorted(int(nodes[w]) for w in component))
+        return components
+
+    def is_reachable(self, nodes=None):
+        """Whether each node is reached from a source."""
+        reached = self.depth >= 0
+        return reached if nodes is None else reached[nodes]
+
+    def is_ancestor(self, a, d):
+        """a is d or on d's supply-tree path. O(1); works on arrays too."""
+        a, d = np.asarray(a), np.asarray(d)
+        tin_a = self.tin[a]
+        return (tin_a >= 0) & (tin_a <= self.tin[d]) & (self.tin[d] < self.tout[a])
+
+    def pumps_between(self, a, d):
+        """Pump edges on the tree path a -> d (a must be an ancestor of d)."""
+        return self.pumps_above[d] - self.pumps_above[a]
+
+    def reaches(self, a: int, d: int) -> bool:
+        """
+        Whether any directed path leads from a to d. The tree interval
+        answers most queries; otherwise, when there are off-tree edges, a
+        search from a that skips nodes ranked after d (acyclic graphs) and
+        stops at any node whose subtree holds d.
+        """
+        if a == d or self.is_ancestor(a, d):
+            return True
+        if self.off_tree_edges == 0 and self.depth[a] >= 0:
+            return False
+        bound = self.rank[d] if self.is_acyclic else None
+        seen, stack = {a}, [a]
+        while stack:
+            v = stack.pop()
+            for w in self.succ[self.indptr[v]:self.indptr[v + 1]].tolist():
+                if w in seen or (bound is not None and self.rank[w] > bound):
+                    continue
+                if w == d or self.is_ancestor(w, d):
+                    return True
+                seen.add(w)
+                stack.append(w)
+        return False
 
 # --- Rules Engine ---
 
 class ValidationRule(ABC):
     @abstractmethod
-    def check(self, graph: nx.DiGraph) -> List[ValidationResult]:
+    def check(self, graph: "nx.DiGraph") -> List[ValidationResult]:
         pass
 
-class CrossZoneFeedRule(ValidationRule):
-    def check(self, graph: nx.DiGraph) -> List[ValidationResult]:
+class EdgeRule(ValidationRule):
+    """A rule that only looks at each edge and its two endpoints."""
+
+    name = "EDGE_RULE"
+    # Hops of context beyond the edge's endpoints the rule reads; incremental
+    # runs re-evaluate every edge within this distance of a changed node
+    radius = 0
+
+    @abstractmethod
+    def evaluate(self, index: GraphIndex) -> List[ValidationResult]:
+        pass
+
+    def check(self, graph: "nx.DiGraph") -> List[ValidationResult]:
+        return self.evaluate(GraphIndex.build(graph))
+
+class CrossZoneFeedRule(EdgeRule):
+    name = "CROSS_ZONE_FEED"
+
+    def evaluate(self, index: GraphIndex) -> List[ValidationResult]:
         results = []
-        for u, v, data in graph.edges(data=True):
-            zone_u = graph.nodes[u].get("zone")
-            zone_v = graph.nodes[v].get("zone")
-            
-            if zone_u and zone_v and zone_u != zone_v:
-                # Found a cross-zone connection
+        mask = (index.zone_u >= 0) & (index.zone_v >= 0) & (index.zone_u != index.zone_v)
+        for k in np.flatnonzero(mask).tolist():
+            zone_u = index.zone_vocab[index.zone_u[k]]
+            zone_v = index.zone_vocab[index.zone_v[k]]
+            # Found a cross-zone connection
+            results.append(ValidationResult(
+                rule_name="CROSS_ZONE_FEED",
+                location=f"{zone_u}→{zone_v} ({index.edge_label(k)})",
+                message=f"Connection detected between different zones: {zone_u} and {zone_v}",
+                is_hard_failure=False, # Soft warning as per prompt example
+                edge=int(index.edge_ids[k])
+            ))
+        return results
+
+class ElevationConsistencyRule(EdgeRule):
+    name = "ELEVATION_CONSISTENCY"
+
+    def evaluate(self, index: GraphIndex) -> List[ValidationResult]:
+        results = []
+        diff = index.elevation_diff
+        # NaN (missing elevation) compares False, so those edges are skipped
+        # Flowing uphill more than 5m without a pump is suspicious
+        uphill = ~index.is_pump & (diff > 5.0)
+        # Pump pushing water significantly downhill
+        downhill_pump = index.is_pump & (diff < -10.0)
+
+        for k in np.flatnonzero(uphill | downhill_pump).tolist():
+            elevation_diff = float(diff[k])
+            if uphill[k]:
                 results.append(ValidationResult(
-                    rule_name="CROSS_ZONE_FEED",
-                    location=f"{zone_u}→{zone_v} ({u}→{v})",
-                    message=f"Connection detected between different zones: {zone_u} and {zone_v}",
-                    is_hard_failure=False # Soft warning as per prompt example
+                    rule_name="ELEVATION_CONSISTENCY",
+                    location=index.edge_label(k),
+                    message=f"Flow uphill ({elevation_diff}m) without pump.",
+                    is_hard_failure=True, # Let's call this a hard failure for demonstration
+                    edge=int(index.edge_ids[k])
+                ))
+            else:
+                results.append(ValidationResult(
+                    rule_name="PUMP_FEASIBILITY",
+                    location=index.edge_label(k),
+                    message=f"Pump pushing water downhill ({elevation_diff}m). Potential energy waste or configuration error.",
+                    is_hard_failure=False,
+                    edge=int(index.edge_ids[k])
                 ))
         return results
 
-class ElevationConsistencyRule(ValidationRule):
-    def check(self, graph: nx.DiGraph) -> List[ValidationResult]:
+class PathRule(ValidationRule):
+    """A rule over whole supply paths, answered from the shared ReachabilityIndex."""
+
+    name = "PATH_RULE"
+
+    @abstractmethod
+    def evaluate(self, index: GraphIndex, reach: ReachabilityIndex) -> List[ValidationResult]:
+        pass
+
+    def check(self, graph: "nx.DiGraph") -> List[ValidationResult]:
+        index = GraphIndex.build(graph)
+        return self.evaluate(index, ReachabilityIndex(index))
+
+def _fixtures(index: GraphIndex) -> np.ndarray:
+    # NaN demand compares False
+    return index.demand > 0
+
+class UnreachableNodeRule(PathRule):
+    name = "UNREACHABLE_NODE"
+
+    def evaluate(self, index: GraphIndex, reach: ReachabilityIndex) -> List[ValidationResult]:
+        if len(reach.roots) == 0:
+            if reach.n == 0:
+                return []
+            return [ValidationResult(
+                rule_name="UNREACHABLE_NODE",
+                location="Graph",
+                message="No Source node; no node can be supplied.",
+                is_hard_failure=True
+            )]
+        sources = ", ".join(index.name(i) for i in reach.roots[:3].tolist())
+        if len(reach.roots) > 3:
+            sources += f" (+{len(reach.roots) - 3} more)"
+        return [ValidationResult(
+            rule_name="UNREACHABLE_NODE",
+            location=index.name(i),
+            message=f"Not reachable from any source ({sources}).",
+            is_hard_failure=True
+        ) for i in np.flatnonzero(~reach.is_reachable()).tolist()]
+
+class CrossZoneSupplyRule(PathRule):
+    name = "CROSS_ZONE_SUPPLY"
+
+    def evaluate(self, index: GraphIndex, reach: ReachabilityIndex) -> List[ValidationResult]:
         results = []
-        for u, v, data in graph.edges(data=True):
-            elev_u = graph.nodes[u].get("elevation")
-            elev_v = graph.nodes[v].get("elevation")
-            edge_type = data.get("type", "PIPE")
+        for i in np.flatnonzero(_fixtures(index) & (reach.zone_changes > 0)).tolist():
+            root = int(reach.root[i])
+            results.append(ValidationResult(
+                rule_name="CROSS_ZONE_SUPPLY",
+                location=index.name(i),
+                message=f"Supply path from {index.name(root)} crosses {int(reach.zone_changes[i])} zone boundary(ies).",
+                is_hard_failure=False
+            ))
+        return results
 
-            if elev_u is None or elev_v is None:
-                continue
+class UphillSupplyPathRule(PathRule):
+    """
+    Water cannot rise more than 5m above the node that sets its head (the
+    source, a tank or the last pump discharge on its supply path). Reported
+    once per branch, at the first node that rises too far.
+    """
+    name = "UPHILL_SUPPLY_PATH"
 
-            # Check: Flowing uphill without a pump?
-            # Allow small tolerance or maybe it's a pressurized pipe? 
-            # For this rule, let's assume if it goes up more than 5m without a pump, it's suspicious.
-            # Real systems have pressure, but this is a "Consistency" check.
-            
-            elevation_diff = elev_v - elev_u
-            
-            if edge_type != "PUMP":
-                if elevation_diff > 5.0:
-                     results.append(ValidationResult(
-                        rule_name="ELEVATION_CONSISTENCY",
-                        location=f"{u}→{v}",
-                        message=f"Flow uphill ({elevation_diff}m) without pump.",
-                        is_hard_failure=True # Let's call this a hard failure for demonstration
-                    ))
-            
-            # Check: Pump pumping downhill?
-            if edge_type == "PUMP":
-                if elevation_diff < -10.0: # Pumping downhill significantly
-                     results.append(ValidationResult(
-                        rule_name="PUMP_FEASIBILITY",
-                        location=f"{u}→{v}",
-                        message=f"Pump pushing water downhill ({elevation_diff}m). Potential energy waste or configuration error.",
-                        is_hard_failure=False 
-                    ))
+    def evaluate(self, index: GraphIndex, reach: ReachabilityIndex) -> List[ValidationResult]:
+        head = reach.head
+        rise = np.full(reach.n, np.nan)
+        has_head = head >= 0
+        rise[has_head] = index.elevation[has_head] - index.elevation[head[has_head]]
+        # NaN (missing elevation) compares False
+        too_high = rise > 5.0
+        parent = reach.parent
+        inherited = np.zeros(reach.n, dtype=bool)
+        child = parent >= 0
+        inherited[child] = too_high[parent[child]] & (head[parent[child]] == head[child])
 
+        results = []
+        for i in np.flatnonzero(too_high & ~inherited).tolist():
+            results.append(ValidationResult(
+                rule_name="UPHILL_SUPPLY_PATH",
+                location=index.name(i),
+                message=f"{float(rise[i]):.1f}m above {index.name(int(head[i]))} with no pump on the path between.",
+                is_hard_failure=True
+            ))
         return results
 
+class SupplyCycleRule(PathRule):
+    name = "SUPPLY_CYCLE"
+
+    def evaluate(self, index: GraphIndex, reach: ReachabilityIndex) -> List[ValidationResult]:
+        results = []
+        for cycle in reach.cycles:
+            shown = " → ".join(index.name(i) for i in cycle[:4])
+            if len(cycle) > 4:
+                shown += f" … ({len(cycle)} nodes)"
+            results.append(ValidationResult(
+                rule_name="SUPPLY_CYCLE",
+                location=shown,
+                message=f"Directed cycle of {len(cycle)} node(s); flow direction is ambiguous.",
+                is_hard_failure=False
+            ))
+        return results
+
+class RuleEngine:
+    """
+    Builds the GraphIndex once (and the ReachabilityIndex once, if a path
+    rule needs it) and evaluates every rule against them, timing each.
+    """
+
+    def __init__(self, rules: List[ValidationRule]):
+        self.rules = rules
+        self.timings: Dict[str, float] = {}
+        self._reach: Optional[ReachabilityIndex] = None
+
+    def _reach_index(self, index: GraphIndex) -> ReachabilityIndex:
+        if self._reach is None:
+            start = time.perf_counter()
+            self._reach = ReachabilityIndex(index)
+            self.timings["REACHABILITY_INDEX"] = time.perf_counter() - start
+        return self._reach
+
+    def run(self, graph) -> ValidationReport:
+        report = ValidationReport()
+        self.timings = {}
+
+        start = time.perf_counter()
+        index = GraphIndex.build(graph)
+        self.timings["GRAPH_INDEX"] = time.perf_counter() - start
+        self._reach = None
+
+        for rule in self.rules:
+            if isinstance(rule, PathRule):
+                reach = self._reach_index(index)
+            start = time.perf_counter()
+            if isinstance(rule, EdgeRule):
+                results = rule.evaluate(index)
+            elif isinstance(rule, PathRule):
+                results = rule.evaluate(index, reach)
+            else:
+                results = rule.check(graph)
+            name = rule_name(rule)
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            for res in results:
+                report.add_result(res)
+        return report
+
+    def run_incremental(self, graph, cache_dir: str) -> ValidationReport:
+        """
+        Same report as run(), but edge rules are only re-evaluated on the
+        region that changed since the run cached in cache_dir; their other
+        results are carried over. Path rules depend on the whole graph and
+        always run in full. Falls back to a full run without a cache.
+        """
+        report = ValidationReport()
+        self.timings = {}
+
+        start = time.perf_counter()
+        index = GraphIndex.build(graph)
+        self.timings["GRAPH_INDEX"] = time.perf_counter() - start
+        self._reach = None
+
+        names = [rule_name(rule) for rule in self.rules]
+        cache = ValidationCache.load(cache_dir)
+        if cache is not None and cache.rules != names:
+            print("Warning: Rule set changed since the cached run; validating the full graph.")
+            cache = None
+
+        if cache is not None:
+            start = time.perf_counter()
+            diff = GraphDiff(cache, index)
+            self.timings["DIFF"] = time.perf_counter() - start
+            cached: Dict[int, List[ValidationResult]] = {}
+            for rule_pos, res in cache.results:
+                cached.setdefault(rule_pos, []).append(res)
+
+        self.reevaluated_edges = 0
+        edge_results = []
+        for rule_pos, rule in enumerate(self.rules):
+            if isinstance(rule, PathRule):
+                reach = self._reach_index(index)
+            start = time.perf_counter()
+            if isinstance(rule, PathRule):
+                results = rule.evaluate(index, reach)
+            elif not isinstance(rule, EdgeRule):
+                results = rule.check(graph)
+            elif cache is None:
+                results = rule.evaluate(index)
+                self.reevaluated_edges = max(self.reevaluated_edges, len(index.src))
+            else:
+                affected = diff.affected_edges(rule.radius)
+                self.reevaluated_edges = max(self.reevaluated_edges, len(affected))
+                results = rule.evaluate(index.subset(affected))
+                is_affected = np.zeros(len(index.src), dtype=bool)
+                is_affected[affected] = True
+                for res in cached.get(rule_pos, []):
+                    edge = int(diff.old_edge_to_new[res.edge])
+                    if edge >= 0 and not is_affected[edge]:
+                        res.edge = edge
+                        results.append(res)
+                # Stable sort: same order as a full run
+                results.sort(key=lambda r: r.edge)
+            name = names[rule_pos]
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            for res in results:
+                report.add_result(res)
+                if res.edge is not None:
+                    edge_results.append((rule_pos, res))
+
+        start = time.perf_counter()
+        ValidationCache.from_index(index, names, edge_results).save(cache_dir)
+        self.timings["CACHE_WRITE"] = time.perf_counter() - start
+        return report
+
+    def timings_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000.0, 3) for name, seconds in self.timings.items()}
+
+def rule_name(rule: ValidationRule) -> str:
+    return getattr(rule, "name", type(rule).__name__)
+
+DEFAULT_RULES = [CrossZoneFeedRule, ElevationConsistencyRule, UnreachableNodeRule,
+                 CrossZoneSupplyRule, UphillSupplyPathRule, SupplyCycleRule]
+
+# --- Incremental Validation ---
+# A cache directory holds a snapshot of the last validated graph (node names,
+# edge endpoints, per-node and per-edge attribute hashes) in snapshot.npz and
+# that run's edge-rule results, tagged with rule and edge position, in
+# results.json. Nodes are identified by name and edges by (source, target).
+
+CACHE_VERSION = 1
+
+class ValidationCache:
+    def __init__(self, names_blob: np.ndarray, names_offsets: np.ndarray, node_hash: np.ndarray,
+                 src: np.ndarray, dst: np.ndarray, edge_hash: np.ndarray,
+                 rules: List[str], results: List[Any]):
+        self.names_blob = names_blob
+        self.names_offsets = names_offsets
+        self.node_hash = node_hash
+        self.src = src
+        self.dst = dst
+        self.edge_hash = edge_hash
+        self.rules = rules
+        # (rule position, ValidationResult) for every edge-attributed result
+        self.results = results
+        self._names = None
+
+    @property
+    def names(self) -> List[str]:
+        if self._names is None:
+            self._names = decode_strings(self.names_blob, self.names_offsets)
+        return self._names
+
+    @classmethod
+    def from_index(cls, index: GraphIndex, rules: List[str], results: List[Any]) -> "ValidationCache":
+        if index.string_table is not None:
+            names_blob, names_offsets = index.string_table
+        else:
+            names_blob, names_offsets = encode_strings(index.names)
+        cache = cls(names_blob, names_offsets, index.node_hashes(), index.src, index.dst,
+                    index.edge_hashes(), rules, results)
+        cache._names = index._names
+        return cache
+
+    def same_names(self, index: GraphIndex) -> bool:
+        if index.string_table is not None:
+            blob, offsets = index.string_table
+            return np.array_equal(offsets, self.names_offsets) and np.array_equal(blob, self.names_blob)
+        return self.names == index.names
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.savez(os.path.join(directory, "snapshot.npz"), names_blob=self.names_blob,
+                 names_offsets=self.names_offsets, node_hash=self.node_hash,
+                 src=self.src, dst=self.dst, edge_hash=self.edge_hash)
+        data = {
+            "version": CACHE_VERSION,
+            "nodes": len(self.node_hash),
+            "edges": len(self.edge_hash),
+            "rules": self.rules,
+            "results": [dict(res.to_dict(), rule_index=rule_pos, hard=res.is_hard_failure, edge=res.edge)
+                        for rule_pos, res in self.results],
+        }
+        # Written last: a snapshot without matching results.json is ignored
+        with open(os.path.join(directory, "results.json"), "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["ValidationCache"]:
+        try:
+            with open(os.path.join(directory, "results.json"), "r") as f:
+                data = json.load(f)
+            with np.load(os.path.join(directory, "snapshot.npz"), allow_pickle=False) as snap:
+                arrays = {name: snap[name] for name in snap.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if (data.get("version") != CACHE_VERSION or data["nodes"] != len(arrays["node_hash"])
+                or data["edges"] != len(arrays["edge_hash"])):
+            return None
+        results = [(d["rule_index"], ValidationResult(d["rule"], d["location"], d["message"], d["hard"], d["edge"]))
+                   for d in data["results"]]
+        return cls(arrays["names_blob"], arrays["names_offsets"], arrays["node_hash"],
+                   arrays["src"], arrays["dst"], arrays["edge_hash"], data["rules"], results)
+
+class GraphDiff:
+    """Changed nodes and edges of `index` relative to a cached snapshot."""
+
+    def __init__(self, cache: ValidationCache, index: GraphIndex):
+        self.index = index
+        node_hash = index.node_hashes()
+        edge_hash = index.edge_hashes()
+        n_nodes, n_edges = len(index.zone), len(index.src)
+
+        same_nodes = cache.same_names(index)
+        if same_nodes:
+            old_to_new = np.arange(n_nodes, dtype=np.int64)
+            self.node_changed = cache.node_hash != node_hash
+        else:
+            position = {n: i for i, n in enumerate(index.names)}
+            old_to_new = np.array([position.get(n, -1) for n in cache.names], dtype=np.int64)
+            kept = old_to_new >= 0
+            # Added nodes count as changed
+            self.node_changed = np.ones(n_nodes, dtype=bool)
+            self.node_changed[old_to_new[kept]] = cache.node_hash[kept] != node_hash[old_to_new[kept]]
+
+        if same_nodes and np.array_equal(cache.src, index.src) and np.array_equal(cache.dst, index.dst):
+            self.old_edge_to_new = np.arange(n_edges, dtype=np.int64)
+            self.edge_changed = cache.edge_hash != edge_hash
+        else:
+            # Match edges by (source, target) in new-node-id space
+            old_src, old_dst = old_to_new[cache.src], old_to_new[cache.dst]
+            old_keys = np.where((old_src >= 0) & (old_dst >= 0), old_src * n_nodes + old_dst, -1)
+            new_keys = index.src * n_nodes + index.dst
+            self.old_edge_to_new = np.full(len(old_keys), -1, dtype=np.int64)
+            if n_edges:
+                order = np.argsort(new_keys)
+                sorted_keys = new_keys[order]
+                pos = np.minimum(np.searchsorted(sorted_keys, old_keys), n_edges - 1)
+                hit = (old_keys >= 0) & (sorted_keys[pos] == old_keys)
+                self.old_edge_to_new[hit] = order[pos[hit]]
+            found = self.old_edge_to_new >= 0
+            # Added edges count as changed
+            self.edge_changed = np.ones(n_edges, dtype=bool)
+            matched = self.old_edge_to_new[found]
+            self.edge_changed[matched] = cache.edge_hash[found] != edge_hash[matched]
+
+    def affected_edges(self, radius: int = 0) -> np.ndarray:
+        """Positions of edges within `radius` hops of a changed node or edge."""
+        src, dst = self.index.src, self.index.dst
+        touched = self.node_changed.copy()
+        if radius > 0:
+            touched[src[self.edge_changed]] = True
+            touched[dst[self.edge_changed]] = True
+        for _ in range(radius):
+            hit = touched[src] | touched[dst]
+            touched[src[hit]] = True
+            touched[dst[hit]] = True
+        return np.flatnonzero(self.edge_changed | touched[src] | touched[dst])
+
 # --- Main Agent ---
 
-def run_validation(input_path: str, output_path: str):
+def run_validation(input_path: str, output_path: str, include_timings: bool = False,
+                   cache_dir: Optional[str] = None):
     print(f"Loading graph from {input_path}...")
     try:
-        with open(input_path, "rb") as f:
-            graph = pickle.load(f)
-    except (FileNotFoundError, EOFError, pickle.UnpicklingError) as e:
+        if is_graph_arrays(input_path):
+            graph = load_graph_arrays(input_path)
+        else:
+            with open(input_path, "rb") as f:
+                graph = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError) as e:
         print(f"Error loading graph: {e}")
         # Create a failure report
         report = ValidationReport()
@@ -139,17 +918,19 @@ def run_validation(input_path: str, output_path: str):
 
     print(f"Graph loaded. Nodes: {graph.number_of_nodes()}, Edges: {graph.number_of_edges()}")
 
-    report = ValidationReport()
-    rules = [
-        CrossZoneFeedRule(),
-        ElevationConsistencyRule()
-    ]
+    engine = RuleEngine([rule() for rule in DEFAULT_RULES])
 
-    print("Running validation rules...")
-    for rule in rules:
-        results = rule.check(graph)
-        for res in results:
-            report.add_result(res)
+    if cache_dir:
+        print(f"Running validation rules incrementally (cache: {cache_dir})...")
+        report = engine.run_incremental(graph, cache_dir)
+        print(f"  Re-evaluated {engine.reevaluated_edges} of {graph.number_of_edges()} edges")
+    else:
+        print("Running validation rules...")
+        report = engine.run(graph)
+    for name, ms in engine.timings_ms().items():
+        print(f"  {name}: {ms:.3f} ms")
+    if include_timings:
+        report.timings_ms = engine.timings_ms()
 
     # Ensure output directory exists
     # os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -164,10 +945,18 @@ def run_validation(input_path: str, output_path: str):
     print("Validation complete.")
     print(json.dumps(report.to_json(), indent=2))
 
-if __name__ == "__main__":
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Validation Agent")
-    parser.add_argument("--input", default="graph.pkl", help="Path to input graph.pkl")
+    parser.add_argument("--input", default="graph.pkl", help="Path to input graph.pkl or graph_arrays directory")
     parser.add_argument("--output", default="reports/v1/validation_report.json", help="Path to output JSON report")
-    args = parser.parse_args()
+    parser.add_argument("--timings", action="store_true", help="Include per-rule timings in the JSON report")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-check what changed since the last incremental run (cache: <output>.cache/)")
+    parser.add_argument("--cache-dir", default=None, help="Incremental cache directory (implies --incremental)")
+    args = parser.parse_args(argv)
+
+    cache_dir = args.cache_dir or (args.output + ".cache" if args.incremental else None)
+    run_validation(args.input, args.output, args.timings, cache_dir)
 
-    run_validation(args.input, args.output)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import importlib
+import os
+import sys
+
+# Single entry point for the project's tools:
+#
+#   python waterpred.py <command> [options]
+#
+# This module only maps command names to modules; a command's module (and
+# with it numpy, networkx, ...) is imported when that command runs, so
+# `waterpred --help` and typos cost only interpreter start-up. Each
+# module's main(argv) still works as `python <module>.py` too.
+#
+# `waterpred startup` is the start-up regression check: it runs the CLI
+# under `python -X importtime` and fails when imports exceed a budget or
+# pull in a module the command should not need.
+
+COMMANDS = {
+    "compile": ("compiler", "Compile data/<version>/ into build/<version>/ (--all: every version)"),
+    "validate": ("validation_agent", "Check a built graph against the validation rules"),
+    "simulate": ("generate_data", "Generate synthetic sensor data for the standard scenarios"),
+    "inspect": ("inspect_graph", "Write a graph's nodes and edges to a text file"),
+    "sweep": ("scenario_sweep", "Run a scenario sweep over a process pool"),
+    "extended-period": ("extended_period", "Extended-period tank and pump simulation"),
+    "sensitivity": ("sensitivity", "Sensor x node sensitivity (Jacobian) to extra demand"),
+    "detect": ("anomaly_detector", "Stream sensor files through the anomaly detector and score it"),
+    "store": ("timeseries_store", "Convert sensor CSVs into memory-mapped time-series stores"),
+    "batches": ("training_loader", "Iterate windowed training batches and report throughput"),
+    "serve": ("graph_service", "Resident graph service (serve, query, bench)"),
+    "synthetic": ("synthetic_building", "Write DSL inputs for a synthetic high-rise"),
+    "gen-all": ("gen_all", "Write the v2 application, system and demand files (default data/v2)"),
+    "gen-local": ("gen_local", "Write the v2 application, system and demand files (default .)"),
+    "mock": ("mock_data_generator", "Write a small graph.pkl that trips each validation rule"),
+    "benchmark": ("benchmark", "Scaling benchmark on synthetic buildings"),
+}
+
+STARTUP_BUDGET_MS = 30.0
+COMMAND_BUDGET_MS = 400.0
+# Modules only a command that actually loads a graph should import
+HEAVY_MODULES = ("networkx", "pandas", "pyarrow", "scipy")
+
+def usage():
+    lines = ["usage: waterpred <command> [options]", "", "commands:"]
+    width = max(len(name) for name in COMMANDS) + 2
+    for name, (_, description) in COMMANDS.items():
+        lines.append(f"  {name:<{width}}{description}")
+    lines.append(f"  {'startup':<{width}}Check CLI start-up import time against a budget")
+    lines.append("")
+    lines.append("Run `waterpred <command> --help` for a command's options.")
+    return "\n".join(lines)
+
+def import_profile(args):
+    """
+    Runs `python -X importtime waterpred.py <args>`; returns (total import
+    milliseconds, set of top-level modules imported).
+    """
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.join(here, "waterpred.py")] + args,
+                          capture_output=True, text=True, cwd=here)
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue # header line
+        total_us += int(fields[0])
+        modules.add(fields[2].strip().split(".")[0])
+    return total_us / 1000.0, modules
+
+def check_startup(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="waterpred startup",
+                                     description="Fail if CLI start-up imports exceed a budget")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Import budget for `waterpred --help`")
+    parser.add_argument("--command-budget-ms", type=float, default=COMMAND_BUDGET_MS,
+                        help="Import budget for each `waterpred <command> --help`")
+    parser.add_argument("--runs", type=int, default=3, help="Best of this many runs counts")
+    args = parser.parse_args(argv)
+
+    failures = []
+    checks = [("--help", ["--help"], args.budget_ms)]
+    checks += [(f"{name} --help", [name, "--help"], args.command_budget_ms) for name in COMMANDS]
+    for label, command, budget in checks:
+        profiles = [import_profile(command) for _ in range(max(1, args.runs))]
+        ms = min(p[0] for p in profiles)
+        heavy = sorted(set(HEAVY_MODULES) & profiles[0][1])
+        status = "ok"
+        if ms > budget:
+            status = f"over budget ({budget:.0f} ms)"
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+        if status != "ok":
+            failures.append(label)
+        print(f"  {label:<28} {ms:8.1f} ms  {status}")
+    if failures:
+        print(f"Start-up check failed: {', '.join(failures)}")
+        return 1
+    print("Start-up check passed")
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command == "startup":
+        return check_startup(rest)
+    if command not in COMMANDS:
+        print(f"waterpred: unknown command '{command}'\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[command][0])
+    # argparse takes the program name from argv[0]
+    sys.argv = [f"waterpred {command}"] + rest
+    return module.main(rest)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import generate_data
+from counter_rng import CounterNoise
+from graph_artifact import GraphArrays
+
+# Zone-partitioned simulation. Sources, tanks and pumps are boundary nodes:
+# each one roots a zone made of the ordinary nodes reachable from it without
+# crossing another boundary node. A zone only sees its root's head and the
+# flow drawn through its exits (edges into other boundary nodes), so zones
+# are solved independently on a process pool and coupled afterwards:
+#
+#   out(b) = subtree flow at the root of b's zone + out() of its root exits
+#
+# Exits from a zone's interior (e.g. a booster pump fed from a riser) add
+# out() of the pump as outflow at that node, so such zones are solved in a
+# later wave than the zones they feed.
+
+BOUNDARY_TYPES = ("Source", "Tank", "Pump")
+
+MAINS_HEAD = 30.0 # m of head at a Source (~300 kPa)
+PUMP_HEAD = 30.0 # m of head on a pump's discharge side
+
+def node_types(G):
+    """`type` attribute per node (None if missing), in graph_adjacency order."""
+    if isinstance(G, GraphArrays):
+        vocab = G.vocab["node_type"]
+        return [vocab[c] if c >= 0 else None for c in G.node_type.tolist()]
+    return [d.get("type") for _, d in G.nodes(data=True)]
+
+class Zone:
+    def __init__(self, root, root_type, members, net, exits):
+        self.root = root # global index of the boundary node
+        self.root_type = root_type
+        self.members = members # global indices, net.nodes order
+        self.net = net # CompiledNetwork over the zone, rooted at `root`
+        self.exits = exits # (global index inside zone, boundary global index)
+
+    @property
+    def name(self):
+        return self.net.nodes[self.net.tank]
+
+    def head(self, hours):
+        """Root head in metres per timestep."""
+        if self.root_type == "Tank":
+            return generate_data.tank_level(hours)
+        return np.full(len(hours), MAINS_HEAD if self.root_type == "Source" else PUMP_HEAD)
+
+class ZonePartition:
+    """Splits a graph into zones at its Source, Tank and Pump nodes."""
+
+    def __init__(self, G):
+        nodes, base_demand, succ, succ_type = generate_data.graph_adjacency(G)
+        types = node_types(G)
+        self.nodes = nodes
+        self.index = {n: i for i, n in enumerate(nodes)}
+        boundary = np.array([t in BOUNDARY_TYPES for t in types], dtype=bool)
+        if not boundary.any():
+            raise ValueError("Graph has no Source, Tank or Pump nodes to partition at")
+
+        self.zones = []
+        self.zone_of = {}
+        owner = np.full(len(nodes), -1, dtype=np.int64)
+        crossings = []
+        for root in np.flatnonzero(boundary).tolist():
+            z = len(self.zones)
+            owner[root] = z
+            members = [root]
+            exits = []
+            head = 0
+            while head < len(members):
+                u = members[head]
+                head += 1
+                for v in succ[u]:
+                    if boundary[v]:
+                        exits.append((u, v))
+                    elif owner[v] < 0:
+                        owner[v] = z
+                        members.append(v)
+                    elif owner[v] != z:
+                        crossings.append((u, v))
+
+            local = {g: i for i, g in enumerate(members)}
+            zone_succ, zone_succ_type = [], []
+            for u in members:
+                pairs = [(local[v], t) for v, t in zip(succ[u], succ_type[u]) if v in local]
+                zone_succ.append([v for v, _ in pairs])
+                zone_succ_type.append([t for _, t in pairs])
+            net = generate_data.CompiledNetwork.from_adjacency(
+                [nodes[g] for g in members], base_demand[members], zone_succ, zone_succ_type, nodes[root],
+                node_ids=members)
+            self.zone_of[root] = z
+            self.zones.append(Zone(root, types[root], np.array(members, dtype=np.int64), net, exits))
+
+        # Zone of every node (-1: not reachable from any boundary node)
+        self.owner = owner
+        if crossings:
+            u, v = crossings[0]
+            print(f"Warning: {len(crossings)} edge(s) join two zones without a tank or pump; "
+                  f"their flow is ignored (first: {nodes[u]} -> {nodes[v]}).")
+        self.order = self._coupling_order()
+
+    def targets(self, zone):
+        return [self.zone_of[b] for _, b in zone.exits]
+
+    def _coupling_order(self):
+        """Zones with every zone they feed before them; raises on a boundary cycle."""
+        order, state = [], [0] * len(self.zones)
+        for start in range(len(self.zones)):
+            if state[start]:
+                continue
+            stack = [(start, iter(self.targets(self.zones[start])))]
+            state[start] = 1
+            while stack:
+                z, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    state[z] = 2
+                    order.append(z)
+                elif state[child] == 1:
+                    raise ValueError(f"Supply cycle through tanks/pumps at {self.zones[child].name}")
+                elif state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, iter(self.targets(self.zones[child]))))
+        return order
+
+# --- Worker ---
+
+_worker = {}
+
+def _init_worker(partition, solver="auto"):
+    _worker["partition"] = partition
+    _worker["solver"] = solver
+
+def _solve_zone(task):
+    z, timestamps, anomaly_type, anomaly_node, active, magnitude, noise, step_offset, exit_flows, head, only = task
+    zone = _worker["partition"].zones[z]
+    net = zone.net
+    if anomaly_node not in net.index:
+        anomaly_type = anomaly_node = None
+    outflow = None
+    if exit_flows:
+        outflow = np.zeros((len(timestamps), len(net.nodes)))
+        for local, flow in exit_flows:
+            outflow[:, local] += flow
+    if head is None:
+        head = zone.head(generate_data.timestamp_hours(timestamps).astype(np.float64))
+    if only is not None:
+        # The root's draw is always needed for coupling; it goes last
+        only = np.append(only, net.tank)
+    pressure, flow, subtree = generate_data.solve_batch(
+        net, timestamps, anomaly_type, anomaly_node, active, noise, magnitude,
+        head=head, outflow=outflow, solver=_worker["solver"], only=only, step_offset=step_offset)
+    if only is not None:
+        return z, pressure[:, :-1], flow[:, :-1], subtree[:, -1]
+    return z, pressure, flow, subtree[:, net.tank]
+
+class ZoneSimulator:
+    """
+    simulate_batch over every zone of the building. With workers > 1 the
+    zones of each wave are solved on a process pool; the partition is sent
+    to each worker once.
+    """
+
+    def __init__(self, G, workers=None, solver="auto"):
+        self.partition = G if isinstance(G, ZonePartition) else ZonePartition(G)
+        self.nodes = self.partition.nodes
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        _init_worker(self.partition, solver)
+        if self.workers > 1 and len(self.partition.zones) > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.partition, solver))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def simulate(self, timestamps, anomaly_type=None, anomaly_node=None, active=None, magnitude=None,
+                 seed=0, step_offset=0, heads=None, boundary_flows=None, boundary_inflows=None, only=None,
+                 scenario=0):
+        """
+        (pressure, flow) for every node, shaped (len(timestamps), len(nodes)),
+        or one column per entry of the global node indices `only`, in
+        which case each zone's solve is limited to those nodes (as in
+        generate_data.solve_batch).
+        Noise is a counter_rng.CounterNoise keyed by (seed, scenario,
+        step_offset + timestep, node index in the full graph), so results do
+        not depend on the number of workers or how the graph is zoned. `heads` and `boundary_flows`
+        ({zone: series}) override a zone's root head and the flow its root
+        passes on, e.g. with tank levels and pump flows from an
+        extended-period run. `boundary_inflows` ({zone: series}) is the flow
+        drawn into a zone's root from upstream when that differs from what
+        it passes on (a tank filling or draining); by default the two match.
+        """
+        heads = heads or {}
+        boundary_flows = boundary_flows or {}
+        boundary_inflows = boundary_inflows or {}
+        noise = CounterNoise(seed, scenario)
+        partition = self.partition
+        zones = partition.zones
+        n_steps = len(timestamps)
+        # Output column of every node (-1: not requested)
+        column = np.arange(len(self.nodes))
+        if only is not None:
+            only = np.asarray(only, dtype=np.int64)
+            column = np.full(len(self.nodes), -1, dtype=np.int64)
+            column[only] = np.arange(len(only))
+        n_columns = len(self.nodes) if only is None else len(only)
+        pressure = np.zeros((n_steps, n_columns))
+        flow = np.zeros((n_steps, n_columns))
+        selected = {} # zone -> local indices solved
+        draws = {} # zone -> subtree flow at its root
+        out = {} # zone -> flow its root passes on, including everything downstream
+        # Flow the zone upstream delivers into zone z's root
+        into = lambda z: boundary_inflows[z] if z in boundary_inflows else out[z]
+
+        pending = list(partition.order)
+        while pending:
+            # Zones whose interior exits are all known; root exits are added after solving
+            wave = [z for z in pending if all(
+                partition.zone_of[b] in out for u, b in zones[z].exits if u != zones[z].root)]
+            if not wave:
+                # Nothing left can be solved: some interior exit waits on a zone that never finishes
+                names = ", ".join(zones[z].name for z in pending)
+                raise ValueError(f"Zones {names} wait on exit flows that never resolve")
+            tasks = []
+            for z in wave:
+                zone = zones[z]
+                local = zone.net.index
+                exit_flows = [(local[self.nodes[u]], into(partition.zone_of[b]))
+                              for u, b in zone.exits if u != zone.root]
+                selected[z] = None if only is None else np.flatnonzero(column[zone.members] >= 0)
+                tasks.append((z, timestamps, anomaly_type, anomaly_node, active, magnitude,
+                              noise, step_offset, exit_flows,
+                              heads.get(z), selected[z]))
+            if self._pool is not None and len(tasks) > 1:
+                results = self._pool.map(_solve_zone, tasks)
+            else:
+                results = map(_solve_zone, tasks)
+
+            for z, p, q, draw in results:
+                members = zones[z].members
+                if selected[z] is not None:
+                    members = members[selected[z]]
+                members = column[members]
+                pressure[:, members] = p
+                flow[:, members] = q
+                draws[z] = draw
+            pending = [z for z in pending if z not in draws]
+
+            # partition.order lists every zone after the zones it feeds
+            for z in partition.order:
+                if z in out or z not in draws or not all(t in out for t in partition.targets(zones[z])):
+                    continue
+                zone = zones[z]
+                if z in boundary_flows:
+                    total = np.asarray(boundary_flows[z], dtype=np.float64)
+                else:
+                    total = draws[z].copy()
+                    for u, b in zone.exits:
+                        if u == zone.root:
+                            total += into(partition.zone_of[b])
+                out[z] = total
+                # A boundary node's flow is what it passes on
+                if column[zone.root] >= 0:
+                    flow[:, column[zone.root]] = total
+        return pressure, flow